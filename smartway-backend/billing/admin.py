@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SubscriptionPlan, DriverSubscription, Payment
+from .models import SubscriptionPlan, DriverSubscription, DriverEntitlement, Payment
 
 
 @admin.register(SubscriptionPlan)
@@ -34,6 +34,25 @@ class DriverSubscriptionAdmin(admin.ModelAdmin):
     )  # оставляю как было, если поля есть в кастомном User
 
 
+@admin.register(DriverEntitlement)
+class DriverEntitlementAdmin(admin.ModelAdmin):
+    list_display = (
+        "driver",
+        "plan",
+        "priority_level",
+        "view_delay_seconds",
+        "expires_at",
+        "updated_at",
+    )
+    list_filter = ("plan",)
+    search_fields = (
+        "driver__phone_number",
+        "driver__full_name",
+    )
+    raw_id_fields = ("driver", "subscription")
+    readonly_fields = ("updated_at",)
+
+
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,93 @@
+# billing/cache.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+# Общая метка версии прав (видна всем воркерам через Django cache)
+VERSION_CACHE_KEY = "billing:entitlements:version"
+# Как часто воркер сверяет свой кэш с общей меткой, сек
+VERSION_CHECK_INTERVAL = 5
+
+ENTITLEMENT_CACHE_SIZE = 10000
+ENTITLEMENT_CACHE_TTL = 60  # сек
+
+MISSING = object()
+
+
+def _current_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add - не перетираем метку, которую успел выставить другой воркер
+        if not cache.add(VERSION_CACHE_KEY, version, timeout=None):
+            version = cache.get(VERSION_CACHE_KEY, version)
+    return version
+
+
+class EntitlementCache:
+    """
+    LRU-кэш прав водителей в памяти процесса: driver_id -> DriverEntitlement или None.
+    Запись живёт ttl секунд; смена общей версии (покупка, изменение тарифа,
+    свипер) сбрасывает кэш во всех воркерах не позже VERSION_CHECK_INTERVAL.
+    """
+
+    def __init__(self, maxsize=ENTITLEMENT_CACHE_SIZE, ttl=ENTITLEMENT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # driver_id -> (записано_в, значение)
+        self._version = None
+        self._checked_at = 0.0
+
+    def _sync_version(self, now):
+        if now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return
+        version = _current_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        self._checked_at = now
+
+    def get(self, driver_id):
+        """Значение из кэша или MISSING"""
+        now = time.monotonic()
+        with self._lock:
+            self._sync_version(now)
+            entry = self._entries.get(driver_id)
+            if entry is None or now - entry[0] >= self.ttl:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(driver_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, driver_id, value):
+        with self._lock:
+            self._entries[driver_id] = (time.monotonic(), value)
+            self._entries.move_to_end(driver_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, driver_ids=None):
+        """Сбросить записи (None - все) здесь и сменить общую версию для остальных воркеров"""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+        with self._lock:
+            if driver_ids is None:
+                self._entries.clear()
+            else:
+                for driver_id in driver_ids:
+                    self._entries.pop(driver_id, None)
+            self._checked_at = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+entitlement_cache = EntitlementCache()
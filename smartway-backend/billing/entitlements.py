@@ -0,0 +1,127 @@
+# billing/entitlements.py
+"""
+Материализованное "текущее право" водителя (DriverEntitlement).
+Выбор лучшей подписки (join с тарифом, фильтр по expires_at) делается
+только при покупке/изменении подписки и в свипере, а проверки прав - это
+один поиск по первичному ключу, а чаще - попадание в кэш воркера (billing/cache.py).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import MISSING, entitlement_cache
+from .models import DriverEntitlement, DriverSubscription
+
+
+DEFAULT_BATCH_SIZE = 500
+
+ENTITLEMENT_FIELDS = ["subscription", "plan", "priority_level", "view_delay_seconds", "expires_at", "updated_at"]
+
+
+def _best_subscriptions(driver_ids, now):
+    """{driver_id: подписка} - активная подписка с наибольшим приоритетом"""
+    subscriptions = (
+        DriverSubscription.objects
+        .select_related("plan")
+        .filter(driver_id__in=driver_ids, expires_at__gte=now, plan__is_active=True)
+        .order_by("driver_id", "-plan__priority_level", "-expires_at")
+    )
+    best = {}
+    for sub in subscriptions:
+        best.setdefault(sub.driver_id, sub)
+    return best
+
+
+def refresh_entitlements(driver_ids, now=None):
+    """Пересчитать права водителей: upsert для имеющих подписку, delete для остальных"""
+    driver_ids = set(driver_ids)
+    if not driver_ids:
+        return
+    now = now or timezone.now()
+    with transaction.atomic():
+        best = _best_subscriptions(driver_ids, now)
+        DriverEntitlement.objects.filter(driver_id__in=driver_ids - set(best)).delete()
+        DriverEntitlement.objects.bulk_create(
+            [
+                DriverEntitlement(
+                    driver_id=driver_id,
+                    subscription=sub,
+                    plan=sub.plan,
+                    priority_level=sub.plan.priority_level,
+                    view_delay_seconds=sub.plan.view_delay_seconds,
+                    expires_at=sub.expires_at,
+                    updated_at=now,
+                )
+                for driver_id, sub in best.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["driver"],
+            update_fields=ENTITLEMENT_FIELDS,
+        )
+        # Сразу - для этого процесса, после коммита - чтобы никто не успел
+        # закэшировать строку из ещё не закоммиченного состояния
+        invalidate_entitlements(driver_ids)
+        transaction.on_commit(lambda: invalidate_entitlements(driver_ids))
+
+
+def invalidate_entitlements(driver_ids=None):
+    """Сбросить кэш прав (None - целиком) во всех воркерах"""
+    entitlement_cache.invalidate(driver_ids)
+
+
+def get_entitlement(user, now=None):
+    """
+    Активное право водителя или None.
+    Из кэша воркера; при промахе - один SELECT по PK. Если строка уже истекла,
+    но свипер до неё ещё не дошёл, пересчитываем её на месте (у водителя
+    может быть другая подписка с меньшим приоритетом).
+    """
+    if not getattr(user, "pk", None):
+        return None
+    now = now or timezone.now()
+    entitlement = entitlement_cache.get(user.pk)
+    if entitlement is not MISSING and (entitlement is None or entitlement.expires_at >= now):
+        return entitlement
+
+    entitlement = DriverEntitlement.objects.select_related("plan").filter(pk=user.pk).first()
+    if entitlement is not None and entitlement.expires_at < now:
+        refresh_entitlements([user.pk], now)
+        entitlement = DriverEntitlement.objects.select_related("plan").filter(pk=user.pk).first()
+    entitlement_cache.set(user.pk, entitlement)
+    return entitlement
+
+
+def expire_entitlements_batch(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Одна пачка истёкших прав по индексу expires_at. Возвращает число обработанных водителей."""
+    now = now or timezone.now()
+    driver_ids = list(
+        DriverEntitlement.objects
+        .filter(expires_at__lt=now)
+        .order_by("expires_at")
+        .values_list("driver_id", flat=True)[:batch_size]
+    )
+    refresh_entitlements(driver_ids, now)
+    return len(driver_ids)
+
+
+def expire_entitlements(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Пройти все пачки истёкших прав. Возвращает число обработанных водителей."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        processed = expire_entitlements_batch(now, batch_size)
+        total += processed
+        if processed < batch_size:
+            return total
+
+
+def rebuild_entitlements(batch_size=DEFAULT_BATCH_SIZE):
+    """Полный пересчёт (после миграции или правки данных в обход ORM)"""
+    now = timezone.now()
+    driver_ids = set(
+        DriverSubscription.objects.filter(expires_at__gte=now).values_list("driver_id", flat=True)
+    )
+    driver_ids |= set(DriverEntitlement.objects.values_list("driver_id", flat=True))
+    driver_ids = sorted(driver_ids)
+    for start in range(0, len(driver_ids), batch_size):
+        refresh_entitlements(driver_ids[start:start + batch_size], now)
+    return len(driver_ids)
@@ -1,10 +1,19 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from billing.models import DriverSubscription
+
+from billing.entitlements import DEFAULT_BATCH_SIZE, expire_entitlements, rebuild_entitlements
+
 
 class Command(BaseCommand):
-    help = "Deactivate expired driver subscriptions"
+    help = "Снять/пересчитать истёкшие права водителей (DriverEntitlement) пачками по индексу expires_at"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--rebuild", action="store_true", help="Полный пересчёт по всем подпискам")
 
     def handle(self, *args, **options):
-        updated = DriverSubscription.objects.filter(is_active=True, ends_at__lte=timezone.now()).update(is_active=False)
-        self.stdout.write(self.style.SUCCESS(f"Deactivated: {updated}"))
+        if options["rebuild"]:
+            rebuilt = rebuild_entitlements(batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt entitlements for {rebuilt} drivers"))
+            return
+        expired = expire_entitlements(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired entitlements: {expired}"))
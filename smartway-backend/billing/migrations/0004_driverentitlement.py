@@ -0,0 +1,82 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_entitlements(apps, schema_editor):
+    """Текущее право для водителей с активной подпиской (лучший приоритет)"""
+    DriverSubscription = apps.get_model("billing", "DriverSubscription")
+    DriverEntitlement = apps.get_model("billing", "DriverEntitlement")
+
+    best = {}
+    subscriptions = (
+        DriverSubscription.objects.select_related("plan")
+        .filter(expires_at__gte=timezone.now(), plan__is_active=True)
+        .order_by("driver_id", "-plan__priority_level", "-expires_at")
+    )
+    for sub in subscriptions.iterator(chunk_size=500):
+        best.setdefault(sub.driver_id, sub)
+    DriverEntitlement.objects.bulk_create(
+        [
+            DriverEntitlement(
+                driver_id=driver_id,
+                subscription=sub,
+                plan=sub.plan,
+                priority_level=sub.plan.priority_level,
+                view_delay_seconds=sub.plan.view_delay_seconds,
+                expires_at=sub.expires_at,
+            )
+            for driver_id, sub in best.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0003_subscriptionplan_remove_subscription_tariff_and_more"),
+        ("users", "0011_otpcode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DriverEntitlement",
+            fields=[
+                (
+                    "driver",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="entitlement",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("priority_level", models.IntegerField()),
+                ("view_delay_seconds", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "plan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="billing.subscriptionplan",
+                    ),
+                ),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="billing.driversubscription",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_entitlements, migrations.RunPython.noop),
+    ]
@@ -39,6 +39,33 @@ class DriverSubscription(models.Model):
         return self.expires_at >= timezone.now()
 
 
+class DriverEntitlement(models.Model):
+    """
+    Текущее право водителя (материализовано из DriverSubscription).
+    Одна строка на водителя с активной подпиской: проверка - поиск по PK.
+    Обновляется при покупке/изменении подписки и свипером deactivate_expired_subs.
+    """
+    driver = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="entitlement",
+    )
+    subscription = models.ForeignKey(DriverSubscription, on_delete=models.CASCADE, related_name="+")
+    plan = models.ForeignKey(SubscriptionPlan, on_delete=models.PROTECT, related_name="+")
+    priority_level = models.IntegerField()
+    view_delay_seconds = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.driver_id} -> {self.plan_id} до {self.expires_at}"
+
+    @property
+    def is_active(self):
+        return self.expires_at >= timezone.now()
+
+
 class Payment(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
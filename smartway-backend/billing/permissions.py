@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission
-from django.utils import timezone
+
+from .entitlements import get_entitlement
+
 
 class IsDriverWithActiveSubscription(BasePermission):
     message = "Подписка не активна. Оплатите план, чтобы получать заказы."
@@ -10,4 +12,4 @@ class IsDriverWithActiveSubscription(BasePermission):
             return False
         if not getattr(u, "is_driver", False):
             return False
-        return u.subscriptions.filter(is_active=True, ends_at__gt=timezone.now()).exists()
+        return get_entitlement(u) is not None
@@ -0,0 +1,28 @@
+# billing/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .entitlements import refresh_entitlements
+from .models import DriverEntitlement, DriverSubscription, SubscriptionPlan
+
+
+@receiver(post_save, sender=DriverSubscription)
+@receiver(post_delete, sender=DriverSubscription)
+def refresh_entitlement_on_subscription_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_entitlements([instance.driver_id])
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+def refresh_entitlements_on_plan_save(sender, instance, raw=False, **kwargs):
+    """Приоритет/задержка/активность тарифа изменились - пересчитать его подписчиков"""
+    if raw:
+        return
+    driver_ids = set(
+        DriverSubscription.objects.filter(plan=instance, expires_at__gte=timezone.now())
+        .values_list("driver_id", flat=True)
+    )
+    driver_ids |= set(DriverEntitlement.objects.filter(plan=instance).values_list("driver_id", flat=True))
+    refresh_entitlements(driver_ids)
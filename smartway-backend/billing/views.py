@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
 
+from .entitlements import get_entitlement
 from .models import SubscriptionPlan, DriverSubscription, Payment
 from .serializers import PlanSerializer, DriverSubscriptionSerializer  # см. пункт 3
 
@@ -50,7 +51,7 @@ class MockPayView(APIView):
             external_id="mock",  # если нужно
         )
 
-        # создаём подписку
+        # создаём подписку (DriverEntitlement обновит сигнал billing.signals)
         DriverSubscription.objects.create(
             driver=user,
             plan=plan,
@@ -90,20 +91,11 @@ class CurrentPlanView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        now = timezone.now()
-
-        sub = (
-            DriverSubscription.objects
-            .select_related("plan")
-            .filter(driver=user, expires_at__gte=now)
-            .order_by("-expires_at")
-            .first()
-        )
-        if not sub:
+        entitlement = get_entitlement(request.user)
+        if not entitlement:
             return Response({"plan": None}, status=200)
 
-        plan = sub.plan
+        plan = entitlement.plan
         return Response(
             {
                 "plan": {
@@ -114,7 +106,7 @@ class CurrentPlanView(APIView):
                     "priority_level": plan.priority_level,
                     "view_delay_seconds": plan.view_delay_seconds,
                 },
-                "expires_at": sub.expires_at,
+                "expires_at": entitlement.expires_at,
             },
             status=200,
         )
\ No newline at end of file
@@ -0,0 +1,30 @@
+# chat/access.py
+from django.core.cache import cache
+from django.db.models import Q
+
+from trips.models import Trip
+
+# Результат проверки участника кэшируется ненадолго: переподключения
+# не бьют в БД, а снятый с заказа водитель теряет доступ через минуту
+PARTICIPANT_CACHE_TTL = 60
+
+
+def is_trip_participant(user, trip_id):
+    """Пассажир или водитель заказа - только они видят историю чата"""
+    if not getattr(user, "is_authenticated", False):
+        return False
+    return Trip.objects.filter(pk=trip_id).filter(
+        Q(passenger_id=user.id) | Q(driver_id=user.id)
+    ).exists()
+
+
+def is_trip_participant_cached(user, trip_id):
+    """То же, с кэшем на PARTICIPANT_CACHE_TTL секунд (для WebSocket-подключений)"""
+    if not getattr(user, "is_authenticated", False):
+        return False
+    key = f"chat:participant:{trip_id}:{user.id}"
+    allowed = cache.get(key)
+    if allowed is None:
+        allowed = is_trip_participant(user, trip_id)
+        cache.set(key, allowed, PARTICIPANT_CACHE_TTL)
+    return allowed
@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ChatMessage
+
+
+@admin.register(ChatMessage)
+class ChatMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "trip", "sender", "text", "created_at")
+    search_fields = ("text", "sender__full_name")
+    raw_id_fields = ("trip", "sender")
@@ -0,0 +1,67 @@
+# chat/buffer.py
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# Сбрасываем пачку, когда набралось столько сообщений ...
+FLUSH_SIZE = 50
+# ... или прошло столько секунд с первого несохранённого
+FLUSH_INTERVAL = 0.5
+
+
+@database_sync_to_async
+def _bulk_insert(messages):
+    ChatMessage.objects.bulk_create(messages)
+
+
+class ChatWriteBuffer:
+    """
+    Буфер записи сообщений чата: один bulk_create на пачку вместо INSERT на каждое.
+    Живёт в event loop воркера и общий для всех его соединений.
+    """
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._timer = None
+        self._lock = None
+
+    def _get_lock(self):
+        # Lock создаём лениво - внутри работающего event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def add(self, message):
+        self._pending.append(message)
+        if len(self._pending) >= self.flush_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        async with self._get_lock():
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await _bulk_insert(batch)
+            except Exception:
+                logger.exception("Не удалось сохранить %s сообщений чата", len(batch))
+
+
+chat_buffer = ChatWriteBuffer()
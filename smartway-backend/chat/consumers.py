@@ -1,28 +1,67 @@
 import json
+from django.utils import timezone
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from .access import is_trip_participant_cached
+from .buffer import chat_buffer
+from .models import ChatMessage
+
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.trip_id = self.scope["url_route"]["kwargs"]["trip_id"]
+        user = self.scope.get("user")
+        if not getattr(user, "is_authenticated", False):
+            await self.close(code=4401)
+            return
+        # проверяем один раз на соединение, а не на каждое сообщение
+        if not await database_sync_to_async(is_trip_participant_cached)(user, self.trip_id):
+            await self.close(code=4403)
+            return
+        self.sender_id = user.id
+        self.sender_name = getattr(user, "full_name", "") or str(user) or "Пользователь"
         self.room_group_name = f"trip_chat_{self.trip_id}"
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.accept()
+        await self.accept(subprotocol=self.scope.get("auth_subprotocol"))
 
     async def disconnect(self, close_code):
+        if not hasattr(self, "room_group_name"):
+            return
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        # не держим в буфере сообщения ушедшего клиента
+        await chat_buffer.flush()
 
     async def receive(self, text_data):
         data = json.loads(text_data)
         message = data.get("message", "")
-        user = "Аноним"
-        scope_user = self.scope.get("user")
-        if getattr(scope_user, "is_authenticated", False):
-            user = getattr(scope_user, "full_name", str(scope_user)) or "Пользователь"
+        user = self.sender_name
+        sender_id = self.sender_id
+
+        if message:
+            # история пишется пачками (chat/buffer.py), историю отдаёт /api/chat/trips/<id>/messages/
+            created_at = timezone.now()
+            await chat_buffer.add(ChatMessage(
+                trip_id=int(self.trip_id),
+                sender_id=sender_id,
+                text=message,
+                created_at=created_at,
+            ))
+        else:
+            created_at = None
 
         await self.channel_layer.group_send(
             self.room_group_name,
-            {"type": "chat_message", "message": f"{user}: {message}"}
+            {
+                "type": "chat_message",
+                "message": f"{user}: {message}",
+                "sender": sender_id,
+                "created_at": created_at.isoformat() if created_at else None,
+            }
         )
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({"message": event["message"]}))
+        await self.send(text_data=json.dumps({
+            "message": event["message"],
+            "sender": event.get("sender"),
+            "created_at": event.get("created_at"),
+        }))
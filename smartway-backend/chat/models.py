@@ -1,3 +1,34 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class ChatMessage(models.Model):
+    """Сообщение в чате заказа (ws/chat/<trip_id>/)"""
+
+    trip = models.ForeignKey(
+        "trips.Trip",
+        on_delete=models.CASCADE,
+        related_name="chat_messages",
+    )
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="chat_messages",
+    )
+    text = models.TextField()
+    # время получения сервером (запись в БД идёт пачками, позже)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        verbose_name = "Сообщение чата"
+        verbose_name_plural = "Сообщения чата"
+        indexes = [
+            # история чата с курсорной пагинацией: WHERE trip = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["trip", "created_at", "id"], name="chat_message_history_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.trip_id}] {self.sender_id}: {self.text[:30]}"
@@ -2,5 +2,5 @@ from django.urls import re_path
 from .consumers import ChatConsumer
 
 websocket_urlpatterns = [
-    re_path(r"ws/chat/(?P<trip_id>\d+)/$", ChatConsumer.asgi()),
+    re_path(r"ws/chat/(?P<trip_id>\d+)/$", ChatConsumer.as_asgi()),
 ]
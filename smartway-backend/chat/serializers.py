@@ -0,0 +1,11 @@
+from rest_framework import serializers
+
+from .models import ChatMessage
+
+
+class ChatMessageSerializer(serializers.ModelSerializer):
+    sender_name = serializers.CharField(source="sender.full_name", read_only=True, allow_null=True)
+
+    class Meta:
+        model = ChatMessage
+        fields = ("id", "trip", "sender", "sender_name", "text", "created_at")
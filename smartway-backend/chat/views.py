@@ -1,3 +1,28 @@
-from django.shortcuts import render
+from rest_framework import generics
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
 
-# Create your views here.
+from trips.pagination import KeysetPagination
+from .access import is_trip_participant
+from .models import ChatMessage
+from .serializers import ChatMessageSerializer
+
+
+class ChatHistoryPagination(KeysetPagination):
+    """Новые сверху: первая страница - последние N сообщений, cursor листает в прошлое"""
+
+    def __init__(self):
+        super().__init__(ordering=("-created_at", "-id"))
+
+
+class ChatHistoryView(generics.ListAPIView):
+    """GET /api/chat/trips/{trip_id}/messages/ - история чата заказа (?page_size, ?cursor)"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = ChatMessageSerializer
+    pagination_class = ChatHistoryPagination
+
+    def get_queryset(self):
+        trip_id = self.kwargs["trip_id"]
+        if not is_trip_participant(self.request.user, trip_id):
+            raise PermissionDenied("Вы не участвуете в этом заказе.")
+        return ChatMessage.objects.filter(trip_id=trip_id).select_related("sender")
@@ -1,17 +1,20 @@
 import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 from django.conf import settings
-import chat.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.local")
 
 django_asgi_app = get_asgi_application()
 
+# импортируют модели - только после инициализации Django
+import chat.routing  # noqa: E402
+import trips.routing  # noqa: E402
+from users.ws_auth import JWTAuthMiddlewareStack  # noqa: E402
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
-        URLRouter(chat.routing.websocket_urlpatterns)
+    "websocket": JWTAuthMiddlewareStack(
+        URLRouter(chat.routing.websocket_urlpatterns + trips.routing.websocket_urlpatterns)
     ),
 })
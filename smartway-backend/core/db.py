@@ -0,0 +1,33 @@
+# core/db.py
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def write_atomic(using=None):
+    """
+    transaction.atomic() для переходов "прочитать и условно обновить" (CAS).
+    В SQLite внешняя транзакция начинается с BEGIN IMMEDIATE: отложенная
+    транзакция, успевшая прочитать, при параллельной записи сразу получает
+    "database is locked", не дожидаясь timeout. Остальные транзакции
+    остаются DEFERRED, чтобы чтения не брали блокировку на запись.
+    Работает и как декоратор: @write_atomic().
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # режим из OPTIONS выставляется при подключении - подключаемся до подмены
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            # BEGIN уже выполнен - вложенным блокам режим не нужен
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
@@ -21,6 +21,7 @@ urlpatterns = [
     path("api/", include("trips.urls")),
     
     path("api/billing/", include("billing.urls")),
+    path("api/chat/", include("chat.urls")),
     
     # API Documentation
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
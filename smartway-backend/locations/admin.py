@@ -1,6 +1,15 @@
 # locations/admin.py
 from django.contrib import admin
-from .models import Location
+from .autocomplete import invalidate_autocomplete
+from .cache import invalidate_location_names
+from .models import Location, LocationAlias
+
+
+class LocationAliasInline(admin.TabularInline):
+    model = LocationAlias
+    fields = ('name', 'normalized')
+    readonly_fields = ('normalized',)
+    extra = 0
 
 
 @admin.register(Location)
@@ -12,6 +21,7 @@ class LocationAdmin(admin.ModelAdmin):
     list_filter = ('is_active', 'region')
     search_fields = ('code', 'name_ru', 'name_en', 'name_ky')
     list_editable = ('sort_order', 'is_active')
+    inlines = [LocationAliasInline]
     ordering = ('sort_order', 'name_ru')
     
     fieldsets = (
@@ -33,7 +43,11 @@ class LocationAdmin(admin.ModelAdmin):
     @admin.action(description="Активировать выбранные локации")
     def activate(self, request, queryset):
         queryset.update(is_active=True)
+        invalidate_location_names()
+        invalidate_autocomplete()
     
     @admin.action(description="Деактивировать выбранные локации")
     def deactivate(self, request, queryset):
-        queryset.update(is_active=False)
\ No newline at end of file
+        queryset.update(is_active=False)
+        invalidate_location_names()
+        invalidate_autocomplete()
\ No newline at end of file
@@ -5,4 +5,7 @@ from django.apps import AppConfig
 class LocationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "locations"
-    verbose_name = "Локации"
\ No newline at end of file
+    verbose_name = "Локации"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,237 @@
+# locations/autocomplete.py
+import bisect
+import re
+import threading
+import time
+
+from .cache import VERSION_CHECK_INTERVAL, _current_version
+from .models import Location, LocationAlias
+
+
+# Поля, по которым ищем подсказки
+SEARCH_FIELDS = ("name_ru", "name_en", "name_ky", "code", "region")
+# Поля, по которым локацию узнаём при точном вводе
+EXACT_FIELDS = ("name_ru", "name_en", "name_ky", "code")
+# Поля строки ответа (совпадают с LocationSerializer)
+ROW_FIELDS = ("id", "code", "name_ru", "name_en", "name_ky", "region", "sort_order", "is_active")
+
+DEFAULT_LIMIT = 20
+# Минимальное сходство по триграммам для нечёткого совпадения
+TRIGRAM_THRESHOLD = 0.3
+# Свободный ввод считаем опечаткой существующей локации, только если совпадает
+# число слов и отличие не больше стольких правок (у коротких названий - одна).
+# Сходство по триграммам само по себе не годится: "Кочкор" и "Кочкор-Ата" - разные сёла
+MAX_TYPO_DISTANCE = 2
+SHORT_NAME_LENGTH = 5
+
+# Ранги: совпадение с начала названия, с начала слова, нечёткое
+RANK_PREFIX = 0
+RANK_WORD = 1
+RANK_FUZZY = 2
+
+# Кириллица (включая кыргызские ң, ө, ү) -> латиница.
+# "Бишкек" и "Bishkek" приводятся к одному ключу bishkek
+TRANSLIT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m",
+    "н": "n", "ң": "n", "о": "o", "ө": "o", "п": "p", "р": "r", "с": "s",
+    "т": "t", "у": "u", "ү": "u", "ф": "f", "х": "h", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "sh", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya",
+}
+# Латинские варианты одного звука: kh/h, j/zh и т.п.
+LATIN_FOLDS = (("kh", "h"), ("j", "zh"), ("iy", "i"))
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+_lock = threading.Lock()
+_state = {
+    "index": None,
+    "version": None,
+    "checked_at": 0.0,
+}
+
+
+def normalize(value):
+    """Нижний регистр, транслитерация в латиницу, разделители -> пробел"""
+    value = "".join(TRANSLIT.get(char, char) for char in str(value).lower())
+    for source, target in LATIN_FOLDS:
+        value = value.replace(source, target)
+    return _SEPARATORS.sub(" ", value).strip()
+
+
+def edit_distance(a, b, limit):
+    """Расстояние Левенштейна; limit + 1, если оно больше limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AutocompleteIndex:
+    """
+    Индекс подсказок по активным локациям.
+    prefixes - отсортированный список (токен, ранг, id) для bisect по префиксу,
+    grams - триграмма -> id для нечёткого поиска,
+    exact - нормализованное написание -> id всех локаций (включая синонимы и скрытые).
+    """
+
+    def __init__(self, rows, aliases=()):
+        self.rows = {}
+        self.order = {}
+        self.keys = {}
+        self.exact = {}
+        prefixes = []
+        self.grams = {}
+        for row in sorted(rows, key=lambda row: (not row["is_active"], row["sort_order"], row["id"])):
+            pk = row["id"]
+            for field in EXACT_FIELDS:
+                self._add_exact(normalize(row[field]), pk)
+            if not row["is_active"]:
+                continue
+            self.rows[pk] = row
+            self.order[pk] = (row["sort_order"], row["name_ru"], pk)
+            keys = {normalize(row[field]) for field in SEARCH_FIELDS} - {""}
+            self.keys[pk] = {key: trigrams(key) for key in keys}
+            for key in keys:
+                prefixes.append((key, RANK_PREFIX, pk))
+                for word in key.split(" ")[1:]:
+                    prefixes.append((word, RANK_WORD, pk))
+                for gram in self.keys[pk][key]:
+                    self.grams.setdefault(gram, set()).add(pk)
+        for normalized, pk in aliases:
+            self._add_exact(normalized, pk)
+        prefixes.sort()
+        self.prefixes = prefixes
+
+    def _add_exact(self, key, pk):
+        if key:
+            ids = self.exact.setdefault(key, [])
+            if pk not in ids:
+                ids.append(pk)
+
+    def _prefix_ranks(self, query):
+        ranks = {}
+        position = bisect.bisect_left(self.prefixes, (query,))
+        for token, rank, pk in self.prefixes[position:]:
+            if not token.startswith(query):
+                break
+            if rank < ranks.get(pk, RANK_FUZZY):
+                ranks[pk] = rank
+        return ranks
+
+    def _similar(self, query, exclude):
+        query_grams = trigrams(query)
+        candidates = set()
+        for gram in query_grams:
+            candidates |= self.grams.get(gram, set())
+        scores = {}
+        for pk in candidates - exclude.keys():
+            best = 0.0
+            for key_grams in self.keys[pk].values():
+                shared = len(query_grams & key_grams)
+                best = max(best, shared / (len(query_grams) + len(key_grams) - shared))
+            if best >= TRIGRAM_THRESHOLD:
+                scores[pk] = best
+        return scores
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """Строки локаций: сначала совпадения по префиксу, затем по сходству; внутри - sort_order"""
+        query = normalize(text)
+        if not query:
+            return []
+        ranks = self._prefix_ranks(query)
+        ordered = sorted(ranks, key=lambda pk: (ranks[pk], self.order[pk]))
+        if len(ordered) < limit and len(query) >= 3:
+            scores = self._similar(query, ranks)
+            ordered += sorted(scores, key=lambda pk: (-scores[pk], self.order[pk]))
+        return [self.rows[pk] for pk in ordered[:limit]]
+
+    def typo_matches(self, query, exclude=()):
+        """
+        Активные локации, одно из написаний которых отличается от query опечаткой:
+        то же число слов и не больше MAX_TYPO_DISTANCE правок. Ближайшие, по возрастанию id.
+        """
+        limit = 1 if len(query) <= SHORT_NAME_LENGTH else MAX_TYPO_DISTANCE
+        words = query.count(" ")
+        best = limit + 1
+        matches = []
+        for pk in self._similar(query, dict.fromkeys(exclude)):
+            distance = min(
+                (edit_distance(query, key, limit) for key in self.keys[pk] if key.count(" ") == words),
+                default=limit + 1,
+            )
+            if distance < best:
+                best, matches = distance, [pk]
+            elif distance == best and distance <= limit:
+                matches.append(pk)
+        return sorted(matches)
+
+    def resolve(self, text):
+        """
+        id локаций для свободного ввода: точное совпадение с названием, кодом
+        или синонимом, иначе единственная активная локация с опечаткой в названии.
+        """
+        query = normalize(text)
+        if not query:
+            return []
+        if query in self.exact:
+            return list(self.exact[query])
+        if len(query) < 3:
+            return []
+        matches = self.typo_matches(query)
+        # несколько одинаково близких - неоднозначно, лучше создать новую
+        return matches if len(matches) == 1 else []
+
+
+def _build():
+    rows = Location.objects.values(*ROW_FIELDS)
+    aliases = LocationAlias.objects.values_list("normalized", "location_id")
+    return AutocompleteIndex(list(rows), list(aliases))
+
+
+def get_autocomplete_index():
+    """Индекс в памяти процесса; перестраивается после смены версии справочника"""
+    now = time.monotonic()
+    index = _state["index"]
+    if index is not None and now - _state["checked_at"] < VERSION_CHECK_INTERVAL:
+        return index
+
+    with _lock:
+        version = _current_version()
+        if _state["index"] is None or _state["version"] != version:
+            _state["index"] = _build()
+            _state["version"] = version
+        _state["checked_at"] = now
+        return _state["index"]
+
+
+def autocomplete(text, limit=DEFAULT_LIMIT):
+    return get_autocomplete_index().search(text, limit)
+
+
+def resolve_location_text(text):
+    return get_autocomplete_index().resolve(text)
+
+
+def invalidate_autocomplete():
+    with _lock:
+        _state["index"] = None
+        _state["version"] = None
+        _state["checked_at"] = 0.0
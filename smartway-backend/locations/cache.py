@@ -0,0 +1,76 @@
+# locations/cache.py
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from .models import Location
+
+
+# Общая метка версии справочника (видна всем воркерам через Django cache)
+VERSION_CACHE_KEY = "locations:names:version"
+# Как часто воркер сверяет свою копию с общей меткой, сек
+VERSION_CHECK_INTERVAL = 5
+
+LANG_INDEX = {"ru": 0, "en": 1, "ky": 2}
+
+_lock = threading.Lock()
+_state = {
+    "names": None,       # {id: (name_ru, name_en, name_ky)}
+    "version": None,
+    "checked_at": 0.0,
+}
+
+
+def _current_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add - не перетираем метку, которую успел выставить другой воркер
+        if not cache.add(VERSION_CACHE_KEY, version, timeout=None):
+            version = cache.get(VERSION_CACHE_KEY, version)
+    return version
+
+
+def _load():
+    rows = Location.objects.values_list("id", "name_ru", "name_en", "name_ky")
+    return {pk: (ru, en, ky) for pk, ru, en, ky in rows}
+
+
+def get_location_names():
+    """
+    Словарь id -> (name_ru, name_en, name_ky) в памяти процесса.
+    Перечитывается из БД только после смены версии справочника.
+    """
+    now = time.monotonic()
+    names = _state["names"]
+    if names is not None and now - _state["checked_at"] < VERSION_CHECK_INTERVAL:
+        return names
+
+    with _lock:
+        version = _current_version()
+        if _state["names"] is None or _state["version"] != version:
+            _state["names"] = _load()
+            _state["version"] = version
+        _state["checked_at"] = now
+        return _state["names"]
+
+
+def get_location_name(location_id, lang="ru"):
+    """Название локации на нужном языке без запроса к БД (None - нет в справочнике)"""
+    if location_id is None:
+        return None
+    names = get_location_names().get(location_id)
+    if names is None:
+        return None
+    return names[LANG_INDEX.get(lang, 0)]
+
+
+def invalidate_location_names():
+    """Сменить версию справочника: все воркеры перечитают его при следующей сверке"""
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+    with _lock:
+        _state["names"] = None
+        _state["version"] = None
+        _state["checked_at"] = 0.0
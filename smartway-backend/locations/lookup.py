@@ -0,0 +1,58 @@
+# locations/lookup.py
+from .autocomplete import invalidate_autocomplete, normalize, resolve_location_text
+from .models import Location
+
+
+def resolve_location_ids(value) -> list[int]:
+    """
+    Найти id локаций по значению из запроса.
+    Принимает ID, код (bishkek), название на любом языке (ru/en/ky)
+    или синоним - в любой раскладке, с небольшой опечаткой.
+    Пустой список - локация не найдена.
+    """
+    if value is None:
+        return []
+
+    value = str(value).strip()
+    if not value:
+        return []
+
+    # isdecimal, а не isdigit: "²" - цифра, но int() её не примет
+    if value.isdecimal():
+        return [int(value)]
+
+    # Индекс синонимов в памяти процесса
+    ids = resolve_location_text(value)
+    if not ids:
+        return []
+    # индекс воркера сверяется с общей меткой раз в VERSION_CHECK_INTERVAL и может
+    # не знать о слиянии дублей (merge_locations) - удалённые id не отдаём
+    found = set(Location.objects.filter(id__in=ids).values_list("id", flat=True))
+    if len(found) < len(ids):
+        invalidate_autocomplete()
+        ids = resolve_location_text(value)
+    return ids
+
+
+def resolve_or_create_location(value) -> Location:
+    """
+    Локация для свободного ввода: сначала ищем по индексу синонимов,
+    новую создаём, только если ничего похожего нет.
+    """
+    ids = resolve_location_ids(value)
+    if ids:
+        location = Location.objects.filter(id=ids[0]).first()
+        if location is not None:
+            return location
+
+    value = str(value).strip()
+    code = normalize(value).replace(" ", "-")[:50] or value.lower().replace(" ", "-")[:50]
+    location, _ = Location.objects.get_or_create(
+        code=code,
+        defaults={
+            "name_ru": value,
+            "name_en": value,
+            "name_ky": value,
+        },
+    )
+    return location
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from locations.merge import DEFAULT_BATCH_SIZE, find_duplicate_groups, merge_locations
+from locations.models import Location
+
+
+class Command(BaseCommand):
+    help = (
+        "Слить дубли локаций: перенести заказы, объявления и расписания на основную "
+        "локацию пачками UPDATE, названия дублей сохранить синонимами"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("canonical", nargs="?", help="ID или код основной локации")
+        parser.add_argument("duplicates", nargs="*", help="ID или коды дублей")
+        parser.add_argument("--auto", action="store_true", help="Найти дубли по совпадающим названиям")
+        parser.add_argument(
+            "--fuzzy", action="store_true",
+            help="С --auto: ещё и локации из свободного ввода с опечаткой. Без --yes только показывает группы",
+        )
+        parser.add_argument("--yes", action="store_true", help="Подтвердить слияние групп --fuzzy")
+        parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет слито")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def _get(self, value):
+        lookup = {"id": int(value)} if value.isdecimal() else {"code": value.lower()}
+        try:
+            return Location.objects.get(**lookup)
+        except Location.DoesNotExist:
+            raise CommandError(f"Локация {value} не найдена")
+
+    def handle(self, *args, **options):
+        if options["auto"]:
+            groups = find_duplicate_groups(fuzzy=options["fuzzy"])
+        elif options["canonical"] and options["duplicates"]:
+            groups = [[self._get(options["canonical"])] + [self._get(v) for v in options["duplicates"]]]
+        else:
+            raise CommandError("Укажите основную локацию и дубли или --auto")
+
+        # дубли удаляются безвозвратно - нечёткие группы сливаем только после проверки
+        dry_run = options["dry_run"] or (options["fuzzy"] and not options["yes"])
+        for canonical, *duplicates in groups:
+            names = ", ".join(f"{loc.code} (#{loc.pk})" for loc in duplicates)
+            if dry_run:
+                self.stdout.write(f"{canonical.code} (#{canonical.pk}) <- {names}")
+                continue
+            counts = merge_locations(canonical, duplicates, batch_size=options["batch_size"])
+            moved = ", ".join(f"{key}: {count}" for key, count in counts.items() if count)
+            self.stdout.write(self.style.SUCCESS(
+                f"{canonical.code} (#{canonical.pk}) <- {names}" + (f"; {moved}" if moved else "")
+            ))
+        self.stdout.write(f"Groups: {len(groups)}")
+        if dry_run and not options["dry_run"] and groups:
+            self.stdout.write(self.style.WARNING("Проверьте группы и повторите с --yes, чтобы слить их"))
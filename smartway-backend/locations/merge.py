@@ -0,0 +1,174 @@
+# locations/merge.py
+from django.db import transaction
+
+from .autocomplete import EXACT_FIELDS, ROW_FIELDS, AutocompleteIndex, invalidate_autocomplete, normalize
+from .cache import invalidate_location_names
+from .models import Location, LocationAlias
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _location_references():
+    """(модель, поле) всех FK на локацию"""
+    from trips.models import AnnouncementSchedule, AnnouncementStop, DriverAnnouncement, Trip
+
+    return (
+        (Trip, "from_location"),
+        (Trip, "to_location"),
+        (DriverAnnouncement, "from_location"),
+        (DriverAnnouncement, "to_location"),
+        (AnnouncementStop, "location"),
+        (AnnouncementSchedule, "from_location"),
+        (AnnouncementSchedule, "to_location"),
+    )
+
+
+def _repoint(model, field, duplicate_ids, canonical_id, batch_size):
+    """UPDATE ... SET field = canonical пачками по первичному ключу, без долгих блокировок"""
+    total = 0
+    while True:
+        ids = list(
+            model.objects.filter(**{f"{field}__in": duplicate_ids})
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += model.objects.filter(pk__in=ids).update(**{field: canonical_id})
+
+
+def _rewrite_stops(queryset, duplicate_ids, canonical_id, batch_size):
+    """Заменить id дублей в JSON intermediate_stops"""
+    changed = []
+    total = 0
+    for obj in queryset.only("id", "intermediate_stops").iterator(chunk_size=batch_size):
+        stops = obj.intermediate_stops or []
+        rewritten = [canonical_id if _as_int(stop) in duplicate_ids else stop for stop in stops]
+        if rewritten != stops:
+            obj.intermediate_stops = rewritten
+            changed.append(obj)
+        if len(changed) >= batch_size:
+            total += len(changed)
+            queryset.model.objects.bulk_update(changed, ["intermediate_stops"])
+            changed = []
+    if changed:
+        total += len(changed)
+        queryset.model.objects.bulk_update(changed, ["intermediate_stops"])
+    return total
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_locations(canonical, duplicates, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Перенести все ссылки с дублей на canonical и удалить дубли.
+    Названия дублей остаются синонимами canonical - следующий такой же ввод
+    сразу попадёт в неё. Повторный запуск безопасен.
+    Возвращает {"<модель>.<поле>": число перенесённых строк}.
+    """
+    from trips.models import AnnouncementSchedule, DriverAnnouncement
+
+    duplicates = [loc for loc in duplicates if loc.pk != canonical.pk]
+    duplicate_ids = {loc.pk for loc in duplicates}
+    if not duplicate_ids:
+        return {}
+
+    # объявления с дублями в intermediate_stops находим по таблице остановок, пока она не перенесена
+    announcement_ids = list(
+        DriverAnnouncement.objects.filter(stops__location_id__in=duplicate_ids)
+        .values_list("id", flat=True).distinct()
+    )
+
+    counts = {}
+    for model, field in _location_references():
+        counts[f"{model.__name__}.{field}"] = _repoint(
+            model, field, duplicate_ids, canonical.pk, batch_size
+        )
+    counts["DriverAnnouncement.intermediate_stops"] = _rewrite_stops(
+        DriverAnnouncement.objects.filter(id__in=announcement_ids),
+        duplicate_ids, canonical.pk, batch_size,
+    )
+    counts["AnnouncementSchedule.intermediate_stops"] = _rewrite_stops(
+        AnnouncementSchedule.objects.exclude(intermediate_stops=[]),
+        duplicate_ids, canonical.pk, batch_size,
+    )
+
+    with transaction.atomic():
+        LocationAlias.objects.filter(location_id__in=duplicate_ids).update(location=canonical)
+        own = {normalize(getattr(canonical, field)) for field in EXACT_FIELDS}
+        aliases = {}
+        for location in duplicates:
+            for field in EXACT_FIELDS:
+                name = getattr(location, field)
+                key = normalize(name)
+                if key and key not in own:
+                    aliases.setdefault(key, LocationAlias(location=canonical, name=name, normalized=key))
+        LocationAlias.objects.bulk_create(aliases.values(), ignore_conflicts=True)
+        Location.objects.filter(id__in=duplicate_ids).delete()
+    # синонимы добавлены в обход сигналов; команда работает в своём процессе -
+    # воркеры узнают о слиянии по общей метке версии
+    invalidate_location_names()
+    invalidate_autocomplete()
+    return counts
+
+
+def _canonical_key(location):
+    # активные, заведённые вручную (названия различаются по языкам), самые старые
+    free_text = location.name_ru == location.name_en == location.name_ky
+    return (not location.is_active, free_text, location.pk)
+
+
+def find_duplicate_groups(fuzzy=False):
+    """
+    Группы дублей [canonical, дубль, ...]: одинаковые нормализованные названия,
+    а с fuzzy=True ещё и локации из свободного ввода, отличающиеся от заведённой
+    вручную опечаткой (AutocompleteIndex.typo_matches). Нечёткие группы стоит
+    проверить глазами перед слиянием.
+    """
+    locations = {loc.pk: loc for loc in Location.objects.all()}
+    parent = {pk: pk for pk in locations}
+
+    def find(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    def union(a, b):
+        parent[find(a)] = find(b)
+
+    seen = {}
+    for pk, location in locations.items():
+        for field in EXACT_FIELDS:
+            key = normalize(getattr(location, field))
+            if key in seen:
+                union(pk, seen[key])
+            elif key:
+                seen[key] = pk
+
+    if fuzzy:
+        index = AutocompleteIndex([
+            {field: getattr(loc, field) for field in ROW_FIELDS} for loc in locations.values()
+        ])
+        for pk, location in locations.items():
+            if _canonical_key(location)[1]:
+                matches = [
+                    match for match in index.typo_matches(normalize(location.name_ru), exclude=[pk])
+                    if not _canonical_key(locations[match])[1]
+                ]
+                if len(matches) == 1:
+                    union(pk, matches[0])
+
+    groups = {}
+    for pk in locations:
+        groups.setdefault(find(pk), []).append(locations[pk])
+    return [
+        sorted(group, key=_canonical_key)
+        for group in groups.values() if len(group) > 1
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LocationAlias",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("normalized", models.CharField(max_length=255, unique=True)),
+                (
+                    "location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="aliases",
+                        to="locations.location",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Синоним локации",
+                "verbose_name_plural": "Синонимы локаций",
+            },
+        ),
+    ]
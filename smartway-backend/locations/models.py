@@ -69,4 +69,33 @@ class Location(models.Model):
             'en': self.name_en,
             'ky': self.name_ky,
         }
-        return names.get(lang, self.name_ru)
\ No newline at end of file
+        return names.get(lang, self.name_ru)
+
+
+class LocationAlias(models.Model):
+    """
+    Дополнительное написание локации (сокращение, опечатка, старое название).
+    Используется при разборе свободного ввода, чтобы не плодить дубли.
+    """
+
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name="aliases",
+    )
+    name = models.CharField(max_length=255)
+    # Нормализованная форма (locations.autocomplete.normalize)
+    normalized = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        verbose_name = "Синоним локации"
+        verbose_name_plural = "Синонимы локаций"
+
+    def __str__(self):
+        return f"{self.name} → {self.location_id}"
+
+    def save(self, *args, **kwargs):
+        from .autocomplete import normalize
+
+        self.normalized = normalize(self.name)
+        super().save(*args, **kwargs)
@@ -0,0 +1,16 @@
+# locations/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autocomplete import invalidate_autocomplete
+from .cache import invalidate_location_names
+from .models import Location, LocationAlias
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=LocationAlias)
+@receiver(post_delete, sender=LocationAlias)
+def location_changed(sender, **kwargs):
+    invalidate_location_names()
+    invalidate_autocomplete()
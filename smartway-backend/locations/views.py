@@ -3,6 +3,7 @@ from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from .autocomplete import DEFAULT_LIMIT, autocomplete
 from .models import Location
 from .serializers import LocationSerializer
 
@@ -14,14 +15,23 @@ class LocationViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     
     def get_queryset(self):
-        queryset = super().get_queryset().filter(is_active=True)  # Только активные
-        lang = self.request.query_params.get('lang', 'ru')
-        search = self.request.query_params.get('search', '')
-        
-        if search:
-            queryset = queryset.filter(**{f'name_{lang}__icontains': search})
-        
-        return queryset
+        return super().get_queryset().filter(is_active=True)  # Только активные
+
+    def list(self, request, *args, **kwargs):
+        search = request.query_params.get('search', '').strip()
+        if not search:
+            return super().list(request, *args, **kwargs)
+
+        # Подсказки из индекса в памяти: все языки, код и регион, без запросов к БД
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), 100)
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        rows = autocomplete(search, limit=max(limit, 1))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
     
     @action(detail=False, methods=['get'])
     def popular(self, request):
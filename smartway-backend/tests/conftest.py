@@ -0,0 +1,148 @@
+import itertools
+import os
+import subprocess
+import sys
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from billing.entitlements import invalidate_entitlements
+from locations.autocomplete import invalidate_autocomplete
+from locations.models import Location
+from trips.models import DriverAnnouncement
+from users.models import Car, User
+
+
+@pytest.fixture(autouse=True, scope="session")
+def shared_cache_dir(tmp_path_factory):
+    """Файловый кэш вместо Redis: общий для процессов, как в проде, но без сервера"""
+    location = tmp_path_factory.mktemp("cache")
+    caches = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(location),
+        }
+    }
+    with override_settings(CACHES=caches):
+        yield location
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    """Кэши живут дольше теста, а БД между тестами откатывается - id пользователей повторяются"""
+    cache.clear()
+    invalidate_entitlements()
+    invalidate_autocomplete()
+    yield
+    cache.clear()
+    invalidate_entitlements()
+    invalidate_autocomplete()
+
+
+@pytest.fixture
+def other_process(shared_cache_dir):
+    """
+    Выполнить код в отдельном процессе Python (другой воркер, management-команда)
+    с тем же общим кэшем и тестовой БД. Изменения в БД видны ему только
+    из тестов с django_db(transaction=True).
+    """
+    def run(code):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "core.settings",
+            "CACHE_URL": f"filecache://{shared_cache_dir}",
+            "DATABASE_URL": f"sqlite:///{connection.settings_dict['NAME']}",
+        }
+        subprocess.run(
+            [sys.executable, "-c", f"import django\ndjango.setup()\n{code}"],
+            cwd=settings.BASE_DIR, env=env, check=True,
+        )
+
+    return run
+
+
+# Фабрики тестовых данных: тест задаёт только то, что проверяет
+@pytest.fixture
+def make_location():
+    def make(code, name=None, **extra):
+        """name - название на всех языках; отдельные name_en/name_ky передаются в extra"""
+        name = name or code.upper()
+        return Location.objects.create(code=code, **{"name_ru": name, "name_en": name, "name_ky": name, **extra})
+
+    return make
+
+
+@pytest.fixture
+def route(make_location):
+    """Маршрут A -> B"""
+    return make_location("a"), make_location("b")
+
+
+@pytest.fixture
+def make_user():
+    # номера из своего диапазона, чтобы не пересечься с номерами, заданными в тестах
+    phones = itertools.count(1)
+
+    def make(phone_number=None, full_name="U", driver=False, **extra):
+        phone_number = phone_number or f"+99670090{next(phones):04d}"
+        user = User.objects.create_user(phone_number=phone_number, full_name=full_name)
+        # create_user принимает только телефон и имя - остальные поля сохраняем отдельно
+        extra = {"is_driver": True, **extra} if driver else extra
+        if extra:
+            for name, value in extra.items():
+                setattr(user, name, value)
+            user.save()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def make_driver(make_user):
+    def make(phone_number=None, full_name="D", **extra):
+        return make_user(phone_number, full_name, driver=True, **extra)
+
+    return make
+
+
+@pytest.fixture
+def make_car():
+    def make(owner, **extra):
+        fields = {"brand": "Toyota", "model": "Camry", "plate_number": "01KG", **extra}
+        return Car.objects.create(owner=owner, **fields)
+
+    return make
+
+
+@pytest.fixture
+def make_announcement(make_location, make_driver):
+    """
+    Объявление водителя на завтра с таблицей остановок, как после создания через API.
+    Маршрут и водитель создаются, если не заданы; stops - промежуточные локации.
+    """
+    routes = itertools.count(1)
+
+    def make(driver=None, from_location=None, to_location=None, stops=(), **extra):
+        if from_location is None or to_location is None:
+            n = next(routes)
+            from_location = from_location or make_location(f"from{n}")
+            to_location = to_location or make_location(f"to{n}")
+        fields = {
+            "departure_time": timezone.now() + timedelta(days=1),
+            "available_seats": 4,
+            "price_per_seat": "500.00",
+            **extra,
+        }
+        announcement = DriverAnnouncement.objects.create(
+            driver=driver or make_driver(), from_location=from_location, to_location=to_location,
+            intermediate_stops=[stop.id for stop in stops], **fields,
+        )
+        announcement.sync_stops()
+        return announcement
+
+    return make
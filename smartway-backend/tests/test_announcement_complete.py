@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from users.models import User
+from trips.models import Booking, NotificationOutbox
+
+
+@pytest.fixture
+def complete_with(make_user, make_driver, make_announcement):
+    """Завершить объявление с N подтверждёнными пассажирами: (водитель, объявление, число запросов)"""
+    def complete(passengers):
+        driver = make_driver(telegram_chat_id=1600 + passengers)
+        announcement = make_announcement(
+            driver, departure_time=timezone.now() + timedelta(hours=1),
+            available_seats=15, booked_seats=passengers, price_per_seat="300.00",
+        )
+        for i in range(passengers):
+            passenger = make_user(full_name=f"P{i}", telegram_chat_id=1700 + i)
+            Booking.objects.create(
+                announcement=announcement, passenger=passenger, seats_count=1, status=Booking.Status.CONFIRMED,
+            )
+
+        client = APIClient()
+        client.force_authenticate(user=driver)
+        with CaptureQueriesContext(connection) as ctx:
+            res = client.post(f"/api/announcements/{announcement.id}/complete/")
+        assert res.status_code == 200
+        return driver, announcement, len(ctx.captured_queries)
+
+    return complete
+
+
+@pytest.mark.django_db
+def test_complete_is_set_based_and_idempotent(complete_with):
+    _, _, queries_small = complete_with(2)
+    driver, announcement, queries_large = complete_with(12)
+    assert queries_large == queries_small
+
+    assert set(Booking.objects.filter(announcement=announcement).values_list("status", flat=True)) == {"completed"}
+    assert set(
+        User.objects.filter(bookings__announcement=announcement).values_list("trips_completed_as_passenger", flat=True)
+    ) == {1}
+    driver.refresh_from_db()
+    assert driver.trips_completed_as_driver == 1
+    # 12 пассажиров + один раз водителю
+    assert NotificationOutbox.objects.filter(chat_id__gte=1700).count() >= 12
+    assert NotificationOutbox.objects.filter(chat_id=driver.telegram_chat_id).count() == 1
+
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    assert client.post(f"/api/announcements/{announcement.id}/complete/").status_code == 400
+    driver.refresh_from_db()
+    assert driver.trips_completed_as_driver == 1
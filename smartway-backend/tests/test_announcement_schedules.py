@@ -0,0 +1,120 @@
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import time, timedelta
+from zoneinfo import ZoneInfo
+from rest_framework.test import APIClient
+from trips.models import AnnouncementSchedule, AnnouncementStop, Booking, DriverAnnouncement
+from trips.schedules import materialize_schedules, schedule_today
+
+
+@pytest.fixture
+def driver(make_driver):
+    return make_driver()
+
+
+@pytest.mark.django_db
+def test_schedule_materializes_next_days_idempotently(driver, make_location):
+    bishkek = make_location("bishkek", "Бишкек", name_en="Bishkek")
+    osh = make_location("osh", "Ош", name_en="Osh")
+    naryn = make_location("naryn", "Нарын", name_en="Naryn")
+
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    res = client.post("/api/announcement-schedules/", {
+        "from_location": "bishkek",
+        "to_location": osh.id,
+        "intermediate_stops": [naryn.id],
+        "weekdays": list(range(7)),
+        "departure_time": "23:59",
+        "time_zone": "Asia/Bishkek",
+        "available_seats": 4,
+        "price_per_seat": "800.00",
+    }, format="json")
+    assert res.status_code == 201, res.data
+    schedule = AnnouncementSchedule.objects.get()
+
+    # создание шаблона сразу материализует ближайшую неделю
+    announcements = DriverAnnouncement.objects.filter(schedule=schedule)
+    created = announcements.count()
+    assert created in (6, 7)  # сегодняшний рейс может уже уйти
+    assert len(set(announcements.values_list("schedule_date", flat=True))) == created
+    first = announcements.order_by("departure_time").first()
+    assert first.contact_phone == driver.phone_number
+    assert list(first.stops.values_list("location_id", flat=True)) == [bishkek.id, naryn.id, osh.id]
+    assert AnnouncementStop.objects.filter(announcement__schedule=schedule).count() == created * 3
+
+    # повторный прогон ничего не создаёт, отменённый водителем рейс не возвращается
+    first.status = DriverAnnouncement.Status.CANCELLED
+    first.save()
+    assert materialize_schedules() == 0
+    AnnouncementSchedule.objects.update(generated_until=None)
+    assert materialize_schedules() == 0
+    assert announcements.count() == created
+
+    # горизонт сдвигается: добавляются только новые дни
+    assert materialize_schedules(days=9) == 2
+    call_command("materialize_schedules", "--days", "9")
+    assert announcements.count() == created + 2
+
+
+@pytest.mark.django_db
+def test_schedule_respects_weekdays_and_validation(driver, route):
+    a, b = route
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    payload = {
+        "from_location": a.id, "to_location": b.id, "weekdays": [8],
+        "departure_time": "07:00", "available_seats": 3, "price_per_seat": "500.00",
+    }
+    assert client.post("/api/announcement-schedules/", payload, format="json").status_code == 400
+
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    payload["weekdays"] = [tomorrow.weekday()]
+    assert client.post("/api/announcement-schedules/", payload, format="json").status_code == 201
+    dates = list(DriverAnnouncement.objects.values_list("schedule_date", flat=True))
+    assert dates == [tomorrow]
+
+
+@pytest.mark.django_db
+def test_schedule_update_regenerates_filled_horizon(driver, route, make_user):
+    a, b = route
+    passenger = make_user(full_name="P")
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    today = schedule_today(AnnouncementSchedule(time_zone="Asia/Bishkek"))
+    booked_day, new_day = today + timedelta(days=2), today + timedelta(days=3)
+    res = client.post("/api/announcement-schedules/", {
+        "from_location": a.id, "to_location": b.id, "weekdays": [booked_day.weekday()],
+        "departure_time": "07:00", "time_zone": "Asia/Bishkek",
+        "available_seats": 3, "price_per_seat": "500.00",
+    }, format="json")
+    assert res.status_code == 201
+    booked = DriverAnnouncement.objects.get(schedule_date=booked_day)
+    Booking.objects.create(announcement=booked, passenger=passenger, seats_count=1)
+
+    res = client.patch(f"/api/announcement-schedules/{res.data['id']}/", {
+        "weekdays": [booked_day.weekday(), new_day.weekday()], "departure_time": "09:30",
+    }, format="json")
+    assert res.status_code == 200
+
+    # новый день - в пределах уже заполненной недели; забронированный рейс не тронут
+    runs = dict(DriverAnnouncement.objects.values_list("schedule_date", "departure_time"))
+    assert set(runs) == {booked_day, new_day}
+    assert runs[new_day].astimezone(ZoneInfo("Asia/Bishkek")).time() == time(9, 30)
+    assert DriverAnnouncement.objects.get(schedule_date=booked_day).pk == booked.pk
+
+
+@pytest.mark.django_db
+def test_schedule_days_follow_its_own_time_zone(driver, route):
+    a, b = route
+    for zone in ("Pacific/Pago_Pago", "Pacific/Kiritimati"):  # UTC-11 и UTC+14
+        schedule = AnnouncementSchedule.objects.create(
+            driver=driver, from_location=a, to_location=b, weekdays=list(range(7)),
+            departure_time="23:59", time_zone=zone, available_seats=3, price_per_seat="500.00",
+        )
+        materialize_schedules(schedule_ids=[schedule.id])
+        today = schedule_today(schedule)
+        dates = sorted(DriverAnnouncement.objects.filter(schedule=schedule).values_list("schedule_date", flat=True))
+        assert dates[0] in (today, today + timedelta(days=1))
+        assert dates[-1] == today + timedelta(days=6)
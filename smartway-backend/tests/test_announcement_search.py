@@ -0,0 +1,110 @@
+import pytest
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from trips.models import DriverAnnouncement
+
+
+@pytest.fixture
+def route_data(make_driver, make_location):
+    bishkek = make_location("bishkek", "Бишкек", name_en="Bishkek")
+    osh = make_location("osh", "Ош", name_en="Osh")
+    naryn = make_location("naryn", "Нарын", name_en="Naryn")
+    return make_driver(), bishkek, osh, naryn
+
+
+@pytest.mark.django_db
+def test_available_resolves_locations_by_id_code_and_name(route_data, make_announcement):
+    driver, bishkek, osh, naryn = route_data
+    match = make_announcement(driver, bishkek, osh)
+    make_announcement(driver, bishkek, naryn)
+
+    client = APIClient()
+    for params in (
+        {"from": bishkek.id, "to": osh.id},
+        {"from": "bishkek", "to": "OSH"},
+        {"from": "Бишкек", "to": "Osh"},
+    ):
+        res = client.get("/api/announcements/available/", params)
+        assert res.status_code == 200
+        assert [item["id"] for item in res.data["results"]] == [match.id]
+
+    for value in ("nowhere", "²"):
+        res = client.get("/api/announcements/available/", {"from": value})
+        assert res.status_code == 200
+        assert res.data["results"] == []
+
+
+@pytest.mark.django_db
+def test_available_filters_seats_price_date_and_options(route_data, make_announcement):
+    driver, bishkek, osh, _ = route_data
+    tomorrow = timezone.now() + timedelta(days=1)
+    cheap = make_announcement(driver, bishkek, osh, price_per_seat="300.00", allow_pets=True)
+    make_announcement(driver, bishkek, osh, price_per_seat="900.00")
+    make_announcement(driver, bishkek, osh, booked_seats=3)
+    make_announcement(driver, bishkek, osh, departure_time=tomorrow + timedelta(days=3))
+
+    client = APIClient()
+    res = client.get("/api/announcements/available/", {
+        "from": "bishkek",
+        "to": "osh",
+        "date": timezone.localtime(tomorrow).date().isoformat(),
+        "seats": 2,
+        "price_max": "500",
+        "allow_pets": "true",
+    })
+    assert res.status_code == 200
+    assert [item["id"] for item in res.data["results"]] == [cheap.id]
+
+
+@pytest.mark.django_db
+def test_segment_search_uses_intermediate_stops(route_data, make_location):
+    driver, bishkek, osh, naryn = route_data
+    kochkor = make_location("kochkor", "Кочкор", name_en="Kochkor")
+    at_bashy = make_location("at-bashy", "Ат-Башы", name_en="At-Bashy")
+
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    res = client.post("/api/announcements/", {
+        "from_location": bishkek.id,
+        "to_location": at_bashy.id,
+        "departure_time": (timezone.now() + timedelta(days=1)).isoformat(),
+        "available_seats": 3,
+        "price_per_seat": "700.00",
+        "intermediate_stops": [
+            kochkor.id,
+            {"location": naryn.id, "planned_time": (timezone.now() + timedelta(days=1, hours=5)).isoformat()},
+        ],
+    }, format="json")
+    assert res.status_code == 201
+    announcement = DriverAnnouncement.objects.get()
+    assert announcement.intermediate_stops == [kochkor.id, naryn.id]
+    assert list(announcement.stops.values_list("location_id", flat=True)) == [
+        bishkek.id, kochkor.id, naryn.id, at_bashy.id,
+    ]
+    assert announcement.stops.get(location=naryn).planned_time is not None
+
+    passenger = APIClient()
+    res = passenger.get("/api/announcements/available/", {"from": "bishkek", "to": "naryn", "mode": "segment"})
+    assert [item["id"] for item in res.data["results"]] == [announcement.id]
+
+    # обратное направление не подходит
+    res = passenger.get("/api/announcements/available/", {"from": "naryn", "to": "kochkor", "mode": "segment"})
+    assert res.data["results"] == []
+
+    # без mode ищем только по конечным точкам
+    res = passenger.get("/api/announcements/available/", {"from": "bishkek", "to": "naryn"})
+    assert res.data["results"] == []
+
+    # форма создания шлёт остановки строками названий
+    res = client.post("/api/announcements/", {
+        "from_location": bishkek.id,
+        "to_location": at_bashy.id,
+        "departure_time": (timezone.now() + timedelta(days=2)).isoformat(),
+        "available_seats": 3,
+        "price_per_seat": "700.00",
+        "intermediate_stops": ["Кочкор", "Naryn"],
+    }, format="json")
+    assert res.status_code == 201
+    created = DriverAnnouncement.objects.exclude(id=announcement.id).get()
+    assert created.intermediate_stops == [kochkor.id, naryn.id]
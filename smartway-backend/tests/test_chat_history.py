@@ -0,0 +1,61 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from trips.models import Trip
+from chat.buffer import ChatWriteBuffer
+from chat.models import ChatMessage
+
+
+@pytest.fixture
+def trip(route, make_user):
+    a, b = route
+    passenger = make_user(full_name="P")
+    driver = make_user(full_name="D")
+    return Trip.objects.create(
+        passenger=passenger, driver=driver, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=3), status=Trip.Status.TAKEN,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffer_writes_messages_in_one_bulk_insert(trip):
+    buffer = ChatWriteBuffer(flush_size=5, flush_interval=60)
+
+    async def scenario():
+        for i in range(4):
+            await buffer.add(ChatMessage(trip_id=trip.id, sender_id=trip.passenger_id, text=f"m{i}"))
+        assert await ChatMessage.objects.acount() == 0
+        await buffer.add(ChatMessage(trip_id=trip.id, sender_id=trip.driver_id, text="m4"))
+
+    with CaptureQueriesContext(connection) as ctx:
+        async_to_sync(scenario)()
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "chat_chatmessage"')]
+    assert len(inserts) == 1
+    assert list(ChatMessage.objects.values_list("text", flat=True)) == ["m0", "m1", "m2", "m3", "m4"]
+
+
+@pytest.mark.django_db
+def test_history_is_paginated_newest_first_for_participants_only(trip, make_user):
+    start = timezone.now() - timedelta(minutes=10)
+    ChatMessage.objects.bulk_create([
+        ChatMessage(trip=trip, sender=trip.passenger, text=f"m{i}", created_at=start + timedelta(seconds=i))
+        for i in range(5)
+    ])
+    url = f"/api/chat/trips/{trip.id}/messages/"
+
+    client = APIClient()
+    client.force_authenticate(user=trip.driver)
+    res = client.get(url, {"page_size": 3})
+    assert res.status_code == 200
+    assert [m["text"] for m in res.data["results"]] == ["m4", "m3", "m2"]
+    res = client.get(res.data["next"])
+    assert [m["text"] for m in res.data["results"]] == ["m1", "m0"]
+    assert res.data["next"] is None
+
+    stranger = make_user(full_name="S")
+    client.force_authenticate(user=stranger)
+    assert client.get(url).status_code == 403
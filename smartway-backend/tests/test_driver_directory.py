@@ -0,0 +1,134 @@
+import pytest
+from importlib import import_module
+from django.apps import apps
+from django.contrib.admin import site
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from users.admin import UserAdmin
+from users.directory import ENTRY_FIELDS
+from users.models import Car, DriverDirectoryEntry, User, UserRatingStats
+from trips.models import Review, Trip
+
+
+@pytest.fixture
+def listed_driver(make_driver, make_car):
+    """Водитель с активным авто - попадает в каталог"""
+    def make(city="Бишкек", verified=False, seats=4, **extra):
+        driver = make_driver(city=city, is_verified_driver=verified, **extra)
+        make_car(driver, passenger_seats=seats)
+        return driver
+
+    return make
+
+
+def _list(client, **params):
+    res = client.get("/api/users/drivers/", params)
+    assert res.status_code == 200
+    return [item["id"] for item in res.data["results"]]
+
+
+@pytest.mark.django_db
+def test_directory_follows_changes_and_lists_in_one_scan(route, make_user, make_driver, listed_driver):
+    passenger = make_user(full_name="P")
+    verified = listed_driver(verified=True)
+    rated = listed_driver(city="Ош", seats=7)
+    plain = listed_driver()
+    for i in range(5):
+        listed_driver()
+    # без активного авто в каталог не попадает
+    no_car = make_driver(full_name="N")
+
+    a, b = route
+    trip = Trip.objects.create(
+        passenger=passenger, driver=rated, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=1), status=Trip.Status.COMPLETED,
+    )
+    Review.objects.create(trip=trip, author=passenger, recipient=rated, rating=5)
+
+    client = APIClient()
+    client.force_authenticate(user=passenger)
+    with CaptureQueriesContext(connection) as ctx:
+        ids = _list(client, page_size=3)
+    assert len(ctx.captured_queries) == 1
+    assert ids[:2] == [verified.id, rated.id]
+    assert no_car.id not in ids
+
+    entry = DriverDirectoryEntry.objects.get(pk=rated.pk)
+    assert (entry.average_rating, entry.reviews_count, entry.max_seats) == (5.0, 1, 7)
+    res = client.get("/api/users/drivers/", {"verified": "true"})
+    car = res.data["results"][0]["cars"][0]
+    assert (car["full_name"], car["owner_rating"]) == ("Toyota Camry", None)
+
+    assert _list(client, seats_min=5) == [rated.id]
+    assert _list(client, city="ош") == [rated.id]
+    assert _list(client, verified="true") == [verified.id]
+
+    # пагинация курсором проходит весь каталог без повторов
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 3, **({"cursor": cursor} if cursor else {})}
+        res = client.get("/api/users/drivers/", params)
+        seen += [item["id"] for item in res.data["results"]]
+        cursor = res.data["cursor"]
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 8
+
+    Car.objects.filter(owner=plain).update(is_active=False)
+    call_command("rebuild_driver_directory")
+    assert plain.id not in _list(client, page_size=50)
+
+    car = Car.objects.get(owner=rated)
+    car.is_active = False
+    car.save()
+    assert rated.id not in _list(client, page_size=50)
+
+
+@pytest.mark.django_db
+def test_directory_car_photos_are_absolute_urls(listed_driver, make_user):
+    driver = listed_driver()
+    driver.photo = "users/driver.jpg"
+    driver.save()
+    car = driver.cars.get()
+    car.photo = "cars/camry.jpg"
+    car.save()
+
+    entry = DriverDirectoryEntry.objects.get(pk=driver.pk)
+    assert (entry.cars[0]["photo"], entry.cars[0]["owner_photo"]) == ("cars/camry.jpg", "users/driver.jpg")
+
+    client = APIClient()
+    client.force_authenticate(user=make_user(full_name="P"))
+    row = client.get("/api/users/drivers/").data["results"][0]
+    assert row["photo"] == "http://testserver/media/users/driver.jpg"
+    assert row["cars"][0]["photo"] == "http://testserver/media/cars/camry.jpg"
+    assert row["cars"][0]["owner_photo"] == "http://testserver/media/users/driver.jpg"
+
+
+@pytest.mark.django_db
+def test_admin_action_on_filtered_changelist_refreshes_directory(listed_driver):
+    driver = listed_driver()
+    # список в админке отфильтрован по полю, которое действие меняет
+    queryset = User.objects.filter(is_verified_driver=False, is_driver=True)
+    UserAdmin(User, site).verify_as_driver(None, queryset)
+
+    assert DriverDirectoryEntry.objects.get(driver=driver).is_verified_driver is True
+
+
+@pytest.mark.django_db
+def test_backfill_migration_matches_rebuild(listed_driver, make_car):
+    verified = listed_driver(verified=True, seats=7)
+    make_car(verified, brand="Kia", model="Rio", year=2015, plate_number="02KG", passenger_seats=3)
+    UserRatingStats.objects.create(user=verified, role=UserRatingStats.Role.DRIVER, reviews_count=2, rating_sum=9)
+    listed_driver(city=" Ош ")
+    call_command("rebuild_driver_directory", stdout=open("/dev/null", "w"))
+    fields = [field for field in ENTRY_FIELDS if field != "updated_at"]
+    rebuilt = list(DriverDirectoryEntry.objects.order_by("driver_id").values_list("driver_id", *fields))
+    assert len(rebuilt) == 2
+
+    DriverDirectoryEntry.objects.all().delete()
+    import_module("users.migrations.0015_backfill_driver_directory").backfill_driver_directory(apps, None)
+    assert list(DriverDirectoryEntry.objects.order_by("driver_id").values_list("driver_id", *fields)) == rebuilt
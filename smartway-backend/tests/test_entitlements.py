@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from billing.cache import entitlement_cache
+from billing.entitlements import expire_entitlements, get_entitlement
+from billing.models import DriverEntitlement, DriverSubscription, SubscriptionPlan
+from billing.utils import DEFAULT_PRIORITY, DEFAULT_VIEW_DELAY, get_driver_priority_and_delay
+
+
+@pytest.fixture
+def driver(make_driver):
+    return make_driver()
+
+
+@pytest.mark.django_db
+def test_purchase_materializes_entitlement(driver):
+    plan = SubscriptionPlan.objects.create(
+        name="Pro", price="100.00", duration_days=30, priority_level=10, view_delay_seconds=0,
+    )
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    assert client.post("/api/billing/mock-pay/", {"plan_id": plan.id}).status_code == 201
+
+    before = entitlement_cache.stats()
+    with CaptureQueriesContext(connection) as ctx:
+        assert get_driver_priority_and_delay(driver) == (10, 0)
+    assert len(ctx.captured_queries) == 1
+    # повторные опросы ленты - из кэша воркера, без запросов
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(5):
+            assert get_driver_priority_and_delay(driver) == (10, 0)
+    assert len(ctx.captured_queries) == 0
+    stats = entitlement_cache.stats()
+    assert (stats["misses"] - before["misses"], stats["hits"] - before["hits"]) == (1, 5)
+
+    res = client.get("/api/billing/current/")
+    assert res.data["plan"]["id"] == plan.id
+
+    # изменение тарифа доходит до материализованной строки
+    plan.view_delay_seconds = 30
+    plan.save()
+    assert get_driver_priority_and_delay(driver) == (10, 30)
+
+
+@pytest.mark.django_db
+def test_expiry_sweep_falls_back_to_next_subscription(driver):
+    now = timezone.now()
+    basic = SubscriptionPlan.objects.create(name="Basic", price="50.00", duration_days=30, priority_level=5)
+    pro = SubscriptionPlan.objects.create(name="Pro", price="100.00", duration_days=30, priority_level=10)
+    DriverSubscription.objects.create(driver=driver, plan=pro, expires_at=now + timedelta(days=1))
+    basic_sub = DriverSubscription.objects.create(driver=driver, plan=basic, expires_at=now + timedelta(days=10))
+    assert DriverEntitlement.objects.get(pk=driver.pk).plan_id == pro.id
+
+    assert expire_entitlements(now=now + timedelta(days=2)) == 1
+    entitlement = DriverEntitlement.objects.get(pk=driver.pk)
+    assert (entitlement.plan_id, entitlement.expires_at) == (basic.id, basic_sub.expires_at)
+
+    # просроченная строка, до которой свипер ещё не дошёл, не даёт прав
+    DriverSubscription.objects.filter(driver=driver).update(expires_at=now - timedelta(days=1))
+    DriverEntitlement.objects.filter(pk=driver.pk).update(expires_at=now - timedelta(days=1))
+    assert get_entitlement(driver) is None
+    assert get_driver_priority_and_delay(driver) == (DEFAULT_PRIORITY, DEFAULT_VIEW_DELAY)
+
+    assert not DriverEntitlement.objects.exists()
+
+    DriverSubscription.objects.create(driver=driver, plan=basic, expires_at=now - timedelta(seconds=1))
+    call_command("deactivate_expired_subs")
+    assert not DriverEntitlement.objects.exists()
@@ -0,0 +1,46 @@
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from trips.expiry import expire_past_due
+from trips.models import Booking, NotificationOutbox, Trip, TripRelease, TripWithdrawal
+
+
+@pytest.mark.django_db
+def test_expire_past_due_in_batches(route, make_user, make_announcement):
+    a, b = route
+    now = timezone.now()
+    passenger = make_user(full_name="P", telegram_chat_id=1601)
+    past = [
+        Trip.objects.create(passenger=passenger, from_location=a, to_location=b, departure_time=now - timedelta(minutes=i + 1))
+        for i in range(5)
+    ]
+    future = Trip.objects.create(passenger=passenger, from_location=a, to_location=b, departure_time=now + timedelta(hours=1))
+    assert TripRelease.objects.filter(trip__in=past).exists()
+
+    announcement = make_announcement(
+        from_location=a, to_location=b, departure_time=now - timedelta(minutes=5),
+        available_seats=4, booked_seats=1, price_per_seat="300.00",
+    )
+    pending = Booking.objects.create(announcement=announcement, passenger=passenger, seats_count=1)
+    confirmed = Booking.objects.create(
+        announcement=announcement, passenger=passenger, seats_count=1, status=Booking.Status.CONFIRMED,
+    )
+
+    assert expire_past_due(batch_size=2) == (5, 1)
+    assert set(Trip.objects.filter(pk__in=[trip.pk for trip in past]).values_list("status", flat=True)) == {"expired"}
+    assert Trip.objects.get(pk=future.pk).status == "open"
+    assert not TripRelease.objects.filter(trip__in=past).exists()
+    assert TripWithdrawal.objects.filter(trip_id__in=[trip.pk for trip in past]).count() == 5
+
+    announcement.refresh_from_db()
+    pending.refresh_from_db()
+    confirmed.refresh_from_db()
+    assert announcement.status == "expired"
+    assert pending.status == "cancelled"
+    assert confirmed.status == "confirmed"
+    assert NotificationOutbox.objects.filter(chat_id=1601).count() == 1
+
+    # повторный прогон ничего не трогает
+    assert expire_past_due() == (0, 0)
+    call_command("expire_past_due", "--batch-size", "10")
@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from locations.autocomplete import autocomplete
+
+
+@pytest.fixture
+def locations(make_location):
+    return {
+        "bishkek": make_location("bishkek", "Бишкек", name_en="Bishkek", sort_order=1, region="Чуйская область"),
+        "balykchy": make_location("balykchy", "Балыкчы", name_en="Balykchy", sort_order=5),
+        "karakol": make_location("karakol", "Каракол", name_en="Karakol", sort_order=3),
+        "cholpon": make_location("cholpon-ata", "Чолпон-Ата", name_en="Cholpon-Ata", sort_order=4),
+        "issyk": make_location("issyk-kul", "Иссык-Куль", name_en="Issyk-Kul", name_ky="Ысык-Көл", sort_order=2),
+        "hidden": make_location("bakai-ata", "Бакай-Ата", name_en="Bakai-Ata", is_active=False),
+    }
+
+
+def _codes(rows):
+    return [row["code"] for row in rows]
+
+
+@pytest.mark.django_db
+def test_autocomplete_matches_any_script_and_ranks_by_prefix(locations):
+    assert _codes(autocomplete("bish"))[0] == "bishkek"
+    assert _codes(autocomplete("Биш"))[0] == "bishkek"
+    # латиница в русской раскладке и наоборот приводятся к одному ключу
+    assert _codes(autocomplete("Bishkek")) == _codes(autocomplete("Бишкек"))
+    # кыргызские буквы
+    assert _codes(autocomplete("Ысык-Көл"))[0] == "issyk-kul"
+    # префикс названия раньше префикса слова, внутри ранга - sort_order
+    assert _codes(autocomplete("б")) == ["bishkek", "balykchy"]
+    assert _codes(autocomplete("ата")) == ["cholpon-ata"]
+    # регион
+    assert _codes(autocomplete("чуй")) == ["bishkek"]
+    # неактивные не показываем
+    assert "bakai-ata" not in _codes(autocomplete("бакай"))
+
+
+@pytest.mark.django_db
+def test_autocomplete_falls_back_to_trigrams(locations):
+    assert _codes(autocomplete("Karakool"))[0] == "karakol"
+    assert _codes(autocomplete("Бишкик"))[0] == "bishkek"
+    assert autocomplete("zzzzzz") == []
+
+
+@pytest.mark.django_db
+def test_search_endpoint_uses_index_and_rebuilds_on_change(locations, make_location):
+    client = APIClient()
+    client.get("/api/locations/", {"search": "osh"})  # прогрев индекса
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get("/api/locations/", {"search": "kara"})
+    assert res.status_code == 200
+    assert [row["code"] for row in res.data["results"]] == ["karakol"]
+    assert not [q for q in ctx.captured_queries if 'FROM "locations_location"' in q["sql"]]
+
+    make_location("osh", "Ош", name_en="Osh", sort_order=2)
+    res = client.get("/api/locations/", {"search": "Ош"})
+    assert [row["code"] for row in res.data["results"]] == ["osh"]
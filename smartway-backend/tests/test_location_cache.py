@@ -0,0 +1,45 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from locations.cache import _state, get_location_name
+from locations.models import Location
+
+
+@pytest.mark.django_db
+def test_location_names_served_from_memory_and_invalidated_on_save(make_location, make_driver, make_announcement):
+    bishkek = make_location("bishkek", "Бишкек", name_en="Bishkek")
+    osh = make_location("osh", "Ош", name_en="Osh")
+    driver = make_driver()
+    for _ in range(3):
+        make_announcement(driver, bishkek, osh, available_seats=3)
+
+    assert get_location_name(osh.id, "en") == "Osh"
+    assert get_location_name(osh.id, "xx") == "Ош"
+
+    client = APIClient()
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get("/api/announcements/", {"lang": "en"})
+    assert res.status_code == 200
+    rows = res.data["results"] if isinstance(res.data, dict) else res.data
+    assert {row["to_location_display"] for row in rows} == {"Osh"}
+    assert not [q for q in ctx.captured_queries if 'FROM "locations_location"' in q["sql"]]
+
+    osh.name_en = "Osh City"
+    osh.save()
+    assert get_location_name(osh.id, "en") == "Osh City"
+
+
+@pytest.mark.django_db
+def test_invalidation_from_another_process_reaches_this_worker(other_process, make_location):
+    osh = make_location("osh", "Ош", name_en="Osh")
+    assert get_location_name(osh.id, "en") == "Osh"
+
+    # переименовали в обход сигналов, метку сменила management-команда в своём процессе
+    Location.objects.filter(pk=osh.pk).update(name_en="Osh City")
+    assert get_location_name(osh.id, "en") == "Osh"
+    other_process("from locations.cache import invalidate_location_names\ninvalidate_location_names()")
+
+    # следующая сверка с общей меткой - не позже VERSION_CHECK_INTERVAL
+    _state["checked_at"] = 0.0
+    assert get_location_name(osh.id, "en") == "Osh City"
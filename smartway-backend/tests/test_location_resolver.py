@@ -0,0 +1,86 @@
+import time
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.utils import timezone
+from locations.autocomplete import _state
+from locations.lookup import resolve_location_ids, resolve_or_create_location
+from locations.merge import merge_locations
+from locations.models import Location, LocationAlias
+from trips.models import AnnouncementStop, Trip
+
+
+@pytest.fixture
+def bishkek(make_location):
+    return make_location("bishkek", "Бишкек", name_en="Bishkek", sort_order=1)
+
+
+@pytest.mark.django_db
+def test_free_text_resolves_to_existing_location(bishkek, make_location):
+    make_location("issyk-kul", "Иссык-Куль", name_en="Issyk-Kul", name_ky="Ысык-Көл")
+    LocationAlias.objects.create(location=bishkek, name="Фрунзе")
+
+    for text in ("Бишкек", "BISHKEK", "bishkek", "Бишкекк", "Фрунзе", "frunze"):
+        assert resolve_or_create_location(text) == bishkek
+    assert resolve_location_ids("Ысык Көл") == resolve_location_ids("issyk-kul")
+    assert Location.objects.count() == 2
+
+    # другое село с похожим названием - не опечатка
+    kochkor_ata = make_location("kochkor-ata", "Кочкор-Ата", name_en="Kochkor-Ata")
+    kochkor = resolve_or_create_location("Кочкор")
+    assert kochkor != kochkor_ata
+    assert resolve_location_ids("Кочкорр") == [kochkor.id]
+
+    created = resolve_or_create_location("Токмок")
+    assert created.code == "tokmok"
+    assert resolve_or_create_location("Tokmok") == created
+
+
+@pytest.mark.django_db
+def test_merge_command_repoints_references_and_keeps_aliases(bishkek, make_user, make_location, make_announcement):
+    osh = make_location("osh", "Ош", name_en="Osh", sort_order=2)
+    # дубли, созданные старым кодом из свободного ввода
+    typo = make_location("бишкекк", "Бишкекк")
+    copy = make_location("bishkek-city", "bishkek")
+
+    driver = make_user(full_name="D")
+    passenger = make_user(full_name="P")
+    trip = Trip.objects.create(
+        passenger=passenger, from_location=typo, to_location=osh,
+        departure_time=timezone.now() + timedelta(days=1),
+    )
+    announcement = make_announcement(driver, osh, copy, stops=[typo], available_seats=3)
+
+    call_command("merge_locations", "--auto", "--dry-run")
+    assert Location.objects.count() == 4
+
+    # нечёткие группы без подтверждения только печатаются
+    call_command("merge_locations", "--auto", "--fuzzy")
+    assert Location.objects.count() == 4
+
+    call_command("merge_locations", "--auto", "--fuzzy", "--yes", "--batch-size", "1")
+
+    assert set(Location.objects.values_list("code", flat=True)) == {"bishkek", "osh"}
+    trip.refresh_from_db()
+    announcement.refresh_from_db()
+    assert trip.from_location_id == bishkek.id
+    assert announcement.to_location_id == bishkek.id
+    assert announcement.intermediate_stops == [bishkek.id]
+    assert set(AnnouncementStop.objects.values_list("location_id", flat=True)) == {osh.id, bishkek.id}
+    assert LocationAlias.objects.filter(location=bishkek, normalized="bishkekk").exists()
+    assert resolve_location_ids("bishkek-city") == [bishkek.id]
+
+
+@pytest.mark.django_db
+def test_stale_index_after_merge_does_not_recreate_duplicate(bishkek, make_location):
+    copy = make_location("bishkek-city", "Бишкек сити", name_en="Bishkek City")
+    assert resolve_location_ids("Bishkek City") == [copy.id]
+    # индекс веб-воркера, который ещё не сверился с общей меткой после merge_locations
+    stale = dict(_state)
+
+    merge_locations(bishkek, [copy])
+    _state.update(stale, checked_at=time.monotonic())
+
+    assert resolve_location_ids("Bishkek City") == [bishkek.id]
+    assert resolve_or_create_location("Bishkek City") == bishkek
+    assert not Location.objects.filter(code="bishkek-city").exists()
@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from trips import matching
+from trips.models import Trip, TripRelease
+
+
+@pytest.mark.django_db
+def test_trip_and_announcement_match_both_ways(make_location, make_user, make_driver, make_announcement):
+    bishkek, naryn, osh, talas = (make_location(code) for code in ("bishkek", "naryn", "osh", "talas"))
+    passenger = make_user()
+    driver = make_driver()
+    other_driver = make_driver()
+    departure = timezone.now() + timedelta(days=1)
+
+    trip = Trip.objects.create(
+        passenger=passenger, from_location=bishkek, to_location=naryn,
+        departure_time=departure, passengers_count=2, allow_pets=True,
+    )
+    # бесплатный уровень видит заказ с задержкой - сдвигаем публикацию в прошлое
+    TripRelease.objects.filter(trip=trip).update(visible_from=timezone.now() - timedelta(minutes=5))
+
+    # через Нарын в Ош, на час позже - подходит по участку маршрута
+    via_naryn = make_announcement(
+        driver, bishkek, osh, departure_time=departure + timedelta(hours=1), stops=[naryn], allow_pets=True,
+    )
+    # точный маршрут и время - лучшая оценка
+    exact = make_announcement(other_driver, bishkek, naryn, departure_time=departure, allow_pets=True)
+    # не подходят: без животных, обратное направление, другое время, мало мест
+    make_announcement(driver, bishkek, naryn, departure_time=departure, allow_pets=False)
+    make_announcement(driver, naryn, bishkek, departure_time=departure, allow_pets=True)
+    make_announcement(driver, bishkek, naryn, departure_time=departure + timedelta(hours=6), allow_pets=True)
+    make_announcement(driver, bishkek, naryn, departure_time=departure, allow_pets=True, booked_seats=3)
+    make_announcement(driver, bishkek, talas, departure_time=departure, allow_pets=True)
+
+    client = APIClient()
+    client.force_authenticate(user=passenger)
+    res = client.get(f"/api/trips/{trip.id}/matches/")
+    assert res.status_code == 200
+    assert [item["id"] for item in res.data["results"]] == [exact.id, via_naryn.id]
+    assert res.data["results"][0]["match_score"] > res.data["results"][1]["match_score"]
+
+    client.force_authenticate(user=driver)
+    assert client.get(f"/api/trips/{trip.id}/matches/").status_code == 403
+    res = client.get(f"/api/announcements/{via_naryn.id}/matches/")
+    assert res.status_code == 200
+    assert [item["id"] for item in res.data["results"]] == [trip.id]
+    assert client.get(f"/api/announcements/{exact.id}/matches/").status_code == 403
+
+
+def _open_trip(passenger, from_location, to_location, departure_time):
+    trip = Trip.objects.create(
+        passenger=passenger, from_location=from_location, to_location=to_location,
+        departure_time=departure_time,
+    )
+    TripRelease.objects.filter(trip=trip).update(visible_from=timezone.now() - timedelta(minutes=5))
+    return trip
+
+
+def _match_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(url)
+    assert res.status_code == 200
+    return len(res.data["results"]), len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_candidates_are_closest_in_time_and_in_direction(monkeypatch, make_location, make_user, make_driver,
+                                                          make_announcement):
+    monkeypatch.setattr(matching, "MAX_CANDIDATES", 2)
+    bishkek, naryn = make_location("bishkek"), make_location("naryn")
+    driver = make_driver()
+    departure = timezone.now() + timedelta(days=1)
+    announcement = make_announcement(driver, bishkek, naryn, departure_time=departure)
+
+    # обратное направление в то же время и ранние заказы на краю окна не вытесняют ближний
+    for i in range(2):
+        _open_trip(make_user(), naryn, bishkek, departure)
+        _open_trip(make_user(), bishkek, naryn, departure - timedelta(minutes=170 + i))
+    closest = _open_trip(make_user(), bishkek, naryn, departure + timedelta(minutes=10))
+
+    ranked = matching.trip_matches(announcement, driver)
+    assert ranked[0][1] == closest
+    assert len(ranked) == 2
+
+
+@pytest.mark.django_db
+def test_match_queries_do_not_grow_with_results(make_location, make_user, make_driver, make_announcement):
+    bishkek, naryn = make_location("bishkek"), make_location("naryn")
+    driver = make_driver()
+    departure = timezone.now() + timedelta(days=1)
+    announcement = make_announcement(driver, bishkek, naryn, departure_time=departure)
+    passenger = make_user()
+    trip = _open_trip(passenger, bishkek, naryn, departure)
+
+    driver_client, passenger_client = APIClient(), APIClient()
+    driver_client.force_authenticate(user=driver)
+    passenger_client.force_authenticate(user=passenger)
+    trips_url = f"/api/announcements/{announcement.id}/matches/"
+    announcements_url = f"/api/trips/{trip.id}/matches/"
+    # первый запрос прогревает кэши процесса (названия локаций, права водителя)
+    _match_queries(driver_client, trips_url)
+    _match_queries(passenger_client, announcements_url)
+    few = (_match_queries(driver_client, trips_url), _match_queries(passenger_client, announcements_url))
+
+    for i in range(10):
+        _open_trip(make_user(), bishkek, naryn, departure + timedelta(minutes=i))
+        make_announcement(make_driver(), bishkek, naryn, departure_time=departure + timedelta(minutes=i))
+    many = (_match_queries(driver_client, trips_url), _match_queries(passenger_client, announcements_url))
+
+    assert [count for count, _ in few] == [1, 1]
+    assert [count for count, _ in many] == [11, 11]
+    assert [queries for _, queries in many] == [queries for _, queries in few]
@@ -0,0 +1,107 @@
+import pytest
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from trips import outbox
+from trips.models import Booking, NotificationOutbox
+
+
+@pytest.fixture
+def announcement_with_bookings(make_user, make_driver, make_announcement):
+    driver = make_driver(telegram_chat_id=600)
+    announcement = make_announcement(driver, available_seats=4)
+    for i in range(2):
+        passenger = make_user(full_name="P", telegram_chat_id=610 + i)
+        Booking.objects.create(announcement=announcement, passenger=passenger, seats_count=1)
+    return driver, announcement
+
+
+@pytest.mark.django_db
+def test_cancel_enqueues_instead_of_sending(announcement_with_bookings, monkeypatch):
+    driver, announcement = announcement_with_bookings
+    sent = []
+    monkeypatch.setattr(outbox, "post_telegram_message", lambda *args: sent.append(args) or (200, ""))
+
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    res = client.post(f"/api/announcements/{announcement.id}/cancel/")
+    assert res.status_code == 200
+    assert sent == []
+    assert sorted(NotificationOutbox.objects.values_list("chat_id", flat=True)) == [610, 611]
+
+    assert outbox.deliver_batch() == (2, 0)
+    assert sorted(chat for chat, *_ in sent) == [610, 611]
+    assert not NotificationOutbox.objects.filter(status=NotificationOutbox.Status.PENDING).exists()
+
+
+@pytest.mark.django_db
+def test_failed_message_is_retried_and_blocks_later_ones_in_chat(monkeypatch):
+    first = outbox.enqueue_telegram_message(700, "first")
+    outbox.enqueue_telegram_message(700, "second")
+    other = outbox.enqueue_telegram_message(701, "other")
+
+    monkeypatch.setattr(outbox, "post_telegram_message", lambda chat_id, text, markup: (502, "Bad Gateway") if chat_id == 700 else (200, ""))
+    assert outbox.deliver_batch() == (1, 1)
+
+    first.refresh_from_db()
+    other.refresh_from_db()
+    assert first.status == NotificationOutbox.Status.PENDING
+    assert first.attempts == 1
+    assert first.next_attempt_at > timezone.now()
+    assert other.status == NotificationOutbox.Status.SENT
+
+    # пока первое сообщение ждёт повтора, второе в том же чате не уходит
+    assert outbox.deliver_batch() == (0, 0)
+
+    delivered = []
+    monkeypatch.setattr(outbox, "post_telegram_message", lambda chat_id, text, markup: delivered.append(text) or (200, ""))
+    NotificationOutbox.objects.filter(id=first.id).update(next_attempt_at=timezone.now())
+    outbox.deliver_batch()
+    outbox.deliver_batch()
+    assert delivered == ["first", "second"]
+
+
+@pytest.mark.django_db
+def test_expired_claim_is_not_sent_twice(monkeypatch):
+    message = outbox.enqueue_telegram_message(800, "once")
+    stale = outbox.claim_batch(batch_size=10)
+    assert [item.id for item in stale] == [message.id]
+    # аренда покрывает худшее время отправки всей пачки
+    message.refresh_from_db()
+    assert message.next_attempt_at >= timezone.now() + timedelta(seconds=10 * 5)
+
+    # аренда истекла, сообщение забрал и отправил другой воркер
+    NotificationOutbox.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+    sent = []
+    monkeypatch.setattr(outbox, "post_telegram_message", lambda *args: sent.append(args) or (200, ""))
+    assert outbox.deliver_batch() == (1, 0)
+
+    # первый воркер дошёл до сообщения: аренда уже не его - не отправляет
+    assert outbox.renew_claim(stale[0]) is False
+    assert len(sent) == 1
+
+
+@pytest.mark.django_db
+def test_blocked_bot_fails_at_once_and_releases_chat_queue(monkeypatch):
+    blocked = outbox.enqueue_telegram_message(900, "first")
+    outbox.enqueue_telegram_message(900, "second")
+    limited = outbox.enqueue_telegram_message(901, "limited")
+
+    responses = {
+        "first": (403, "Forbidden: bot was blocked by the user"),
+        "second": (200, ""),
+        "limited": (429, "Too Many Requests: retry after 5"),
+    }
+    monkeypatch.setattr(outbox, "post_telegram_message", lambda chat_id, text, markup: responses[text])
+    assert outbox.deliver_batch() == (0, 2)
+
+    blocked.refresh_from_db()
+    limited.refresh_from_db()
+    assert blocked.status == NotificationOutbox.Status.FAILED
+    assert blocked.attempts == 1
+    assert "bot was blocked" in blocked.last_error
+    # 429 - временная ошибка, сообщение ждёт повтора
+    assert limited.status == NotificationOutbox.Status.PENDING
+
+    # провал первого сообщения не держит следующие в этом чате
+    assert outbox.deliver_batch() == (1, 0)
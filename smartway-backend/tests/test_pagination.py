@@ -0,0 +1,53 @@
+import pytest
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from trips.models import Trip
+from trips.pagination import KeysetPagination
+
+
+@pytest.mark.django_db
+def test_my_trips_keyset_pagination_walks_all_pages(route, make_user):
+    user = make_user(full_name="P")
+    a, b = route
+    created = [
+        Trip.objects.create(
+            passenger=user, from_location=a, to_location=b,
+            departure_time=timezone.now() + timedelta(hours=i + 1),
+        )
+        for i in range(5)
+    ]
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    seen = []
+    params = {"page_size": 2}
+    pages = 0
+    while params:
+        res = client.get("/api/trips/my/", params)
+        assert res.status_code == 200
+        assert "count" not in res.data
+        assert len(res.data["results"]) <= 2
+        seen.extend(item["id"] for item in res.data["results"])
+        # клиент передаёт только cursor, next - та же страница абсолютной ссылкой
+        cursor = res.data["cursor"]
+        assert (res.data["next"] is None) == (cursor is None)
+        params = cursor and {"page_size": 2, "cursor": cursor}
+        pages += 1
+
+    assert pages == 3
+    assert seen == [trip.id for trip in sorted(created, key=lambda t: (t.created_at, t.id), reverse=True)]
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_404(make_user):
+    user = make_user(full_name="P")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    res = client.get("/api/trips/my/", {"cursor": "garbage"})
+    assert res.status_code == 404
+
+    # корректный base64/JSON, но значения не разбираются полями ordering
+    res = client.get("/api/trips/my/", {"cursor": KeysetPagination().encode_cursor(["not-a-date", "x"])})
+    assert res.status_code == 404
@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from users.authentication import tokens_for_user
+from users.models import User
+from trips.models import Review, Trip
+
+
+@pytest.mark.django_db
+def test_profile_document_is_cached_with_etag_and_invalidated(route, make_user, make_driver, make_car):
+    driver = make_driver(full_name="Driver")
+    car = make_car(driver, brand="Honda", model="Fit")
+    client = APIClient()
+    client.force_authenticate(user=driver)
+
+    first = client.get("/api/users/me/")
+    assert first.status_code == 200
+    etag = first["ETag"]
+    assert [item["id"] for item in first.data["cars"]] == [car.id]
+
+    with CaptureQueriesContext(connection) as ctx:
+        again = client.get("/api/users/me/")
+        not_modified = client.get("/api/users/me/", HTTP_IF_NONE_MATCH=etag)
+    assert len(ctx.captured_queries) == 0
+    assert again.data == first.data
+    assert not_modified.status_code == 304
+    assert not not_modified.content
+
+    # авто
+    car.passenger_seats = 7
+    car.save()
+    res = client.get("/api/users/me/", HTTP_IF_NONE_MATCH=etag)
+    assert res.status_code == 200
+    assert res.data["cars"][0]["passenger_seats"] == 7
+    etag = res["ETag"]
+
+    # отзыв о пользователе
+    passenger = make_user(full_name="P")
+    a, b = route
+    trip = Trip.objects.create(
+        passenger=passenger, driver=driver, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=1), status=Trip.Status.COMPLETED,
+    )
+    Review.objects.create(trip=trip, author=passenger, recipient=driver, rating=4)
+    # в реальном запросе пользователь загружается заново (force_authenticate держит старый объект)
+    client.force_authenticate(user=User.objects.get(pk=driver.pk))
+    res = client.get("/api/users/me/", HTTP_IF_NONE_MATCH=etag)
+    assert res.status_code == 200
+    assert (res.data["average_rating_as_driver"], res.data["reviews_count_as_driver"]) == (4.0, 1)
+    etag = res["ETag"]
+
+    # сам пользователь
+    assert client.patch("/api/users/me/", {"city": "Ош"}, format="json").status_code == 200
+    res = client.get("/api/users/me/", HTTP_IF_NONE_MATCH=etag)
+    assert res.status_code == 200
+    assert res.data["city"] == "Ош"
+
+
+@pytest.mark.django_db
+def test_profile_document_urls_follow_request_host(settings, make_user):
+    settings.ALLOWED_HOSTS = ["*"]
+    user = make_user(full_name="Photo")
+    user.photo = "users/me.jpg"
+    user.save()
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    api = client.get("/api/users/me/", HTTP_HOST="api.example.com")
+    admin = client.get("/api/users/me/", HTTP_HOST="admin.example.com", secure=True)
+    assert api.data["photo"] == "http://api.example.com/media/users/me.jpg"
+    assert admin.data["photo"] == "https://admin.example.com/media/users/me.jpg"
+    assert api["ETag"] != admin["ETag"]
+
+    # сброс действует на документы всех хостов
+    user.full_name = "Renamed"
+    user.save()
+    assert client.get("/api/users/me/", HTTP_HOST="admin.example.com", secure=True).data["full_name"] == "Renamed"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_profile_change_in_another_worker_drops_cached_document(other_process, make_user):
+    user = make_user(full_name="Passenger")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user).access_token}")
+    etag = client.get("/api/users/me/")["ETag"]
+
+    # PATCH /api/users/me/ обработал другой воркер
+    other_process(
+        "from users.models import User\n"
+        f"user = User.objects.get(pk={user.pk})\n"
+        "user.bio = 'new bio'\n"
+        "user.save()"
+    )
+    res = client.get("/api/users/me/", HTTP_IF_NONE_MATCH=etag)
+    assert res.status_code == 200
+    assert res.data["bio"] == "new bio"
+    assert res["ETag"] != etag
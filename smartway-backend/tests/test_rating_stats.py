@@ -0,0 +1,108 @@
+import pytest
+from importlib import import_module
+from django.apps import apps
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from users.models import User, UserRatingStats
+from trips.models import Review, Trip
+
+
+@pytest.fixture
+def trip_parties(route, make_user, make_driver):
+    a, b = route
+    driver = make_driver()
+    passengers = [
+        make_user(full_name="P") for i in range(3)
+    ]
+    trips = [
+        Trip.objects.create(
+            passenger=p, driver=driver, from_location=a, to_location=b,
+            departure_time=timezone.now() + timedelta(hours=1), status=Trip.Status.COMPLETED,
+        )
+        for p in passengers
+    ]
+    return driver, passengers, trips
+
+
+@pytest.mark.django_db
+def test_stats_follow_review_create_update_delete(trip_parties):
+    driver, passengers, trips = trip_parties
+    r1 = Review.objects.create(trip=trips[0], author=passengers[0], recipient=driver, rating=5)
+    Review.objects.create(trip=trips[1], author=passengers[1], recipient=driver, rating=4)
+    Review.objects.create(trip=trips[0], author=driver, recipient=passengers[0], rating=3)
+
+    driver = User.objects.get(pk=driver.pk)
+    assert driver.average_rating_as_driver == 4.5
+    assert driver.reviews_count_as_driver == 2
+    assert driver.reviews_count_as_passenger == 0
+    assert User.objects.get(pk=passengers[0].pk).average_rating_as_passenger == 3.0
+
+    r1.rating = 1
+    r1.save()
+    stats = UserRatingStats.objects.get(user=driver, role=UserRatingStats.Role.DRIVER)
+    assert (stats.reviews_count, stats.rating_sum) == (2, 5)
+    assert stats.histogram == {1: 1, 2: 0, 3: 0, 4: 1, 5: 0}
+
+    r1.delete()
+    stats.refresh_from_db()
+    assert (stats.reviews_count, stats.rating_sum, stats.rating_1) == (1, 4, 0)
+
+
+@pytest.mark.django_db
+def test_rebuild_command_matches_incremental_stats(trip_parties):
+    driver, passengers, trips = trip_parties
+    for trip, passenger, rating in zip(trips, passengers, (5, 3, 2)):
+        Review.objects.create(trip=trip, author=passenger, recipient=driver, rating=rating)
+    before = list(UserRatingStats.objects.values_list("user_id", "role", "reviews_count", "rating_sum"))
+
+    UserRatingStats.objects.all().delete()
+    call_command("rebuild_rating_stats", stdout=open("/dev/null", "w"))
+
+    after = list(UserRatingStats.objects.values_list("user_id", "role", "reviews_count", "rating_sum"))
+    assert after == before == [(driver.id, "driver", 3, 10)]
+
+
+@pytest.mark.django_db
+def test_role_switch_does_not_move_review_between_buckets(trip_parties):
+    driver, passengers, trips = trip_parties
+    review = Review.objects.create(trip=trips[0], author=passengers[0], recipient=driver, rating=5)
+    assert review.recipient_role == UserRatingStats.Role.DRIVER
+
+    # автор стал водителем - отзыв по-прежнему о водителе поездки
+    author = passengers[0]
+    author.is_driver = True
+    author.save()
+    review = Review.objects.get(pk=review.pk)
+    review.rating = 4
+    review.save()
+    stats = UserRatingStats.objects.get(user=driver, role=UserRatingStats.Role.DRIVER)
+    assert (stats.reviews_count, stats.rating_sum) == (1, 4)
+
+    review.delete()
+    stats.refresh_from_db()
+    assert (stats.reviews_count, stats.rating_sum) == (0, 0)
+    assert not UserRatingStats.objects.filter(user=driver, role=UserRatingStats.Role.PASSENGER).exists()
+
+
+@pytest.mark.django_db
+def test_recipient_role_migration_rebuilds_author_based_stats(trip_parties):
+    driver, passengers, trips = trip_parties
+    author = passengers[0]
+    author.is_driver = True
+    author.save()
+    review = Review.objects.create(trip=trips[0], author=author, recipient=driver, rating=5)
+
+    # состояние после 0010: роль по автору - отзыв о водителе лёг в "passenger"
+    UserRatingStats.objects.all().delete()
+    import_module("users.migrations.0010_userratingstats").backfill_rating_stats(apps, None)
+    assert UserRatingStats.objects.filter(user=driver, role=UserRatingStats.Role.PASSENGER).exists()
+
+    import_module("trips.migrations.0023_review_recipient_role").rebuild_rating_stats(apps, None)
+    assert list(UserRatingStats.objects.values_list("user_id", "role", "reviews_count")) == [
+        (driver.id, "driver", 1),
+    ]
+
+    review.delete()
+    stats = UserRatingStats.objects.get(user=driver)
+    assert (stats.role, stats.reviews_count, stats.rating_sum) == ("driver", 0, 0)
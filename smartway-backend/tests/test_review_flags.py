@@ -0,0 +1,68 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from trips.models import Booking, Review, Trip
+
+
+def _incoming_queries(client):
+    """Построчные запросы к отзывам по бронированиям (fallback has_review_from_me)"""
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get("/api/bookings/incoming/")
+    assert res.status_code == 200
+    review_queries = [
+        q for q in ctx.captured_queries
+        if '"trips_review"."booking_id"' in q["sql"]
+    ]
+    return res, len(review_queries)
+
+
+@pytest.mark.django_db
+def test_incoming_bookings_review_flags_are_batched(make_user, make_driver, make_announcement):
+    driver = make_driver()
+    announcement = make_announcement(driver, available_seats=10, price_per_seat="100.00")
+
+    def add_bookings(count):
+        return [
+            Booking.objects.create(announcement=announcement, passenger=make_user(), status=Booking.Status.COMPLETED)
+            for _ in range(count)
+        ]
+
+    client = APIClient()
+    client.force_authenticate(user=driver)
+
+    first = add_bookings(2)
+    Review.objects.create(booking=first[0], author=driver, recipient=first[0].passenger, rating=5)
+    _, queries_small = _incoming_queries(client)
+
+    add_bookings(6)
+    res, queries_large = _incoming_queries(client)
+
+    assert queries_small == queries_large == 0
+    flags = {item["id"]: item["has_review_from_me"] for item in res.data["results"]}
+    assert flags[first[0].id] is True
+    assert flags[first[1].id] is False
+
+
+@pytest.mark.django_db
+def test_my_trips_review_flag(route, make_user):
+    a, b = route
+    passenger = make_user(full_name="P")
+    driver = make_user(full_name="D")
+    reviewed = Trip.objects.create(
+        passenger=passenger, driver=driver, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=1), status=Trip.Status.COMPLETED,
+    )
+    other = Trip.objects.create(
+        passenger=passenger, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=2),
+    )
+    Review.objects.create(trip=reviewed, author=passenger, recipient=driver, rating=4)
+
+    client = APIClient()
+    client.force_authenticate(user=passenger)
+    res = client.get("/api/trips/my/")
+    flags = {item["id"]: item["has_review_from_me"] for item in res.data["results"]}
+    assert flags == {reviewed.id: True, other.id: False}
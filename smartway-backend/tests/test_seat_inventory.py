@@ -0,0 +1,88 @@
+import threading
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+from trips.inventory import release_seats, reserve_seats
+from trips.models import Booking, DriverAnnouncement
+
+
+@pytest.mark.django_db
+def test_reserve_and_release_flip_status_in_same_update(make_driver, make_car, make_announcement):
+    driver = make_driver()
+    announcement = make_announcement(driver, car=make_car(driver, passenger_seats=3), available_seats=4)
+
+    assert reserve_seats(announcement, 2)
+    announcement.refresh_from_db()
+    assert (announcement.booked_seats, announcement.status) == (2, "active")
+
+    # вместимость авто (3) меньше available_seats (4)
+    assert not reserve_seats(announcement, 2)
+    assert reserve_seats(announcement, 1)
+    announcement.refresh_from_db()
+    assert (announcement.booked_seats, announcement.status) == (3, "full")
+    assert not reserve_seats(announcement, 1)
+
+    assert release_seats(announcement, 1)
+    announcement.refresh_from_db()
+    assert (announcement.booked_seats, announcement.status) == (2, "active")
+    assert not release_seats(announcement, 5)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_confirms_never_overbook(make_user, make_announcement):
+    """Стресс: 12 параллельных подтверждений на 3 места (файловая SQLite, см. settings.DATABASES)"""
+    announcement = make_announcement(available_seats=3)
+    bookings = [
+        Booking.objects.create(announcement=announcement, passenger=make_user(), seats_count=1)
+        for _ in range(12)
+    ]
+
+    barrier = threading.Barrier(len(bookings))
+    codes = []
+
+    def confirm(booking):
+        client = APIClient()
+        client.force_authenticate(user=announcement.driver)
+        try:
+            barrier.wait()
+            codes.append(client.post(f"/api/bookings/{booking.id}/confirm/").status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=confirm, args=(booking,)) for booking in bookings]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(codes) == [200] * 3 + [400] * 9
+    announcement.refresh_from_db()
+    assert announcement.booked_seats == 3
+    assert announcement.status == DriverAnnouncement.Status.FULL
+    assert Booking.objects.filter(status=Booking.Status.CONFIRMED).count() == 3
+
+    # параллельные отмены подтверждённых броней возвращают ровно свои места
+    confirmed = list(Booking.objects.filter(status=Booking.Status.CONFIRMED))
+    barrier = threading.Barrier(len(confirmed) * 2)
+    codes.clear()
+
+    def cancel(booking):
+        client = APIClient()
+        client.force_authenticate(user=booking.passenger)
+        try:
+            barrier.wait()
+            codes.append(client.post(f"/api/bookings/{booking.id}/cancel/").status_code)
+        finally:
+            connection.close()
+
+    # каждая бронь отменяется дважды одновременно
+    threads = [threading.Thread(target=cancel, args=(booking,)) for booking in confirmed * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(codes) == [200] * 3 + [400] * 3
+    announcement.refresh_from_db()
+    assert announcement.booked_seats == 0
+    assert announcement.status == DriverAnnouncement.Status.ACTIVE
@@ -0,0 +1,59 @@
+import threading
+import time
+import pytest
+from django.db import connection
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from trips.models import Trip
+
+
+PARALLEL_DRIVERS = 16
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_take_has_exactly_one_winner(route, make_user, make_driver):
+    """Бенчмарк: N водителей одновременно жмут "взять" на один заказ"""
+    a, b = route
+    passenger = make_user(full_name="P")
+    trip = Trip.objects.create(
+        passenger=passenger, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=3),
+    )
+    drivers = []
+    for i in range(PARALLEL_DRIVERS):
+        driver = make_driver(full_name=f"D{i}")
+        drivers.append(driver)
+
+    barrier = threading.Barrier(PARALLEL_DRIVERS)
+    results = {}
+
+    def take(driver):
+        client = APIClient()
+        client.force_authenticate(user=driver)
+        try:
+            barrier.wait()
+            started = time.perf_counter()
+            response = client.post(f"/api/trips/{trip.id}/take/")
+            results[driver.id] = (response.status_code, time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=take, args=(driver,)) for driver in drivers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [driver_id for driver_id, (code, _) in results.items() if code == 200]
+    assert len(results) == PARALLEL_DRIVERS
+    assert len(winners) == 1
+    assert sorted({code for code, _ in results.values()}) == [200, 400]
+
+    trip.refresh_from_db()
+    assert trip.status == Trip.Status.TAKEN
+    assert trip.driver_id == winners[0]
+
+    # соседи ждут блокировку, а не падают: ни один запрос не дольше busy timeout
+    timeout = connection.settings_dict["OPTIONS"].get("timeout", 5)
+    assert max(latency for _, latency in results.values()) < timeout
@@ -0,0 +1,102 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from users.authentication import tokens_for_user
+from users.models import User
+
+
+def _client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+@pytest.mark.django_db
+def test_principal_from_claims_loads_row_lazily_and_role_switch_revokes(make_driver, make_car):
+    user = make_driver(full_name="Driver", bio="bio")
+    make_car(user, brand="Kia", model="Rio", plate_number="02KG")
+    access = str(tokens_for_user(user).access_token)
+    client = _client(access)
+
+    # первый запрос: версия токена + сборка профиля; повторный - ни одного запроса
+    first = client.get("/api/users/me/")
+    assert first.status_code == 200
+    assert (first.data["bio"], first.data["is_driver"]) == ("bio", True)
+    with CaptureQueriesContext(connection) as ctx:
+        assert client.get("/api/users/me/").status_code == 200
+    assert len(ctx.captured_queries) == 0
+
+    # view, которой нужны только горячие поля и FK-фильтр: строка пользователя не читается
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get("/api/trips/my-completed/")
+    assert res.status_code == 200
+    assert not [q for q in ctx.captured_queries if 'FROM "users_user"' in q["sql"]]
+
+    res = client.post("/api/users/me/switch-role/", {"role": "passenger"}, format="json")
+    assert res.status_code == 200
+    assert res.data["is_driver"] is False
+    assert client.get("/api/users/me/").status_code == 401
+
+    renewed = _client(res.data["access"])
+    res = renewed.get("/api/users/me/")
+    assert res.status_code == 200
+    assert res.data["is_driver"] is False
+
+    # деактивация тоже закрывает доступ
+    user.refresh_from_db()
+    user.is_active = False
+    user.save()
+    assert renewed.get("/api/users/me/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_principal_change_revokes_token_and_refresh_reissues_claims(make_user):
+    user = make_user(full_name="Passenger")
+    tokens = tokens_for_user(user)
+    client = _client(str(tokens.access_token))
+
+    # роль через профиль не меняется - только через switch-role
+    res = client.patch("/api/users/me/", {"is_driver": True}, format="json")
+    assert res.status_code == 200
+    assert User.objects.get(pk=user.pk).is_driver is False
+
+    # модерация меняет флаг верификации - старый токен отозван
+    assert client.get("/api/users/verification/status/").status_code == 200
+    stored = User.objects.get(pk=user.pk)
+    stored.is_verified_passenger = True
+    stored.save()
+    res = client.get("/api/users/me/")
+    assert res.status_code == 401
+    assert res.data["code"] == "token_revoked"
+
+    res = APIClient().post("/api/users/token/refresh/", {"refresh": str(tokens)}, format="json")
+    assert res.status_code == 200
+    renewed = _client(res.data["access"])
+    res = renewed.get("/api/users/verification/status/")
+    assert res.status_code == 200
+    assert res.data["is_verified_passenger"] is True
+
+    # сохранение без изменения горячих полей токены не трогает
+    stored.bio = "bio"
+    stored.save()
+    assert renewed.get("/api/users/me/").status_code == 200
+
+    res = APIClient().post("/api/users/token/refresh/", {"refresh": "garbage"}, format="json")
+    assert res.status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+def test_deactivation_in_another_process_locks_out_immediately(other_process, make_user):
+    user = make_user(full_name="Driver")
+    client = _client(str(tokens_for_user(user).access_token))
+    assert client.get("/api/users/me/").status_code == 200
+
+    # админ/команда в своём процессе: версия в общем кэше сбрасывается для всех воркеров
+    other_process(
+        "from users.models import User\n"
+        f"user = User.objects.get(pk={user.pk})\n"
+        "user.is_active = False\n"
+        "user.save()"
+    )
+    assert client.get("/api/users/me/").status_code == 401
@@ -0,0 +1,168 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from trips import feed
+from trips.models import Trip, TripRelease
+from trips.routing import websocket_urlpatterns
+
+
+IN_MEMORY_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+class FeedClient(ApplicationCommunicator):
+    """Минимальный websocket-клиент поверх asgiref (channels.testing тянет daphne)"""
+
+    def __init__(self, path, user=None):
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "websocket",
+            "path": path,
+            "query_string": query.encode(),
+            "headers": [],
+            "subprotocols": [],
+        }
+        if user is not None:
+            scope["user"] = user
+        super().__init__(URLRouter(websocket_urlpatterns), scope)
+
+    async def connect(self):
+        await self.send_input({"type": "websocket.connect"})
+        response = await self.receive_output(2)
+        return response["type"] == "websocket.accept", response.get("code")
+
+    async def receive_json(self):
+        response = await self.receive_output(2)
+        return json.loads(response["text"])
+
+    async def disconnect(self):
+        await self.send_input({"type": "websocket.disconnect", "code": 1000})
+        await self.wait(1)
+
+
+@pytest.fixture
+def open_trip(route, make_user):
+    def open_():
+        a, b = route
+        return Trip.objects.create(
+            passenger=make_user(full_name="P"), from_location=a, to_location=b,
+            departure_time=timezone.now() + timedelta(hours=3),
+        )
+
+    return open_
+
+
+@pytest.mark.django_db
+def test_replay_returns_released_and_withdrawn_trips(open_trip):
+    trip = open_trip()
+    # бесплатный уровень видит заказ через DEFAULT_VIEW_DELAY - сдвигаем публикацию в прошлое
+    TripRelease.objects.filter(trip=trip).update(visible_from=timezone.now() - timedelta(seconds=30))
+    since = timezone.now() - timedelta(minutes=1)
+    until = timezone.now() + timedelta(seconds=1)
+
+    assert feed.decode_token(feed.encode_token(since)) == since
+    assert feed.decode_token("garbage") is None
+
+    events = feed.replay_events(TripRelease.FREE_TIER, since, until)
+    assert [(e["type"], e["trip"]["id"]) for e in events] == [("trip", trip.id)]
+
+    trip.status = Trip.Status.CANCELLED
+    trip.save(update_fields=["status", "updated_at"])
+    until = timezone.now() + timedelta(seconds=1)
+    assert feed.replay_events(TripRelease.FREE_TIER, since, until) == [
+        {"type": "withdrawn", "trip_id": trip.id}
+    ]
+    assert feed.replay_events(TripRelease.FREE_TIER, until - timedelta(days=1), until) is None
+
+
+
+@pytest.mark.django_db
+def test_released_trip_is_published_again_after_the_feed_cursor(make_driver, open_trip):
+    from billing.utils import DEFAULT_VIEW_DELAY
+    from trips.releases import rebuild_trip_releases
+
+    trip = open_trip()
+    driver = make_driver()
+    # заказ давно в ленте, курсор рассылки ушёл вперёд
+    Trip.objects.filter(pk=trip.pk).update(created_at=timezone.now() - timedelta(hours=1))
+    trip.refresh_from_db()
+    assert trip.take(driver)
+    cursor = feed.settled_now()
+
+    assert trip.release(driver)
+    release = TripRelease.objects.get(trip=trip, tier=TripRelease.FREE_TIER)
+    assert release.visible_from > cursor
+    assert release.visible_from >= trip.reopened_at + timedelta(seconds=DEFAULT_VIEW_DELAY)
+
+    later = release.visible_from + timedelta(seconds=1)
+    assert [t.id for _, _, t in feed.released_trips(cursor, later)] == [trip.id]
+
+    # пересчёт тарифов не откатывает момент возврата
+    rebuild_trip_releases()
+    assert TripRelease.objects.get(trip=trip, tier=TripRelease.FREE_TIER).visible_from == release.visible_from
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_consumer_replays_and_receives_broadcasts(settings, make_driver, open_trip):
+    settings.CHANNEL_LAYERS = IN_MEMORY_LAYERS
+    driver = make_driver()
+    since = timezone.now() - timedelta(minutes=1)
+    trip = open_trip()
+    Trip.objects.filter(pk=trip.pk).update(created_at=timezone.now() - timedelta(seconds=30))
+    TripRelease.objects.filter(trip=trip).update(visible_from=timezone.now() - timedelta(seconds=30))
+
+    async def scenario():
+        communicator = FeedClient(f"/ws/trips/feed/?since={feed.encode_token(since)}", driver)
+        connected, _ = await communicator.connect()
+        assert connected
+        replayed = await communicator.receive_json()
+        assert (replayed["type"], replayed["trip"]["id"]) == ("trip", trip.id)
+        assert (await communicator.receive_json())["type"] == "synced"
+
+        await get_channel_layer().group_send(feed.FEED_GROUP, {
+            "type": "feed.withdrawn", "trip_id": trip.id, "token": "t",
+        })
+        assert await communicator.receive_json() == {"type": "withdrawn", "trip_id": trip.id, "token": "t"}
+        await communicator.disconnect()
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_rejects_anonymous_and_passengers(settings, make_user):
+    settings.CHANNEL_LAYERS = IN_MEMORY_LAYERS
+    passenger = make_user(full_name="P")
+
+    async def scenario(user, code):
+        communicator = FeedClient("/ws/trips/feed/", user)
+        connected, close_code = await communicator.connect()
+        assert not connected
+        assert close_code == code
+
+    async_to_sync(scenario)(None, 4401)
+    async_to_sync(scenario)(passenger, 4403)
+
+
+@pytest.mark.django_db
+def test_shorter_plan_delay_republishes_ahead_of_the_cursor(open_trip):
+    from billing.models import SubscriptionPlan
+
+    # курсор отстаёт больше, чем транзакция может ждать блокировку БД
+    assert feed.FEED_LAG_SECONDS > settings.DATABASES["default"]["OPTIONS"]["timeout"]
+
+    plan = SubscriptionPlan.objects.create(name="Slow", price="100.00", duration_days=30, view_delay_seconds=600)
+    trip = open_trip()
+    Trip.objects.filter(pk=trip.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+    cursor = feed.settled_now()
+
+    # задержка стала нулевой: заказ открыт тарифу "в прошлом", но ещё не был ему показан
+    plan.view_delay_seconds = 0
+    plan.save()
+    release = TripRelease.objects.get(trip=trip, tier=plan.id)
+    assert release.visible_from > cursor
+    assert [t.id for _, _, t in feed.released_trips(cursor, timezone.now(), tier=plan.id)] == [trip.id]
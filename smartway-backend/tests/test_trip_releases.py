@@ -0,0 +1,79 @@
+import pytest
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from billing.models import DriverSubscription, SubscriptionPlan
+from billing.utils import DEFAULT_VIEW_DELAY
+from trips.models import Trip, TripRelease
+from trips.releases import rebuild_trip_releases, visible_trips
+
+
+def _available_ids(driver):
+    client = APIClient()
+    client.force_authenticate(user=driver)
+    res = client.get("/api/trips/available/")
+    assert res.status_code == 200
+    return [item["id"] for item in res.data["results"]]
+
+
+@pytest.mark.django_db
+def test_release_times_follow_plan_delay_and_trip_status(route, make_user, make_driver):
+    plan = SubscriptionPlan.objects.create(name="Slow", price="100.00", duration_days=30, view_delay_seconds=600)
+    a, b = route
+    passenger = make_user(full_name="P")
+    trip = Trip.objects.create(
+        passenger=passenger, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=3),
+    )
+
+    releases = dict(trip.releases.values_list("tier", "visible_from"))
+    assert set(releases) == {TripRelease.FREE_TIER, plan.id}
+    assert releases[plan.id] - releases[TripRelease.FREE_TIER] == timedelta(seconds=600 - DEFAULT_VIEW_DELAY)
+
+    # заказ создан 5 минут назад: бесплатный уровень его уже видит, тариф с задержкой 10 минут - ещё нет
+    Trip.objects.filter(pk=trip.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+    rebuild_trip_releases()
+
+    free_driver = make_driver()
+    subscriber = make_driver()
+    DriverSubscription.objects.create(driver=subscriber, plan=plan, expires_at=timezone.now() + timedelta(days=30))
+
+    assert _available_ids(free_driver) == [trip.id]
+    assert _available_ids(subscriber) == []
+
+    # изменение тарифа пересчитывает открытые заказы
+    plan.view_delay_seconds = 0
+    plan.save()
+    assert _available_ids(subscriber) == [trip.id]
+
+    trip.status = Trip.Status.TAKEN
+    trip.save(update_fields=["status", "updated_at"])
+    assert not trip.releases.exists()
+    assert _available_ids(free_driver) == []
+
+    # лента фильтрует по копии departure_time в TripRelease (колонка индекса trip_release_feed_idx)
+    sql = str(visible_trips(free_driver).query)
+    assert '"trips_triprelease"."departure_time" >' in sql
+    assert '"trips_trip"."departure_time" >' not in sql
+
+
+@pytest.mark.django_db
+def test_cancel_rolls_back_when_feed_sync_fails(monkeypatch, route, make_user):
+    a, b = route
+    passenger = make_user(full_name="P")
+    trip = Trip.objects.create(
+        passenger=passenger, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=3),
+    )
+
+    def broken_sync(trip):
+        raise RuntimeError("sync failed")
+
+    monkeypatch.setattr("trips.releases.sync_trip_releases", broken_sync)
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(user=passenger)
+    assert client.post(f"/api/trips/{trip.id}/cancel/").status_code == 500
+
+    trip.refresh_from_db()
+    assert trip.status == Trip.Status.OPEN
+    assert trip.releases.exists()
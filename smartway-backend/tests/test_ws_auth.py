@@ -0,0 +1,85 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.routing import URLRouter
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework_simplejwt.tokens import AccessToken
+from users.ws_auth import JWTAuthMiddlewareStack
+from trips.models import Trip
+from chat.routing import websocket_urlpatterns
+
+
+IN_MEMORY_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+async def _connect(path, query="", subprotocols=()):
+    communicator = ApplicationCommunicator(JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns)), {
+        "type": "websocket",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [],
+        "subprotocols": list(subprotocols),
+    })
+    await communicator.send_input({"type": "websocket.connect"})
+    return communicator, await communicator.receive_output(2)
+
+
+@pytest.fixture
+def chat_trip(route, make_user):
+    a, b = route
+    passenger = make_user(full_name="Пассажир")
+    driver = make_user(full_name="Водитель")
+    return Trip.objects.create(
+        passenger=passenger, driver=driver, from_location=a, to_location=b,
+        departure_time=timezone.now() + timedelta(hours=3), status=Trip.Status.TAKEN,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_chat_accepts_jwt_from_query_and_subprotocol(settings, chat_trip):
+    settings.CHANNEL_LAYERS = IN_MEMORY_LAYERS
+    cache.clear()
+    path = f"/ws/chat/{chat_trip.id}/"
+    passenger_token = str(AccessToken.for_user(chat_trip.passenger))
+    driver_token = str(AccessToken.for_user(chat_trip.driver))
+
+    async def scenario():
+        passenger, response = await _connect(path, query=f"token={passenger_token}")
+        assert (response["type"], response.get("subprotocol")) == ("websocket.accept", None)
+
+        driver, response = await _connect(path, subprotocols=["bearer", driver_token])
+        assert response["type"] == "websocket.accept"
+        assert response["subprotocol"] == "bearer"
+
+        await passenger.send_input({"type": "websocket.receive", "text": json.dumps({"message": "Привет"})})
+        event = json.loads((await driver.receive_output(2))["text"])
+        assert event["message"] == "Пассажир: Привет"
+        assert event["sender"] == chat_trip.passenger_id
+
+        for communicator in (passenger, driver):
+            await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+            await communicator.wait(1)
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_chat_rejects_anonymous_bad_tokens_and_strangers(settings, chat_trip, make_user):
+    settings.CHANNEL_LAYERS = IN_MEMORY_LAYERS
+    cache.clear()
+    path = f"/ws/chat/{chat_trip.id}/"
+    stranger = make_user(full_name="S")
+
+    async def scenario():
+        for query, code in (
+            ("", 4401),
+            ("token=broken", 4401),
+            (f"token={AccessToken.for_user(stranger)}", 4403),
+        ):
+            _, response = await _connect(path, query=query)
+            assert (response["type"], response["code"]) == ("websocket.close", code)
+
+    async_to_sync(scenario)()
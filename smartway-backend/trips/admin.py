@@ -1,6 +1,8 @@
 # trips/admin.py
 from django.contrib import admin
-from .models import Trip, DriverAnnouncement, Booking, Review
+from .models import (
+    Trip, DriverAnnouncement, AnnouncementStop, AnnouncementSchedule, Booking, Review, NotificationOutbox,
+)
 
 
 @admin.register(Trip)
@@ -15,6 +17,13 @@ class TripAdmin(admin.ModelAdmin):
     date_hierarchy = 'departure_time'
 
 
+class AnnouncementStopInline(admin.TabularInline):
+    model = AnnouncementStop
+    extra = 0
+    raw_id_fields = ('location',)
+    ordering = ('sequence',)
+
+
 @admin.register(DriverAnnouncement)
 class DriverAnnouncementAdmin(admin.ModelAdmin):
     list_display = (
@@ -25,6 +34,19 @@ class DriverAnnouncementAdmin(admin.ModelAdmin):
     search_fields = ('from_location', 'to_location', 'driver__full_name')
     raw_id_fields = ('driver', 'car')
     date_hierarchy = 'departure_time'
+    inlines = [AnnouncementStopInline]
+
+
+@admin.register(AnnouncementSchedule)
+class AnnouncementScheduleAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'from_location', 'to_location', 'weekdays', 'departure_time',
+        'driver', 'available_seats', 'price_per_seat', 'is_active', 'generated_until'
+    )
+    list_filter = ('is_active',)
+    search_fields = ('driver__full_name', 'driver__phone_number')
+    raw_id_fields = ('driver', 'car')
+    readonly_fields = ('generated_until',)
 
 
 @admin.register(Booking)
@@ -42,4 +64,12 @@ class ReviewAdmin(admin.ModelAdmin):
     list_display = ('id', 'author', 'recipient', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
     search_fields = ('author__full_name', 'recipient__full_name', 'text')
-    raw_id_fields = ('trip', 'booking', 'author', 'recipient')
\ No newline at end of file
+    raw_id_fields = ('trip', 'booking', 'author', 'recipient')
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'chat_id', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('chat_id', 'text')
+    readonly_fields = ('created_at', 'sent_at')
@@ -0,0 +1,77 @@
+# trips/consumers.py
+import json
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .feed import FEED_GROUP, decode_token, encode_token, replay_events, settled_now, tier_group
+from .releases import driver_release_tier
+
+
+class TripFeedConsumer(AsyncWebsocketConsumer):
+    """
+    ws/trips/feed/?since=<token> - лента новых и снятых заказов для водителя.
+
+    Сервер присылает:
+      {"type": "trip", "trip": {...}, "token": "..."}      - заказ стал виден по тарифу
+      {"type": "withdrawn", "trip_id": 1, "token": "..."}  - заказ взят/отменён
+      {"type": "synced", "token": "..."}                   - докачка после since завершена
+      {"type": "reset"}                                    - токен устарел, перечитайте /api/trips/available/
+    Последний полученный token передаётся в ?since= при переподключении.
+    Доставка "как минимум один раз": клиент убирает дубли по id заказа.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not getattr(user, "is_authenticated", False):
+            await self.close(code=4401)
+            return
+        if not getattr(user, "is_driver", False):
+            await self.close(code=4403)
+            return
+
+        self.user_id = user.id
+        self.tier = await database_sync_to_async(driver_release_tier)(user)
+        self.groups_joined = [FEED_GROUP, tier_group(self.tier)]
+        # подписываемся до докачки, чтобы не потерять события между ними
+        for group in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept(subprotocol=self.scope.get("auth_subprotocol"))
+
+        until = settled_now()
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        since = decode_token((query.get("since") or [""])[0])
+        if since is not None:
+            events = await database_sync_to_async(replay_events)(self.tier, since, until)
+            if events is None:
+                await self._send({"type": "reset"})
+            else:
+                token = encode_token(until)
+                for event in events:
+                    if not self._is_own(event):
+                        await self._send({**event, "token": token})
+        await self._send({"type": "synced", "token": encode_token(until)})
+
+    async def disconnect(self, close_code):
+        for group in getattr(self, "groups_joined", []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        # лента только на отправку; ping от клиента просто игнорируем
+        return
+
+    async def feed_trip(self, event):
+        message = {"type": "trip", "trip": event["trip"], "token": event["token"]}
+        if not self._is_own(message):
+            await self._send(message)
+
+    async def feed_withdrawn(self, event):
+        await self._send({"type": "withdrawn", "trip_id": event["trip_id"], "token": event["token"]})
+
+    def _is_own(self, event):
+        trip = event.get("trip") or {}
+        return trip.get("passenger") == self.user_id
+
+    async def _send(self, message):
+        await self.send(text_data=json.dumps(message, ensure_ascii=False))
@@ -0,0 +1,89 @@
+# trips/expiry.py
+"""
+Просрочка прошедших заказов и объявлений (manage.py expire_past_due).
+Работает короткими пачками по индексу (status, departure_time, id):
+каждая пачка - своя короткая транзакция, длинных блокировок нет.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, DriverAnnouncement, Trip, TripRelease, TripWithdrawal
+from .notifications import send_booking_status_notifications
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _past_due_ids(queryset, now, batch_size):
+    return list(
+        queryset.filter(departure_time__lte=now)
+        .order_by("departure_time", "id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+
+
+def expire_trips_batch(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Одна пачка открытых заказов, время которых прошло: open → expired. Возвращает число заказов."""
+    now = now or timezone.now()
+    ids = _past_due_ids(Trip.objects.filter(status=Trip.Status.OPEN), now, batch_size)
+    if not ids:
+        return 0
+    with transaction.atomic():
+        expired = Trip.objects.filter(id__in=ids, status=Trip.Status.OPEN).update(
+            status=Trip.Status.EXPIRED, updated_at=timezone.now()
+        )
+        # update() не шлёт post_save: убираем заказы из ленты водителей сами
+        in_feed = set(TripRelease.objects.filter(trip_id__in=ids).values_list("trip_id", flat=True))
+        TripRelease.objects.filter(trip_id__in=ids).delete()
+        TripWithdrawal.objects.bulk_create([TripWithdrawal(trip_id=trip_id) for trip_id in in_feed])
+    return expired
+
+
+def expire_announcements_batch(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Одна пачка объявлений, время отправления которых прошло: active/full → expired.
+    Необработанные заявки отменяются (с уведомлением пассажиров); подтверждённые
+    остаются - водитель по-прежнему может завершить поездку.
+    """
+    now = now or timezone.now()
+    live_statuses = [DriverAnnouncement.Status.ACTIVE, DriverAnnouncement.Status.FULL]
+    ids = _past_due_ids(DriverAnnouncement.objects.filter(status__in=live_statuses), now, batch_size)
+    if not ids:
+        return 0
+    with transaction.atomic():
+        expired = DriverAnnouncement.objects.filter(id__in=ids, status__in=live_statuses).update(
+            status=DriverAnnouncement.Status.EXPIRED, updated_at=timezone.now()
+        )
+        pending = list(
+            Booking.objects.filter(announcement_id__in=ids, status=Booking.Status.PENDING).select_related(
+                "passenger",
+                "announcement",
+                "announcement__driver",
+                "announcement__from_location",
+                "announcement__to_location",
+            )
+        )
+        Booking.objects.filter(id__in=[booking.id for booking in pending], status=Booking.Status.PENDING).update(
+            status=Booking.Status.CANCELLED, updated_at=timezone.now()
+        )
+        for booking in pending:
+            booking.status = Booking.Status.CANCELLED
+        send_booking_status_notifications(pending)
+    return expired
+
+
+def expire_past_due(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Пройти все пачки до конца. Возвращает (заказов, объявлений)."""
+    now = now or timezone.now()
+    trips = announcements = 0
+    while True:
+        expired = expire_trips_batch(now, batch_size)
+        trips += expired
+        if expired < batch_size:
+            break
+    while True:
+        expired = expire_announcements_batch(now, batch_size)
+        announcements += expired
+        if expired < batch_size:
+            break
+    return trips, announcements
@@ -0,0 +1,124 @@
+# trips/feed.py
+import base64
+import json
+from datetime import datetime, timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .models import Trip, TripRelease, TripWithdrawal
+from .serializers import TripListSerializer
+
+
+# Снятия заказов рассылаются всем водителям, новые заказы - только своему уровню
+FEED_GROUP = "trip_feed"
+# Событие считаем "устоявшимся" с отставанием: visible_from выставляется до
+# коммита, и транзакция, ждущая блокировку БД (до timeout из OPTIONS), станет
+# видна позже. Отставание перекрывает это ожидание, иначе событие окажется
+# позади курсора и не будет ни разослано, ни докачано
+FEED_COMMIT_MARGIN_SECONDS = 10
+FEED_LAG_SECONDS = (
+    settings.DATABASES["default"].get("OPTIONS", {}).get("timeout", 20) + FEED_COMMIT_MARGIN_SECONDS
+)
+# Насколько далеко назад можно докачать события по токену; старше - клиент
+# перечитывает /api/trips/available/ целиком
+FEED_REPLAY_WINDOW = timedelta(hours=6)
+
+
+def tier_group(tier):
+    return f"{FEED_GROUP}_tier_{tier}"
+
+
+def settled_now():
+    return timezone.now() - timedelta(seconds=FEED_LAG_SECONDS)
+
+
+def encode_token(moment):
+    """Токен возобновления - момент, до которого клиент получил все события"""
+    raw = json.dumps([moment.isoformat()])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Момент из токена или None, если токен битый"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        (value,) = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        moment = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+    if timezone.is_naive(moment):
+        return None
+    return moment
+
+
+def trip_payload(trip):
+    """Заказ в том же виде, что и в /api/trips/available/ (только JSON-типы для channel layer)"""
+    return json.loads(JSONRenderer().render(TripListSerializer(trip).data))
+
+
+def released_trips(since, until, tier=None):
+    """
+    Открытые заказы, ставшие видимыми в (since, until].
+    Список (tier, visible_from, trip) по возрастанию visible_from.
+    """
+    releases = TripRelease.objects.filter(
+        visible_from__gt=since,
+        visible_from__lte=until,
+        departure_time__gt=timezone.now(),
+        trip__status=Trip.Status.OPEN,
+    )
+    if tier is not None:
+        releases = releases.filter(tier=tier)
+    releases = releases.select_related(
+        "trip", "trip__passenger", "trip__driver", "trip__car"
+    ).order_by("visible_from", "id")
+    return [(release.tier, release.visible_from, release.trip) for release in releases]
+
+
+def withdrawn_trip_ids(since, until):
+    return list(
+        TripWithdrawal.objects
+        .filter(withdrawn_at__gt=since, withdrawn_at__lte=until)
+        .order_by("withdrawn_at", "id")
+        .values_list("trip_id", flat=True)
+    )
+
+
+def replay_events(tier, since, until):
+    """
+    События ленты уровня tier за (since, until] для переподключившегося клиента.
+    None - токен слишком старый, нужно перечитать ленту через REST.
+    """
+    if since < until - FEED_REPLAY_WINDOW:
+        return None
+    events = [
+        {"type": "trip", "trip": trip_payload(trip)}
+        for _, _, trip in released_trips(since, until, tier=tier)
+    ]
+    events.extend(
+        {"type": "withdrawn", "trip_id": trip_id}
+        for trip_id in withdrawn_trip_ids(since, until)
+    )
+    return events
+
+
+def purge_withdrawals(before=None):
+    before = before or timezone.now() - FEED_REPLAY_WINDOW
+    TripWithdrawal.objects.filter(withdrawn_at__lt=before).delete()
+
+
+def broadcast(channel_layer, since, until):
+    """Разослать события ленты за (since, until] группам channel layer. Возвращает число событий."""
+    group_send = async_to_sync(channel_layer.group_send)
+    token = encode_token(until)
+    sent = 0
+    for tier, _, trip in released_trips(since, until):
+        group_send(tier_group(tier), {"type": "feed.trip", "trip": trip_payload(trip), "token": token})
+        sent += 1
+    for trip_id in withdrawn_trip_ids(since, until):
+        group_send(FEED_GROUP, {"type": "feed.withdrawn", "trip_id": trip_id, "token": token})
+        sent += 1
+    return sent
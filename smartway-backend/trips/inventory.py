@@ -0,0 +1,128 @@
+# trips/inventory.py
+"""
+Учёт мест в объявлениях водителей.
+
+Каждое изменение booked_seats - один условный UPDATE по строке объявления:
+проверка вместимости, инкремент через F() и переключение active/full
+выполняются в одном выражении, поэтому параллельные подтверждения не
+перебронируют и счётчик не "уплывает". Условия стоят только на колонках
+самой строки, так что в Postgres (READ COMMITTED) они перепроверяются после
+ожидания блокировки, а в SQLite запись сериализуется BEGIN IMMEDIATE (core.db.write_atomic).
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from core.db import write_atomic
+
+from .models import Booking, DriverAnnouncement
+
+
+def _car_seats(announcement):
+    """Физическая вместимость авто (None - не ограничена)"""
+    car = announcement.car if announcement.car_id else None
+    if car and car.passenger_seats:
+        return car.passenger_seats
+    return None
+
+
+def _capacity(car_seats):
+    if car_seats is None:
+        return F("available_seats")
+    return Least(F("available_seats"), Value(car_seats))
+
+
+def reserve_seats(announcement, seats):
+    """
+    Списать seats мест. False - мест не хватает или объявление уже не активно.
+    Статус становится full в том же UPDATE, если места закончились.
+    """
+    car_seats = _car_seats(announcement)
+    qs = DriverAnnouncement.objects.filter(
+        pk=announcement.pk,
+        status=DriverAnnouncement.Status.ACTIVE,
+        booked_seats__lte=F("available_seats") - seats,
+    )
+    if car_seats is not None:
+        qs = qs.filter(booked_seats__lte=car_seats - seats)
+
+    updated = qs.update(
+        booked_seats=F("booked_seats") + seats,
+        status=Case(
+            When(
+                GreaterThanOrEqual(F("booked_seats") + seats, _capacity(car_seats)),
+                then=Value(DriverAnnouncement.Status.FULL),
+            ),
+            default=Value(DriverAnnouncement.Status.ACTIVE),
+        ),
+        updated_at=timezone.now(),
+    )
+    return bool(updated)
+
+
+def release_seats(announcement, seats):
+    """Вернуть seats мест; full снова становится active. False - счётчик меньше seats."""
+    updated = DriverAnnouncement.objects.filter(
+        pk=announcement.pk,
+        booked_seats__gte=seats,
+    ).update(
+        booked_seats=F("booked_seats") - seats,
+        status=Case(
+            When(status=DriverAnnouncement.Status.FULL, then=Value(DriverAnnouncement.Status.ACTIVE)),
+            default=F("status"),
+        ),
+        updated_at=timezone.now(),
+    )
+    return bool(updated)
+
+
+def _move_booking(booking, from_statuses, to_status, **changes):
+    """Условный переход статуса брони: UPDATE ... WHERE status IN from_statuses"""
+    changes.update(status=to_status, updated_at=timezone.now())
+    updated = Booking.objects.filter(pk=booking.pk, status__in=from_statuses).update(**changes)
+    if updated:
+        for field, value in changes.items():
+            setattr(booking, field, value)
+    return bool(updated)
+
+
+def _refresh_announcement(announcement):
+    announcement.refresh_from_db(fields=["booked_seats", "status", "updated_at"])
+
+
+def confirm_booking(booking):
+    """
+    pending → confirmed со списанием мест.
+    Возвращает None при успехе, иначе текст ошибки для ответа API.
+    """
+    announcement = booking.announcement
+    with write_atomic():
+        if not reserve_seats(announcement, booking.seats_count):
+            return "Недостаточно свободных мест."
+        if not _move_booking(booking, [Booking.Status.PENDING], Booking.Status.CONFIRMED):
+            # заявку успели обработать параллельно - места не списываем
+            transaction.set_rollback(True)
+            return "Это бронирование уже обработано."
+    _refresh_announcement(announcement)
+    return None
+
+
+def reject_booking(booking, comment=""):
+    return _move_booking(
+        booking, [Booking.Status.PENDING], Booking.Status.REJECTED, driver_comment=comment
+    )
+
+
+def cancel_booking(booking):
+    """Отмена пассажиром: подтверждённая бронь возвращает места. False - отменять уже нечего."""
+    with write_atomic():
+        if _move_booking(booking, [Booking.Status.CONFIRMED], Booking.Status.CANCELLED):
+            release_seats(booking.announcement, booking.seats_count)
+            cancelled = True
+        else:
+            cancelled = _move_booking(booking, [Booking.Status.PENDING], Booking.Status.CANCELLED)
+    if cancelled:
+        _refresh_announcement(booking.announcement)
+    return cancelled
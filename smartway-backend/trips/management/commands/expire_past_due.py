@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trips.expiry import DEFAULT_BATCH_SIZE, expire_past_due
+
+
+class Command(BaseCommand):
+    help = "Просрочить прошедшие заказы и объявления, отменить их необработанные заявки (cron или --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Работать постоянно")
+        parser.add_argument("--interval", type=float, default=60.0, help="Пауза между проходами в режиме --loop (сек)")
+
+    def handle(self, *args, **options):
+        while True:
+            trips, announcements = expire_past_due(batch_size=options["batch_size"])
+            if trips or announcements or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Expired trips: {trips}, announcements: {announcements}"
+                ))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
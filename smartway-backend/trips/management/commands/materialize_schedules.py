@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trips.schedules import DEFAULT_BATCH_SIZE, DEFAULT_DAYS_AHEAD, materialize_schedules
+
+
+class Command(BaseCommand):
+    help = "Создать объявления по регулярным расписаниям водителей на N дней вперёд (cron или --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=DEFAULT_DAYS_AHEAD)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Работать постоянно")
+        parser.add_argument("--interval", type=float, default=3600.0, help="Пауза между проходами в режиме --loop (сек)")
+
+    def handle(self, *args, **options):
+        while True:
+            created = materialize_schedules(days=options["days"], batch_size=options["batch_size"])
+            if created or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"Created announcements: {created}"))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
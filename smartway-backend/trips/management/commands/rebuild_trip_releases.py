@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from trips.releases import rebuild_trip_releases
+
+
+class Command(BaseCommand):
+    help = "Пересчитать TripRelease (время открытия заказов по тарифам) для всех открытых заказов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = rebuild_trip_releases(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt: {created}"))
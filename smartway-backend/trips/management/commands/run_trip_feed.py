@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from trips.feed import broadcast, purge_withdrawals, settled_now
+
+
+class Command(BaseCommand):
+    help = "Рассылка ленты заказов водителям по WebSocket (ws/trips/feed/)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=1.0, help="Период опроса TripRelease (сек)")
+
+    def handle(self, *args, **options):
+        channel_layer = get_channel_layer()
+        cursor = settled_now()
+        last_purge = timezone.now()
+
+        while True:
+            until = settled_now()
+            broadcast(channel_layer, cursor, until)
+            cursor = until
+
+            if timezone.now() - last_purge > timedelta(hours=1):
+                purge_withdrawals()
+                last_purge = timezone.now()
+
+            time.sleep(options["interval"])
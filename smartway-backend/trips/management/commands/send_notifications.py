@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trips.outbox import DEFAULT_BATCH_SIZE, deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Воркер очереди Telegram-уведомлений (NotificationOutbox)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--interval", type=float, default=2.0, help="Пауза, когда очередь пуста (сек)")
+        parser.add_argument("--once", action="store_true", help="Обработать одну пачку и выйти")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+
+        while True:
+            sent, failed = deliver_batch(batch_size)
+            if sent or failed:
+                self.stdout.write(f"Sent: {sent}, failed: {failed}")
+            if options["once"]:
+                break
+            if not sent:
+                time.sleep(interval)
@@ -0,0 +1,170 @@
+# trips/matching.py
+"""
+Подбор пар заказ пассажира ↔ объявление водителя.
+
+Кандидаты выбираются по индексам (маршрут с остановками, окно времени,
+места, обязательные условия поездки), ранжирование - один проход по
+кортежам values_list без создания моделей. Ничего не считается заранее:
+создание заказов/объявлений не дорожает, сколько бы их ни было.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import DriverAnnouncement, Trip
+from .releases import visible_trips
+from .search import filter_free_seats, segment_announcement_ids
+
+
+# Окно совпадения по времени отправления (в обе стороны)
+MATCH_WINDOW = timedelta(hours=3)
+# Сколько кандидатов максимум ранжируем за один запрос
+MAX_CANDIDATES = 200
+DEFAULT_MATCH_LIMIT = 20
+MAX_MATCH_LIMIT = 50
+
+# (поле заказа, поле объявления): если пассажиру это нужно - водитель должен разрешать
+REQUIRED_OPTIONS = (
+    ("allow_pets", "allow_pets"),
+    ("allow_smoking", "allow_smoking"),
+    ("with_child", "allow_children"),
+    ("allow_big_luggage", "allow_big_luggage"),
+)
+
+# Веса составляющих оценки (сумма = 1)
+WEIGHT_TIME = 0.6
+WEIGHT_ROUTE = 0.15
+WEIGHT_PRICE = 0.15
+WEIGHT_BAGGAGE = 0.05
+WEIGHT_VERIFIED = 0.05
+
+
+def match_score(time_delta, exact_route, price_ok, baggage_ok, verified_ok):
+    """Оценка пары от 0 до 1: чем ближе время и чем больше пожеланий выполнено, тем выше"""
+    closeness = max(0.0, 1 - abs(time_delta.total_seconds()) / MATCH_WINDOW.total_seconds())
+    return round(
+        WEIGHT_TIME * closeness
+        + WEIGHT_ROUTE * exact_route
+        + WEIGHT_PRICE * price_ok
+        + WEIGHT_BAGGAGE * baggage_ok
+        + WEIGHT_VERIFIED * verified_ok,
+        4,
+    )
+
+
+def _rank(scored, limit):
+    """[(оценка, id)] -> id лучших limit, при равенстве - раньше созданные"""
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:limit]
+
+
+def _closest_rows(qs, target, fields):
+    """
+    До MAX_CANDIDATES строк, ближайших по времени к target: два range scan по
+    departure_time (позже и раньше target) вместо сортировки окна по |разнице|.
+    fields[:2] - id и departure_time.
+    """
+    later = qs.filter(departure_time__gte=target).order_by("departure_time", "id")
+    earlier = qs.filter(departure_time__lt=target).order_by("-departure_time", "-id")
+    rows = [
+        *later.values_list(*fields)[:MAX_CANDIDATES],
+        *earlier.values_list(*fields)[:MAX_CANDIDATES],
+    ]
+    rows.sort(key=lambda row: (abs(row[1] - target), row[0]))
+    return rows[:MAX_CANDIDATES]
+
+
+def announcement_matches(trip, limit=DEFAULT_MATCH_LIMIT, queryset=None):
+    """
+    [(оценка, объявление)] для заказа пассажира, лучшие первыми.
+    queryset - из чего загружать найденные объявления (select/prefetch вызывающего).
+    """
+    now = timezone.now()
+    qs = DriverAnnouncement.objects.filter(
+        status=DriverAnnouncement.Status.ACTIVE,
+        departure_time__gt=max(now, trip.departure_time - MATCH_WINDOW),
+        departure_time__lte=trip.departure_time + MATCH_WINDOW,
+        id__in=segment_announcement_ids([trip.from_location_id], [trip.to_location_id]),
+    ).exclude(driver_id=trip.passenger_id)
+    qs = filter_free_seats(qs, trip.passengers_count)
+    for trip_field, announcement_field in REQUIRED_OPTIONS:
+        if getattr(trip, trip_field):
+            qs = qs.filter(**{announcement_field: True})
+
+    rows = _closest_rows(qs, trip.departure_time, (
+        "id", "departure_time", "from_location_id", "to_location_id",
+        "price_per_seat", "baggage_help", "driver__is_verified_driver",
+    ))
+    scored = [
+        (
+            match_score(
+                departure_time - trip.departure_time,
+                from_id == trip.from_location_id and to_id == trip.to_location_id,
+                trip.price is None or price <= trip.price,
+                not trip.baggage_help or baggage_help,
+                not trip.prefer_verified_driver or verified,
+            ),
+            pk,
+        )
+        for pk, departure_time, from_id, to_id, price, baggage_help, verified in rows
+    ]
+    ranked = _rank(scored, limit)
+    if queryset is None:
+        queryset = DriverAnnouncement.objects.select_related("driver", "car")
+    objects = queryset.in_bulk([pk for _, pk in ranked])
+    return [(score, objects[pk]) for score, pk in ranked if pk in objects]
+
+
+def trip_matches(announcement, user, limit=DEFAULT_MATCH_LIMIT, queryset=None):
+    """
+    [(оценка, заказ)] для объявления водителя, лучшие первыми.
+    Только заказы, уже открытые для уровня подписки водителя (visible_trips).
+    queryset - из чего загружать найденные заказы (аннотации/prefetch вызывающего).
+    """
+    stops = dict(announcement.stops.values_list("location_id", "sequence"))
+    if not stops:
+        stops = {announcement.from_location_id: 0, announcement.to_location_id: 1}
+    free_seats = announcement.free_seats
+    if not free_seats:
+        return []
+
+    qs = visible_trips(user).filter(
+        departure_time__gte=announcement.departure_time - MATCH_WINDOW,
+        departure_time__lte=announcement.departure_time + MATCH_WINDOW,
+        from_location_id__in=list(stops),
+        to_location_id__in=list(stops),
+        passengers_count__lte=free_seats,
+    ).exclude(passenger_id=announcement.driver_id)
+    for trip_field, announcement_field in REQUIRED_OPTIONS:
+        if not getattr(announcement, announcement_field):
+            qs = qs.exclude(**{trip_field: True})
+    # по ходу движения: посадка раньше высадки - в SQL, до отсечения кандидатов
+    qs = qs.alias(
+        from_sequence=Case(*[When(from_location_id=pk, then=Value(seq)) for pk, seq in stops.items()]),
+        to_sequence=Case(*[When(to_location_id=pk, then=Value(seq)) for pk, seq in stops.items()]),
+    ).filter(from_sequence__lt=F("to_sequence"))
+
+    rows = _closest_rows(qs, announcement.departure_time, (
+        "id", "departure_time", "from_location_id", "to_location_id",
+        "price", "baggage_help", "prefer_verified_driver",
+    ))
+    verified = announcement.driver.is_verified_driver
+    scored = [
+        (
+            match_score(
+                departure_time - announcement.departure_time,
+                from_id == announcement.from_location_id and to_id == announcement.to_location_id,
+                price is None or announcement.price_per_seat <= price,
+                not baggage_help or announcement.baggage_help,
+                not prefer_verified or verified,
+            ),
+            pk,
+        )
+        for pk, departure_time, from_id, to_id, price, baggage_help, prefer_verified in rows
+    ]
+    ranked = _rank(scored, limit)
+    if queryset is None:
+        queryset = Trip.objects.select_related("passenger", "driver", "car")
+    objects = queryset.in_bulk([pk for _, pk in ranked])
+    return [(score, objects[pk]) for score, pk in ranked if pk in objects]
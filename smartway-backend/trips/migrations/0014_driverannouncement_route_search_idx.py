@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0001_initial"),
+        ("trips", "0013_alter_booking_unique_together"),
+        ("users", "0009_user_pin_code"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="driverannouncement",
+            index=models.Index(
+                fields=["from_location", "to_location", "status", "departure_time"],
+                name="trips_drive_from_lo_da9a71_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_stops(apps, schema_editor):
+    """Заполнить остановки для уже существующих объявлений из intermediate_stops"""
+    DriverAnnouncement = apps.get_model("trips", "DriverAnnouncement")
+    AnnouncementStop = apps.get_model("trips", "AnnouncementStop")
+    Location = apps.get_model("locations", "Location")
+
+    known_ids = set(Location.objects.values_list("id", flat=True))
+    batch = []
+    announcements = DriverAnnouncement.objects.only(
+        "id", "from_location_id", "to_location_id", "departure_time", "intermediate_stops"
+    )
+    for ann in announcements.iterator(chunk_size=500):
+        location_ids = [ann.from_location_id]
+        for stop_id in ann.intermediate_stops or []:
+            try:
+                stop_id = int(stop_id)
+            except (TypeError, ValueError):
+                continue
+            if (
+                stop_id in known_ids
+                and stop_id not in location_ids
+                and stop_id != ann.to_location_id
+            ):
+                location_ids.append(stop_id)
+        location_ids.append(ann.to_location_id)
+
+        for sequence, location_id in enumerate(location_ids):
+            batch.append(AnnouncementStop(
+                announcement_id=ann.id,
+                location_id=location_id,
+                sequence=sequence,
+                planned_time=ann.departure_time if sequence == 0 else None,
+            ))
+        if len(batch) >= 1000:
+            AnnouncementStop.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        AnnouncementStop.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0001_initial"),
+        ("trips", "0014_driverannouncement_route_search_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnnouncementStop",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sequence", models.PositiveSmallIntegerField()),
+                ("planned_time", models.DateTimeField(blank=True, null=True)),
+                (
+                    "announcement",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stops",
+                        to="trips.driverannouncement",
+                    ),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="announcement_stops",
+                        to="locations.location",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Остановка объявления",
+                "verbose_name_plural": "Остановки объявлений",
+                "ordering": ["announcement", "sequence"],
+                "indexes": [
+                    models.Index(
+                        fields=["location", "announcement", "sequence"],
+                        name="trips_annou_locatio_1db48e_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("announcement", "sequence"),
+                        name="announcement_stop_unique_sequence",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_stops, migrations.RunPython.noop),
+    ]
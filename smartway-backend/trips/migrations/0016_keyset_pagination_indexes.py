@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0001_initial"),
+        ("trips", "0015_announcementstop"),
+        ("users", "0009_user_pin_code"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["passenger", "created_at", "id"],
+                name="trips_booki_passeng_3d32e4_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["announcement", "created_at", "id"],
+                name="trips_booki_announc_1cfd39_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="driverannouncement",
+            index=models.Index(
+                fields=["driver", "created_at", "id"],
+                name="trips_drive_driver__bc31c4_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["status", "departure_time", "id"],
+                name="trips_trip_status_086a88_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["passenger", "created_at", "id"],
+                name="trips_trip_passeng_6a8ac6_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["driver", "created_at", "id"],
+                name="trips_trip_driver__e90e80_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:04
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_releases(apps, schema_editor):
+    """Посчитать TripRelease для уже открытых заказов (бесплатный уровень + все тарифы)"""
+    Trip = apps.get_model("trips", "Trip")
+    TripRelease = apps.get_model("trips", "TripRelease")
+    SubscriptionPlan = apps.get_model("billing", "SubscriptionPlan")
+
+    delays = {0: 0}
+    delays.update(SubscriptionPlan.objects.values_list("id", "view_delay_seconds"))
+    batch = []
+    trips = Trip.objects.filter(status="open").values_list("id", "created_at", "departure_time")
+    for trip_id, created_at, departure_time in trips.iterator(chunk_size=500):
+        for tier, delay in delays.items():
+            batch.append(TripRelease(
+                trip_id=trip_id,
+                tier=tier,
+                visible_from=created_at + timedelta(seconds=delay),
+                departure_time=departure_time,
+            ))
+        if len(batch) >= 1000:
+            TripRelease.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        TripRelease.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0003_subscriptionplan_remove_subscription_tariff_and_more"),
+        ("trips", "0017_notificationoutbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TripRelease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tier", models.PositiveIntegerField()),
+                ("visible_from", models.DateTimeField()),
+                ("departure_time", models.DateTimeField()),
+                (
+                    "trip",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="releases",
+                        to="trips.trip",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Открытие заказа для тарифа",
+                "verbose_name_plural": "Открытие заказов для тарифов",
+                "indexes": [
+                    models.Index(
+                        fields=["tier", "visible_from", "departure_time"],
+                        name="trip_release_feed_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("trip", "tier"), name="unique_trip_release_tier"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_releases, migrations.RunPython.noop),
+    ]
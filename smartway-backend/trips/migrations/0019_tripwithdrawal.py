@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trips", "0018_triprelease"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TripWithdrawal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trip_id", models.BigIntegerField()),
+                (
+                    "withdrawn_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Снятие заказа с ленты",
+                "verbose_name_plural": "Снятия заказов с ленты",
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0001_initial"),
+        ("trips", "0019_tripwithdrawal"),
+        ("users", "0011_otpcode"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="driverannouncement",
+            index=models.Index(
+                fields=["status", "departure_time", "id"],
+                name="trips_drive_status_d726f2_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.db import migrations
+
+# billing.utils.DEFAULT_VIEW_DELAY на момент миграции
+FREE_TIER_VIEW_DELAY = 120
+
+
+def shift_free_tier_releases(apps, schema_editor):
+    """Бесплатный уровень теперь видит заказ через DEFAULT_VIEW_DELAY, а не сразу"""
+    TripRelease = apps.get_model("trips", "TripRelease")
+
+    batch = []
+    releases = TripRelease.objects.filter(tier=0).select_related("trip")
+    for release in releases.iterator(chunk_size=500):
+        release.visible_from = release.trip.created_at + timedelta(seconds=FREE_TIER_VIEW_DELAY)
+        batch.append(release)
+        if len(batch) >= 500:
+            TripRelease.objects.bulk_update(batch, ["visible_from"])
+            batch = []
+    if batch:
+        TripRelease.objects.bulk_update(batch, ["visible_from"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trips", "0020_announcement_expiry_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(shift_free_tier_releases, migrations.RunPython.noop),
+    ]
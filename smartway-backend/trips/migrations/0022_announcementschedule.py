@@ -0,0 +1,160 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0001_initial"),
+        ("trips", "0021_free_tier_view_delay"),
+        ("users", "0011_otpcode"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="driverannouncement",
+            name="schedule_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="AnnouncementSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "intermediate_stops",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Список ID промежуточных локаций",
+                    ),
+                ),
+                ("weekdays", models.JSONField(default=list)),
+                ("departure_time", models.TimeField()),
+                ("time_zone", models.CharField(default="Asia/Bishkek", max_length=64)),
+                ("available_seats", models.PositiveIntegerField(default=4)),
+                (
+                    "price_per_seat",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                ("is_negotiable", models.BooleanField(default=False)),
+                ("contact_phone", models.CharField(blank=True, max_length=32)),
+                ("comment", models.TextField(blank=True, default="")),
+                (
+                    "allow_smoking",
+                    models.BooleanField(default=False, verbose_name="Можно курить"),
+                ),
+                (
+                    "allow_pets",
+                    models.BooleanField(
+                        default=False, verbose_name="Можно с животными"
+                    ),
+                ),
+                (
+                    "allow_big_luggage",
+                    models.BooleanField(
+                        default=True, verbose_name="Большой багаж разрешён"
+                    ),
+                ),
+                (
+                    "baggage_help",
+                    models.BooleanField(default=False, verbose_name="Помогу с багажом"),
+                ),
+                (
+                    "allow_children",
+                    models.BooleanField(default=True, verbose_name="Можно с детьми"),
+                ),
+                (
+                    "has_air_conditioning",
+                    models.BooleanField(default=True, verbose_name="Кондиционер"),
+                ),
+                (
+                    "extra_rules",
+                    models.TextField(
+                        blank=True, default="", verbose_name="Дополнительные условия"
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("generated_until", models.DateField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "car",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="announcement_schedules",
+                        to="users.car",
+                    ),
+                ),
+                (
+                    "driver",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="announcement_schedules",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "from_location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="schedules_from",
+                        to="locations.location",
+                        verbose_name="Откуда",
+                    ),
+                ),
+                (
+                    "to_location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="schedules_to",
+                        to="locations.location",
+                        verbose_name="Куда",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Расписание водителя",
+                "verbose_name_plural": "Расписания водителей",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="driverannouncement",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="announcements",
+                to="trips.announcementschedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="driverannouncement",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "schedule_date"),
+                name="announcement_unique_schedule_date",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="announcementschedule",
+            index=models.Index(
+                fields=["is_active", "generated_until", "id"],
+                name="trips_annou_is_acti_d05cbf_idx",
+            ),
+        ),
+    ]
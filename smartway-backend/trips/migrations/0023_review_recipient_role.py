@@ -0,0 +1,78 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:46
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_recipient_role(apps, schema_editor):
+    """Роль получателя по поездке: водитель заказа/объявления - driver, иначе passenger"""
+    Review = apps.get_model("trips", "Review")
+    rows = Review.objects.values_list(
+        "id", "recipient_id", "trip_id", "trip__driver_id",
+        "booking_id", "booking__announcement__driver_id", "author__is_driver",
+    )
+    batch = []
+    for pk, recipient_id, trip_id, trip_driver_id, booking_id, booking_driver_id, author_is_driver in rows.iterator():
+        if trip_id:
+            role = "driver" if recipient_id == trip_driver_id else "passenger"
+        elif booking_id:
+            role = "driver" if recipient_id == booking_driver_id else "passenger"
+        else:
+            role = "passenger" if author_is_driver else "driver"
+        batch.append(Review(id=pk, recipient_role=role))
+        if len(batch) >= 1000:
+            Review.objects.bulk_update(batch, ["recipient_role"])
+            batch = []
+    if batch:
+        Review.objects.bulk_update(batch, ["recipient_role"])
+
+
+def rebuild_rating_stats(apps, schema_editor):
+    """
+    Статистика из 0010 разложена по роли автора; пересчитываем по recipient_role
+    (как rebuild_rating_stats), иначе правка/удаление старого отзыва уменьшит
+    не тот счётчик
+    """
+    Review = apps.get_model("trips", "Review")
+    UserRatingStats = apps.get_model("users", "UserRatingStats")
+
+    histogram = {
+        f"rating_{rating}": Count("id", filter=Q(rating=rating)) for rating in range(1, 6)
+    }
+    rows = (
+        Review.objects.values("recipient_id", "recipient_role")
+        .annotate(reviews_count=Count("id"), rating_sum=Sum("rating"), **histogram)
+        .order_by()
+    )
+    UserRatingStats.objects.all().delete()
+    UserRatingStats.objects.bulk_create(
+        [
+            UserRatingStats(
+                user_id=row["recipient_id"],
+                role=row["recipient_role"],
+                reviews_count=row["reviews_count"],
+                rating_sum=row["rating_sum"] or 0,
+                **{field: row[field] for field in histogram},
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trips", "0022_announcementschedule"),
+        ("users", "0010_userratingstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="recipient_role",
+            field=models.CharField(blank=True, default="", max_length=10),
+        ),
+        migrations.RunPython(fill_recipient_role, migrations.RunPython.noop),
+        migrations.RunPython(rebuild_rating_stats, migrations.RunPython.noop),
+    ]
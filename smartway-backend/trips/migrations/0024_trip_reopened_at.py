@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trips", "0023_review_recipient_role"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="reopened_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
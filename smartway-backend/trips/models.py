@@ -4,6 +4,8 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from core.db import write_atomic
+
 
 class Trip(models.Model):
     """Заказ от пассажира - пассажир создаёт, водитель забирает"""
@@ -85,6 +87,9 @@ class Trip(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Когда заказ снова вернулся в ленту (release); от него, а не от created_at,
+    # отсчитывается задержка тарифа в TripRelease. Пусто - не возвращался
+    reopened_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
@@ -94,6 +99,10 @@ class Trip(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['from_location', 'to_location']),
             models.Index(fields=['departure_time']),
+            # Keyset-пагинация списков (trips/pagination.py)
+            models.Index(fields=['status', 'departure_time', 'id']),
+            models.Index(fields=['passenger', 'created_at', 'id']),
+            models.Index(fields=['driver', 'created_at', 'id']),
         ]
 
     def __str__(self):
@@ -104,6 +113,92 @@ class Trip(models.Model):
             if self.from_location_id == self.to_location_id:
                 raise ValidationError("Точка отправления и назначения должны отличаться")
 
+    # === Переходы статуса: один условный UPDATE, без гонки "прочитал - проверил - сохранил" ===
+
+    ACTIVE_STATUSES = (Status.TAKEN, Status.IN_PROGRESS)
+    FINAL_STATUSES = (Status.COMPLETED, Status.CANCELLED)
+
+    def _transition(self, queryset, **changes):
+        """
+        UPDATE trips_trip SET ... WHERE id = self.id AND <условия queryset>.
+        True - переход состоялся (и экземпляр обновлён), False - условие уже не выполняется.
+        """
+        from .releases import sync_trip_releases
+
+        changes["updated_at"] = timezone.now()
+        # переход и строки ленты - одной транзакцией
+        with write_atomic():
+            if not queryset.filter(pk=self.pk).update(**changes):
+                return False
+            for field, value in changes.items():
+                setattr(self, field, value)
+            # update() не шлёт post_save - ленту водителей синхронизируем сами
+            sync_trip_releases(self)
+        return True
+
+    def take(self, driver, car=None) -> bool:
+        """Водитель берёт заказ; из двух одновременных запросов побеждает ровно один"""
+        return self._transition(
+            Trip.objects.filter(status=Trip.Status.OPEN),
+            driver=driver,
+            car=car if car is not None else self.car,
+            status=Trip.Status.TAKEN,
+        )
+
+    def release(self, driver) -> bool:
+        """Водитель возвращает заказ в ленту"""
+        return self._transition(
+            Trip.objects.filter(driver=driver, status__in=self.ACTIVE_STATUSES),
+            driver=None,
+            car=None,
+            status=Trip.Status.OPEN,
+            reopened_at=timezone.now(),
+        )
+
+    def finish(self, driver) -> bool:
+        return self._transition(
+            Trip.objects.filter(driver=driver, status__in=self.ACTIVE_STATUSES),
+            status=Trip.Status.COMPLETED,
+        )
+
+    def cancel(self) -> bool:
+        return self._transition(
+            Trip.objects.exclude(status__in=self.FINAL_STATUSES),
+            status=Trip.Status.CANCELLED,
+        )
+
+
+class TripRelease(models.Model):
+    """
+    Момент, с которого открытый заказ виден водителям тарифа (tier).
+    Считается при создании заказа и при его возврате в ленту (trips/releases.py),
+    хранится только пока заказ открыт.
+    """
+    FREE_TIER = 0  # водители без подписки; иначе tier = id SubscriptionPlan
+
+    trip = models.ForeignKey(
+        Trip,
+        on_delete=models.CASCADE,
+        related_name="releases",
+    )
+    tier = models.PositiveIntegerField()
+    visible_from = models.DateTimeField()
+    # копия Trip.departure_time, чтобы лента читалась одним индексом
+    departure_time = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Открытие заказа для тарифа"
+        verbose_name_plural = "Открытие заказов для тарифов"
+        constraints = [
+            models.UniqueConstraint(fields=["trip", "tier"], name="unique_trip_release_tier"),
+        ]
+        indexes = [
+            models.Index(fields=["tier", "visible_from", "departure_time"], name="trip_release_feed_idx"),
+        ]
+
+    def __str__(self):
+        return f"Заказ #{self.trip_id}, tier {self.tier} с {self.visible_from:%d.%m %H:%M}"
+
 
 class DriverAnnouncement(models.Model):
     """Объявление от водителя - водитель создаёт, пассажиры обращаются"""
@@ -177,6 +272,15 @@ class DriverAnnouncement(models.Model):
         help_text="Список ID промежуточных локаций"
     )
 
+    # Объявление, созданное по расписанию (trips/schedules.py): одно на (расписание, дату)
+    schedule = models.ForeignKey(
+        'AnnouncementSchedule',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="announcements",
+    )
+    schedule_date = models.DateField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -188,6 +292,17 @@ class DriverAnnouncement(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['from_location', 'to_location']),
             models.Index(fields=['departure_time']),
+            # Поиск по маршруту: /api/announcements/available/?from=..&to=..
+            models.Index(fields=['from_location', 'to_location', 'status', 'departure_time']),
+            models.Index(fields=['driver', 'created_at', 'id']),
+            # Просрочка прошедших объявлений (trips/expiry.py)
+            models.Index(fields=['status', 'departure_time', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['schedule', 'schedule_date'],
+                name='announcement_unique_schedule_date',
+            ),
         ]
 
     def __str__(self):
@@ -208,6 +323,170 @@ class DriverAnnouncement(models.Model):
             if self.from_location_id == self.to_location_id:
                 raise ValidationError("Точка отправления и назначения должны отличаться")
 
+    def sync_stops(self, planned_times=None):
+        """
+        Пересобрать таблицу остановок: откуда → intermediate_stops → куда.
+        planned_times - необязательный словарь {location_id: datetime};
+        если не передан, сохраняем время из текущих остановок.
+        """
+        if planned_times is None:
+            planned_times = dict(self.stops.values_list("location_id", "planned_time"))
+        stops = self.build_stops(planned_times)
+        self.stops.all().delete()
+        AnnouncementStop.objects.bulk_create(stops)
+        return stops
+
+    def build_stops(self, planned_times=None):
+        """Несохранённые строки AnnouncementStop для маршрута объявления"""
+        planned_times = planned_times or {}
+        location_ids = [self.from_location_id]
+        for stop_id in self.intermediate_stops or []:
+            try:
+                stop_id = int(stop_id)
+            except (TypeError, ValueError):
+                continue
+            if stop_id not in location_ids and stop_id != self.to_location_id:
+                location_ids.append(stop_id)
+        location_ids.append(self.to_location_id)
+
+        stops = []
+        for sequence, location_id in enumerate(location_ids):
+            planned_time = planned_times.get(location_id)
+            if sequence == 0:
+                planned_time = self.departure_time
+            stops.append(AnnouncementStop(
+                announcement=self,
+                location_id=location_id,
+                sequence=sequence,
+                planned_time=planned_time,
+            ))
+        return stops
+
+
+class AnnouncementStop(models.Model):
+    """
+    Остановка на маршруте объявления в порядке следования.
+    sequence=0 - точка отправления, последняя - точка назначения.
+    Нужна для поиска попутных объявлений по участку маршрута.
+    """
+    announcement = models.ForeignKey(
+        DriverAnnouncement,
+        on_delete=models.CASCADE,
+        related_name="stops",
+    )
+    location = models.ForeignKey(
+        'locations.Location',
+        on_delete=models.PROTECT,
+        related_name="announcement_stops",
+    )
+    sequence = models.PositiveSmallIntegerField()
+    planned_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['announcement', 'sequence']
+        verbose_name = "Остановка объявления"
+        verbose_name_plural = "Остановки объявлений"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['announcement', 'sequence'],
+                name='announcement_stop_unique_sequence',
+            ),
+        ]
+        indexes = [
+            # Поиск по участку: location → announcement → sequence
+            models.Index(fields=['location', 'announcement', 'sequence']),
+        ]
+
+    def __str__(self):
+        return f"{self.announcement_id}#{self.sequence}: {self.location_id}"
+
+
+class AnnouncementSchedule(models.Model):
+    """
+    Шаблон регулярного рейса водителя (например, Бишкек → Ош каждый будний день в 07:00).
+    По нему trips/schedules.py создаёт объявления на ближайшие дни.
+    Изменения шаблона действуют на ещё не созданные даты.
+    """
+    driver = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="announcement_schedules",
+    )
+    car = models.ForeignKey(
+        'users.Car',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="announcement_schedules",
+    )
+    from_location = models.ForeignKey(
+        'locations.Location',
+        on_delete=models.PROTECT,
+        related_name="schedules_from",
+        verbose_name="Откуда",
+    )
+    to_location = models.ForeignKey(
+        'locations.Location',
+        on_delete=models.PROTECT,
+        related_name="schedules_to",
+        verbose_name="Куда",
+    )
+    intermediate_stops = models.JSONField(
+        blank=True,
+        default=list,
+        help_text="Список ID промежуточных локаций",
+    )
+
+    # Дни недели: 0 - понедельник ... 6 - воскресенье
+    weekdays = models.JSONField(default=list)
+    departure_time = models.TimeField()
+    time_zone = models.CharField(max_length=64, default="Asia/Bishkek")
+
+    available_seats = models.PositiveIntegerField(default=4)
+    price_per_seat = models.DecimalField(max_digits=10, decimal_places=2)
+    is_negotiable = models.BooleanField(default=False)
+    contact_phone = models.CharField(max_length=32, blank=True)
+    comment = models.TextField(blank=True, default="")
+
+    allow_smoking = models.BooleanField(default=False, verbose_name="Можно курить")
+    allow_pets = models.BooleanField(default=False, verbose_name="Можно с животными")
+    allow_big_luggage = models.BooleanField(default=True, verbose_name="Большой багаж разрешён")
+    baggage_help = models.BooleanField(default=False, verbose_name="Помогу с багажом")
+    allow_children = models.BooleanField(default=True, verbose_name="Можно с детьми")
+    has_air_conditioning = models.BooleanField(default=True, verbose_name="Кондиционер")
+    extra_rules = models.TextField(blank=True, default="", verbose_name="Дополнительные условия")
+
+    is_active = models.BooleanField(default=True)
+    # До какой даты (включительно) объявления уже созданы
+    generated_until = models.DateField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Поля, которые копируются в DriverAnnouncement как есть
+    ANNOUNCEMENT_FIELDS = (
+        "driver_id", "car_id", "from_location_id", "to_location_id", "intermediate_stops",
+        "available_seats", "price_per_seat", "is_negotiable", "contact_phone", "comment",
+        "allow_smoking", "allow_pets", "allow_big_luggage", "baggage_help",
+        "allow_children", "has_air_conditioning", "extra_rules",
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Расписание водителя"
+        verbose_name_plural = "Расписания водителей"
+        indexes = [
+            # Генератор: активные шаблоны, у которых горизонт ещё не заполнен
+            models.Index(fields=['is_active', 'generated_until', 'id']),
+        ]
+
+    def __str__(self):
+        return f"[Расписание #{self.id}] {self.from_location} → {self.to_location} {self.departure_time:%H:%M}"
+
+    def clean(self):
+        if self.from_location_id and self.to_location_id:
+            if self.from_location_id == self.to_location_id:
+                raise ValidationError("Точка отправления и назначения должны отличаться")
+
 
 class Booking(models.Model):
     """Бронирование места в объявлении водителя"""
@@ -250,6 +529,10 @@ class Booking(models.Model):
         # unique_together = ('announcement', 'passenger')
         verbose_name = "Бронирование"
         verbose_name_plural = "Бронирования"
+        indexes = [
+            models.Index(fields=['passenger', 'created_at', 'id']),
+            models.Index(fields=['announcement', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Бронь {self.passenger} на {self.announcement}"
@@ -285,6 +568,10 @@ class Review(models.Model):
     
     rating = models.PositiveSmallIntegerField()  # 1-5
     text = models.TextField(blank=True, default="")
+
+    # Роль получателя в этой поездке (UserRatingStats.Role) - в её статистике учтена оценка.
+    # Фиксируется при создании: флаг is_driver пользователя потом может смениться
+    recipient_role = models.CharField(max_length=10, blank=True, default="")
     
     was_on_time = models.BooleanField(null=True, blank=True)
     was_polite = models.BooleanField(null=True, blank=True)
@@ -299,4 +586,74 @@ class Review(models.Model):
         verbose_name_plural = "Отзывы"
 
     def __str__(self):
-        return f"Отзыв от {self.author} для {self.recipient} ({self.rating}★)"
\ No newline at end of file
+        return f"Отзыв от {self.author} для {self.recipient} ({self.rating}★)"
+
+    def detect_recipient_role(self):
+        """driver, если получатель - водитель поездки (заказа или объявления), иначе passenger"""
+        if self.trip_id:
+            driver_id = self.trip.driver_id
+        elif self.booking_id:
+            driver_id = self.booking.announcement.driver_id
+        else:
+            # отзыв без поездки: как раньше, по роли автора
+            return "passenger" if self.author.is_driver else "driver"
+        return "driver" if self.recipient_id == driver_id else "passenger"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Очередь исходящих Telegram-сообщений.
+    Пишется в той же транзакции, что и смена статуса; отправляет воркер
+    (manage.py send_notifications), поэтому API не ждёт Telegram.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает отправки"
+        SENT = "sent", "Отправлено"
+        FAILED = "failed", "Не доставлено"
+
+    chat_id = models.BigIntegerField()
+    text = models.TextField()
+    reply_markup = models.JSONField(null=True, blank=True)
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Исходящее уведомление"
+        verbose_name_plural = "Исходящие уведомления"
+        indexes = [
+            # выборка воркера: pending, срок подошёл
+            models.Index(fields=["status", "next_attempt_at", "id"], name="outbox_due_idx"),
+            # порядок в пределах чата: есть ли более раннее pending-сообщение
+            models.Index(fields=["chat_id", "status", "id"], name="outbox_chat_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} → {self.chat_id} ({self.status})"
+
+
+class TripWithdrawal(models.Model):
+    """
+    Журнал снятых с ленты заказов (взят, отменён, удалён).
+    По нему лента водителей (trips/feed.py) досылает пропущенные события при переподключении.
+    """
+    trip_id = models.BigIntegerField()  # без FK: запись переживает удаление заказа
+    withdrawn_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Снятие заказа с ленты"
+        verbose_name_plural = "Снятия заказов с ленты"
+
+    def __str__(self):
+        return f"Заказ #{self.trip_id} снят {self.withdrawn_at:%d.%m %H:%M}"
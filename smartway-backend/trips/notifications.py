@@ -1,7 +1,7 @@
 import logging
 from django.utils import timezone
 
-from users.telegram_utils import send_telegram_message
+from .outbox import enqueue_telegram_message, enqueue_telegram_messages
 
 
 logger = logging.getLogger(__name__)
@@ -33,7 +33,7 @@ def send_trip_taken_notification(trip):
         f"Водитель: {driver.full_name or driver.phone_number}\n"
         f"Телефон: {driver.phone_number}"
     )
-    send_telegram_message(passenger_chat, text)
+    enqueue_telegram_message(passenger_chat, text)
 
 
 def send_booking_created_notification(booking):
@@ -52,16 +52,16 @@ def send_booking_created_notification(booking):
         f"Мест: {booking.seats_count}\n"
         f"Телефон: {booking.contact_phone or booking.passenger.phone_number}"
     )
-    send_telegram_message(driver_chat, text)
+    enqueue_telegram_message(driver_chat, text)
 
-def send_booking_status_notification(booking):
-    """Уведомить пассажира об изменении статуса его бронирования"""
+def _booking_status_message(booking):
+    """(chat_id, текст) для пассажира об изменении статуса брони или None"""
     passenger_chat = getattr(booking.passenger, "telegram_chat_id", None)
     announcement = booking.announcement
     driver = announcement.driver
 
     if not passenger_chat:
-        return
+        return None
 
     route = _route_label(announcement.from_location, announcement.to_location)
     time_label = _format_time(announcement.departure_time)
@@ -83,8 +83,20 @@ def send_booking_status_notification(booking):
         f"Водитель: {driver_label}\n"
         f"Телефон водителя: {driver_phone}"
     )
+    return passenger_chat, text
+
+
+def send_booking_status_notification(booking):
+    """Уведомить пассажира об изменении статуса его бронирования"""
+    message = _booking_status_message(booking)
+    if message:
+        enqueue_telegram_message(*message)
+
+
+def send_booking_status_notifications(bookings):
+    """То же для пачки броней - одной вставкой в очередь"""
+    enqueue_telegram_messages(filter(None, map(_booking_status_message, bookings)))
 
-    send_telegram_message(passenger_chat, text)
 
 def send_trip_completed_notification(trip):
     """Уведомить участников о завершении поездки и напомнить оставить отзыв"""
@@ -97,7 +109,7 @@ def send_trip_completed_notification(trip):
             f"{route} ({time_label})\n"
             "Пожалуйста, оцените водителя и поездку в приложении."
         )
-        send_telegram_message(trip.passenger.telegram_chat_id, passenger_text)
+        enqueue_telegram_message(trip.passenger.telegram_chat_id, passenger_text)
 
     if trip.driver and getattr(trip.driver, "telegram_chat_id", None):
         driver_text = (
@@ -105,14 +117,15 @@ def send_trip_completed_notification(trip):
             f"{route} ({time_label})\n"
             "Не забудьте оценить пассажира."
         )
-        send_telegram_message(trip.driver.telegram_chat_id, driver_text)
+        enqueue_telegram_message(trip.driver.telegram_chat_id, driver_text)
 
 
-def send_booking_completed_notification(booking, *, notify_driver=True, notify_passenger=True):
-    """Уведомить водителя и пассажира о завершении бронирования и просьбе оценить друг друга"""
+def _booking_completed_messages(booking, *, notify_driver=True, notify_passenger=True):
+    """Пары (chat_id, текст) о завершении бронирования для водителя и/или пассажира"""
     announcement = booking.announcement
     route = _route_label(announcement.from_location, announcement.to_location)
     time_label = _format_time(announcement.departure_time)
+    messages = []
 
     if notify_passenger and getattr(booking.passenger, "telegram_chat_id", None):
         passenger_text = (
@@ -120,7 +133,7 @@ def send_booking_completed_notification(booking, *, notify_driver=True, notify_p
             f"{route} ({time_label})\n"
             "Пожалуйста, оцените водителя."
         )
-        send_telegram_message(booking.passenger.telegram_chat_id, passenger_text)
+        messages.append((booking.passenger.telegram_chat_id, passenger_text))
 
     if notify_driver and getattr(announcement.driver, "telegram_chat_id", None):
         driver_text = (
@@ -128,4 +141,22 @@ def send_booking_completed_notification(booking, *, notify_driver=True, notify_p
             f"{route} ({time_label})\n"
             "Не забудьте оценить пассажира."
         )
-        send_telegram_message(announcement.driver.telegram_chat_id, driver_text)
\ No newline at end of file
+        messages.append((announcement.driver.telegram_chat_id, driver_text))
+
+    return messages
+
+
+def send_booking_completed_notification(booking, *, notify_driver=True, notify_passenger=True):
+    """Уведомить водителя и пассажира о завершении бронирования и просьбе оценить друг друга"""
+    for chat_id, text in _booking_completed_messages(
+        booking, notify_driver=notify_driver, notify_passenger=notify_passenger
+    ):
+        enqueue_telegram_message(chat_id, text)
+
+
+def send_announcement_completed_notifications(bookings):
+    """Завершение объявления: всем пассажирам и один раз водителю - одной вставкой в очередь"""
+    messages = []
+    for index, booking in enumerate(bookings):
+        messages.extend(_booking_completed_messages(booking, notify_driver=(index == 0)))
+    enqueue_telegram_messages(messages)
@@ -0,0 +1,134 @@
+# trips/outbox.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from users.telegram_utils import TELEGRAM_TIMEOUT_SECONDS, post_telegram_message
+from .models import NotificationOutbox
+
+
+MAX_ATTEMPTS = 8
+# Задержка перед повтором: 30с, 1м, 2м, 4м ... но не больше часа
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+DEFAULT_BATCH_SIZE = 50
+# Запас аренды сверх худшего времени отправки пачки, сек
+CLAIM_LEASE_MARGIN_SECONDS = 60
+# 429 - лимит запросов, повторяем; прочие 4xx (бот заблокирован, чат не найден,
+# неверная разметка) повтор не исправит
+TOO_MANY_REQUESTS = 429
+
+
+def is_permanent_error(status):
+    return status is not None and 400 <= status < 500 and status != TOO_MANY_REQUESTS
+
+
+def claim_lease(batch_size):
+    """
+    Сколько сообщение остаётся за воркером, взявшим его в работу: пачка
+    отправляется по одному сообщению, каждое - до TELEGRAM_TIMEOUT_SECONDS.
+    Аренда не должна истечь раньше, чем воркер дойдёт до последнего.
+    """
+    return timedelta(seconds=batch_size * TELEGRAM_TIMEOUT_SECONDS + CLAIM_LEASE_MARGIN_SECONDS)
+
+
+def enqueue_telegram_message(chat_id, text, reply_markup=None):
+    """Поставить сообщение в очередь (в текущей транзакции вызывающего кода)"""
+    if not chat_id:
+        return None
+    return NotificationOutbox.objects.create(
+        chat_id=chat_id,
+        text=text,
+        reply_markup=reply_markup,
+    )
+
+
+def enqueue_telegram_messages(messages):
+    """Поставить в очередь пачку пар (chat_id, текст) одним bulk_create"""
+    return NotificationOutbox.objects.bulk_create([
+        NotificationOutbox(chat_id=chat_id, text=text)
+        for chat_id, text in messages
+        if chat_id
+    ])
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """
+    Забрать пачку сообщений, готовых к отправке.
+    Для каждого чата берётся только самое раннее pending-сообщение,
+    поэтому порядок внутри чата сохраняется и при повторах.
+    Взятые сообщения "арендуются" сдвигом next_attempt_at на claim_lease(batch_size);
+    attempts увеличивается и служит меткой аренды.
+    """
+    now = now or timezone.now()
+    earlier_pending = NotificationOutbox.objects.filter(
+        chat_id=OuterRef("chat_id"),
+        status=NotificationOutbox.Status.PENDING,
+        id__lt=OuterRef("id"),
+    )
+    with transaction.atomic():
+        batch = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=NotificationOutbox.Status.PENDING, next_attempt_at__lte=now)
+            .exclude(Exists(earlier_pending))
+            .order_by("id")[:batch_size]
+        )
+        if batch:
+            NotificationOutbox.objects.filter(id__in=[item.id for item in batch]).update(
+                attempts=F("attempts") + 1,
+                next_attempt_at=now + claim_lease(batch_size),
+            )
+            for item in batch:
+                item.attempts += 1
+    return batch
+
+
+def renew_claim(item):
+    """
+    Продлить аренду перед отправкой. False - аренда истекла и сообщение уже взял
+    другой воркер (attempts изменился) или оно обработано: отправлять нельзя.
+    """
+    return NotificationOutbox.objects.filter(
+        id=item.id,
+        status=NotificationOutbox.Status.PENDING,
+        attempts=item.attempts,
+    ).update(next_attempt_at=timezone.now() + claim_lease(1)) == 1
+
+
+def deliver_batch(batch_size=DEFAULT_BATCH_SIZE):
+    """Отправить одну пачку. Возвращает (отправлено, отложено/провалено)"""
+    sent = failed = 0
+    for item in claim_batch(batch_size):
+        if not renew_claim(item):
+            continue
+        status, error = post_telegram_message(item.chat_id, item.text, item.reply_markup)
+        if status == 200:
+            NotificationOutbox.objects.filter(id=item.id).update(
+                status=NotificationOutbox.Status.SENT,
+                sent_at=timezone.now(),
+                last_error="",
+            )
+            sent += 1
+            continue
+
+        failed += 1
+        last_error = f"Telegram не принял сообщение: {status or 'нет ответа'} {error}".strip()
+        if is_permanent_error(status) or item.attempts >= MAX_ATTEMPTS:
+            # провал снимает сообщение из очереди чата - следующие не ждут его повторов
+            NotificationOutbox.objects.filter(id=item.id).update(
+                status=NotificationOutbox.Status.FAILED,
+                last_error=last_error,
+            )
+        else:
+            NotificationOutbox.objects.filter(id=item.id).update(
+                next_attempt_at=timezone.now() + retry_delay(item.attempts),
+                last_error=last_error,
+            )
+    return sent, failed
@@ -0,0 +1,131 @@
+# trips/pagination.py
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация по стабильному ключу (поле, id).
+    Без COUNT(*) и без OFFSET: следующая страница - это WHERE (поле, id) > курсора.
+
+    ?page_size=<n> - размер страницы (не больше max_page_size)
+    ?cursor=<токен> - значение "cursor" из предыдущего ответа ("next" - та же ссылка целиком)
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    invalid_cursor_message = "Неверный курсор."
+
+    def __init__(self, ordering=("-created_at", "-id")):
+        # Последний элемент ordering - всегда уникальный tie-breaker (id)
+        self.ordering = tuple(ordering)
+        self.page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE") or 20
+        self.next_position = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        items = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        has_next = len(items) > self.page_size
+        items = items[:self.page_size]
+
+        self.next_position = None
+        if has_next and items:
+            last = items[-1]
+            self.next_position = [getattr(last, name.lstrip("-")) for name in self.ordering]
+        return items
+
+    def _after(self, position):
+        """WHERE (a, b) > (x, y) с учётом направления каждого поля"""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def encode_cursor(self, position):
+        raw = json.dumps(
+            [value.isoformat() if hasattr(value, "isoformat") else value for value in position]
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(name.lstrip("-")).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            # битый base64/JSON (binascii.Error и JSONDecodeError - это ValueError)
+            # или значение, которое поле не может разобрать
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_cursor(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "cursor": self.get_next_cursor(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "cursor": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+def keyset_paginated_response(request, queryset, serializer_class, ordering):
+    """Страница списка для custom-action: сериализуем только текущую страницу"""
+    paginator = KeysetPagination(ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
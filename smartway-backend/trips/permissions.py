@@ -16,10 +16,5 @@ class IsDriverWithActiveSubscription(BasePermission):
         if not is_driver:
             return False
 
-        # Пробуем проверить подписку через billing.Subscription,
-        # если нет модели/импорта — не валимся, пускаем (мягкая деградация до внедрения биллинга)
-        try:
-            from billing.models import Subscription  # type: ignore
-            return Subscription.objects.filter(user=user, is_active=True).exists()
-        except Exception:
-            return True
+        from billing.entitlements import get_entitlement
+        return get_entitlement(user) is not None
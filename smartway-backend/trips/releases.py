@@ -0,0 +1,104 @@
+# trips/releases.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Trip, TripRelease, TripWithdrawal
+
+
+def _tier_delays():
+    """{tier: задержка в секундах} для бесплатного уровня и всех тарифов"""
+    from billing.models import SubscriptionPlan
+    from billing.utils import DEFAULT_VIEW_DELAY
+
+    delays = {TripRelease.FREE_TIER: DEFAULT_VIEW_DELAY}
+    delays.update(SubscriptionPlan.objects.values_list("id", "view_delay_seconds"))
+    return delays
+
+
+def _build_releases(trips, delays):
+    """trips - (id, момент появления в ленте, departure_time)"""
+    return [
+        TripRelease(
+            trip_id=trip_id,
+            tier=tier,
+            visible_from=opened_at + timedelta(seconds=delay),
+            departure_time=departure_time,
+        )
+        for trip_id, opened_at, departure_time in trips
+        for tier, delay in delays.items()
+    ]
+
+
+def sync_trip_releases(trip):
+    """Пересчитать строки TripRelease одного заказа (удалить, если он уже не открыт)"""
+    with transaction.atomic():
+        deleted, _ = TripRelease.objects.filter(trip_id=trip.pk).delete()
+        if trip.status != Trip.Status.OPEN:
+            if deleted:
+                # заказ был в ленте - водители должны убрать его у себя
+                TripWithdrawal.objects.create(trip_id=trip.pk)
+            return
+        # возвращённый в ленту заказ открывается заново от момента возврата:
+        # visible_from позже курсора ленты, и водители получат его по WebSocket
+        opened_at = trip.reopened_at or trip.created_at
+        TripRelease.objects.bulk_create(
+            _build_releases([(trip.pk, opened_at, trip.departure_time)], _tier_delays())
+        )
+
+
+def rebuild_trip_releases(tiers=None, batch_size=1000):
+    """
+    Пересчитать TripRelease для всех открытых заказов.
+    tiers - только эти уровни (например, после изменения одного тарифа).
+    """
+    delays = _tier_delays()
+    if tiers is not None:
+        delays = {tier: delays[tier] for tier in tiers if tier in delays}
+
+    open_trips = (
+        Trip.objects.filter(status=Trip.Status.OPEN)
+        .annotate(opened_at=Coalesce("reopened_at", "created_at"))
+        .values_list("id", "opened_at", "departure_time")
+    )
+    stale = TripRelease.objects.all()
+    if tiers is not None:
+        stale = stale.filter(tier__in=list(tiers))
+
+    now = timezone.now()
+    with transaction.atomic():
+        # ещё не показанные уровню заказы (или новый уровень), которым задержка
+        # сократилась в прошлое, открываем с момента пересчёта - иначе они окажутся
+        # позади курсора ленты и водители не получат их по WebSocket
+        published = set(
+            stale.filter(visible_from__lte=now).values_list("trip_id", "tier").iterator()
+        )
+        stale.delete()
+        releases = _build_releases(open_trips.iterator(), delays)
+        for release in releases:
+            if release.visible_from < now and (release.trip_id, release.tier) not in published:
+                release.visible_from = now
+        TripRelease.objects.bulk_create(releases, batch_size=batch_size)
+    return len(releases)
+
+
+def driver_release_tier(user):
+    """Уровень водителя: тариф из DriverEntitlement (кэш воркера) или FREE_TIER"""
+    from billing.entitlements import get_entitlement
+
+    entitlement = get_entitlement(user)
+    return entitlement.plan_id if entitlement else TripRelease.FREE_TIER
+
+
+def visible_trips(user, now=None):
+    """Открытые заказы, уже открытые для уровня водителя: один range scan по trip_release_feed_idx"""
+    now = now or timezone.now()
+    return Trip.objects.filter(
+        status=Trip.Status.OPEN,
+        releases__tier=driver_release_tier(user),
+        releases__visible_from__lte=now,
+        # копия departure_time в строке ленты - условие покрывает индекс
+        releases__departure_time__gt=now,
+    )
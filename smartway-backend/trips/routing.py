@@ -0,0 +1,6 @@
+from django.urls import re_path
+from .consumers import TripFeedConsumer
+
+websocket_urlpatterns = [
+    re_path(r"ws/trips/feed/$", TripFeedConsumer.as_asgi()),
+]
@@ -0,0 +1,150 @@
+# trips/schedules.py
+"""
+Материализация регулярных рейсов (AnnouncementSchedule) в объявления.
+Шаблоны обходятся пачками по id, объявления и их остановки создаются
+bulk_create-ом. Идемпотентность - уникальность (schedule, schedule_date)
+плюс generated_until: уже заполненные шаблоны даже не читаются.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import AnnouncementSchedule, AnnouncementStop, Booking, DriverAnnouncement
+
+
+DEFAULT_DAYS_AHEAD = 7
+DEFAULT_BATCH_SIZE = 500
+# Самый восточный часовой пояс (UTC+14): дальше этой даты "сегодня" нет нигде
+LATEST_UTC_OFFSET = timedelta(hours=14)
+
+
+def _zone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.get_current_timezone()
+
+
+def schedule_today(schedule, now=None):
+    """Сегодняшняя дата в часовом поясе шаблона"""
+    return (now or timezone.now()).astimezone(_zone(schedule.time_zone)).date()
+
+
+def schedule_departures(schedule, first_day, last_day):
+    """[(дата, aware datetime отправления)] для дней шаблона в диапазоне (включительно)"""
+    weekdays = set(schedule.weekdays or [])
+    zone = _zone(schedule.time_zone)
+    departures = []
+    day = first_day
+    while day <= last_day:
+        if day.weekday() in weekdays:
+            departures.append((day, datetime.combine(day, schedule.departure_time, tzinfo=zone)))
+        day += timedelta(days=1)
+    return departures
+
+
+def _build_announcements(schedule, first_day, last_day, now):
+    contact_phone = schedule.contact_phone or schedule.driver.phone_number
+    announcements = []
+    for day, departure_time in schedule_departures(schedule, first_day, last_day):
+        if departure_time <= now:
+            continue
+        fields = {name: getattr(schedule, name) for name in AnnouncementSchedule.ANNOUNCEMENT_FIELDS}
+        fields["contact_phone"] = contact_phone
+        announcements.append(DriverAnnouncement(
+            schedule=schedule,
+            schedule_date=day,
+            departure_time=departure_time,
+            **fields,
+        ))
+    return announcements
+
+
+def _materialize_batch(schedules, today, days, now):
+    """
+    Создать объявления пачки шаблонов и остановки к ним. Возвращает число новых объявлений.
+    today=None - "сегодня" в часовом поясе каждого шаблона.
+    """
+    announcements = []
+    horizons = {}
+    for schedule in schedules:
+        first_day = today or schedule_today(schedule, now)
+        horizon = first_day + timedelta(days=days - 1)
+        if schedule.generated_until and schedule.generated_until >= horizon:
+            continue
+        if schedule.generated_until and schedule.generated_until >= first_day:
+            first_day = schedule.generated_until + timedelta(days=1)
+        announcements.extend(_build_announcements(schedule, first_day, horizon, now))
+        horizons.setdefault(horizon, []).append(schedule.id)
+
+    schedule_ids = [pk for ids in horizons.values() for pk in ids]
+    if not schedule_ids:
+        return 0
+    with transaction.atomic():
+        # Дата уже создана (повторный запуск, гонка двух генераторов) - конфликт пропускается
+        DriverAnnouncement.objects.bulk_create(announcements, ignore_conflicts=True)
+        # ignore_conflicts не возвращает id: дочитываем новые объявления без остановок
+        created = list(
+            DriverAnnouncement.objects
+            .filter(schedule_id__in=schedule_ids, departure_time__gt=now)
+            .exclude(Exists(AnnouncementStop.objects.filter(announcement=OuterRef("pk"))))
+            .only("id", "from_location_id", "to_location_id", "intermediate_stops", "departure_time")
+        )
+        AnnouncementStop.objects.bulk_create(
+            [stop for announcement in created for stop in announcement.build_stops()]
+        )
+        for horizon, ids in horizons.items():
+            AnnouncementSchedule.objects.filter(id__in=ids).update(generated_until=horizon)
+    return len(created)
+
+
+def materialize_schedules(days=DEFAULT_DAYS_AHEAD, today=None, schedule_ids=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Создать объявления по активным шаблонам на days дней вперёд (начиная с today,
+    по умолчанию - с сегодняшней даты в часовом поясе шаблона).
+    schedule_ids - только эти шаблоны (например, сразу после создания).
+    Возвращает число созданных объявлений.
+    """
+    now = timezone.now()
+    latest_today = today or (now + LATEST_UTC_OFFSET).astimezone(dt_timezone.utc).date()
+    horizon = latest_today + timedelta(days=days - 1)
+
+    pending = AnnouncementSchedule.objects.filter(is_active=True).filter(
+        Q(generated_until__isnull=True) | Q(generated_until__lt=horizon)
+    )
+    if schedule_ids is not None:
+        pending = pending.filter(id__in=schedule_ids)
+
+    created = 0
+    last_id = 0
+    while True:
+        schedules = list(
+            pending.filter(id__gt=last_id)
+            .select_related("driver")
+            .order_by("id")[:batch_size]
+        )
+        if not schedules:
+            return created
+        created += _materialize_batch(schedules, today, days, now)
+        last_id = schedules[-1].id
+
+
+def regenerate_schedule(schedule):
+    """
+    Шаблон изменён (дни, время, маршрут...): будущие рейсы без броней пересоздаются
+    по новому шаблону сразу, а не после конца уже заполненного горизонта.
+    Рейсы с бронями и отменённые водителем остаются как есть.
+    """
+    with transaction.atomic():
+        DriverAnnouncement.objects.filter(
+            schedule=schedule,
+            status=DriverAnnouncement.Status.ACTIVE,
+            departure_time__gt=timezone.now(),
+        ).exclude(
+            Exists(Booking.objects.filter(announcement=OuterRef("pk")))
+        ).delete()
+        AnnouncementSchedule.objects.filter(pk=schedule.pk).update(generated_until=None)
+    return materialize_schedules(schedule_ids=[schedule.id])
@@ -0,0 +1,198 @@
+# trips/search.py
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from locations.lookup import resolve_location_ids
+from .models import AnnouncementStop, DriverAnnouncement
+
+
+# ?mode=segment - искать и по промежуточным остановкам
+SEARCH_MODE_ROUTE = "route"
+SEARCH_MODE_SEGMENT = "segment"
+
+
+# Булевы фильтры по условиям поездки: ?allow_pets=true и т.п.
+ANNOUNCEMENT_OPTION_FILTERS = (
+    "allow_smoking",
+    "allow_pets",
+    "allow_big_luggage",
+    "baggage_help",
+    "allow_children",
+    "has_air_conditioning",
+)
+
+
+def _parse_bool(value):
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return None
+
+
+def _parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_decimal(value):
+    try:
+        return Decimal(str(value))
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+
+
+def _parse_moment(value, end_of_day=False):
+    """Дата (YYYY-MM-DD) или дата-время ISO -> aware datetime"""
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is not None:
+        moment = datetime.combine(day, time.min)
+        if end_of_day:
+            moment += timedelta(days=1)
+    else:
+        try:
+            moment = parse_datetime(value)
+        except ValueError:
+            moment = None
+        if moment is None:
+            return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def segment_announcement_ids(from_ids=None, to_ids=None):
+    """
+    Подзапрос с ID объявлений, проезжающих from раньше, чем to
+    (с учётом промежуточных остановок). Один join по таблице остановок.
+    None - ограничений по маршруту нет.
+    """
+    if not from_ids and not to_ids:
+        return None
+
+    stops = AnnouncementStop.objects.all()
+    if from_ids and to_ids:
+        stops = stops.filter(
+            location_id__in=from_ids,
+            announcement__stops__location_id__in=to_ids,
+            announcement__stops__sequence__gt=F("sequence"),
+        )
+    elif from_ids:
+        # садимся в from - после него должна быть хотя бы одна точка
+        stops = stops.filter(
+            location_id__in=from_ids,
+            announcement__stops__sequence__gt=F("sequence"),
+        )
+    else:
+        stops = stops.filter(location_id__in=to_ids, sequence__gt=0)
+    return stops.values("announcement_id")
+
+
+def filter_free_seats(qs, seats):
+    """Объявления, где свободно не меньше seats мест (free_seats учитывает и вместимость авто)"""
+    return qs.filter(booked_seats__lte=F("available_seats") - seats).filter(
+        Q(car__isnull=True)
+        | Q(car__passenger_seats=0)
+        | Q(car__passenger_seats__gte=F("booked_seats") + seats)
+    )
+
+
+def search_available_announcements(params, user=None):
+    """
+    Поиск активных объявлений по маршруту.
+
+    Параметры (все опциональны):
+      from, to            - ID, код или название локации (ru/en/ky)
+      mode                - route (по умолчанию, точные конечные точки)
+                            или segment (участок маршрута с остановками)
+      date                - день отправления (YYYY-MM-DD)
+      date_from, date_to  - окно по времени отправления
+      seats               - минимум свободных мест
+      price_min, price_max - цена за место
+      allow_pets, allow_smoking, ... - условия поездки (true/false)
+
+    В режиме route все условия сводятся к одному запросу по индексу
+    (from_location, to_location, status, departure_time).
+    """
+    now = timezone.now()
+    qs = DriverAnnouncement.objects.filter(status=DriverAnnouncement.Status.ACTIVE)
+
+    from_ids = to_ids = None
+    from_value = params.get("from")
+    to_value = params.get("to")
+    if from_value:
+        from_ids = resolve_location_ids(from_value)
+        if not from_ids:
+            return qs.none()
+    if to_value:
+        to_ids = resolve_location_ids(to_value)
+        if not to_ids:
+            return qs.none()
+
+    if params.get("mode") == SEARCH_MODE_SEGMENT:
+        segment_ids = segment_announcement_ids(from_ids, to_ids)
+        if segment_ids is not None:
+            qs = qs.filter(id__in=segment_ids)
+    else:
+        if from_ids:
+            qs = qs.filter(from_location_id__in=from_ids)
+        if to_ids:
+            qs = qs.filter(to_location_id__in=to_ids)
+
+    # Окно отправления: никогда не раньше текущего момента
+    start = now
+    end = None
+    day = params.get("date")
+    if day:
+        day_start = _parse_moment(day)
+        day_end = _parse_moment(day, end_of_day=True)
+        if day_start and day_end:
+            start = max(start, day_start)
+            end = day_end
+    date_from = _parse_moment(params.get("date_from"))
+    if date_from:
+        start = max(start, date_from)
+    date_to = _parse_moment(params.get("date_to"), end_of_day=True)
+    if date_to:
+        end = min(end, date_to) if end else date_to
+
+    qs = qs.filter(departure_time__gt=start)
+    if end:
+        qs = qs.filter(departure_time__lt=end)
+
+    seats = _parse_int(params.get("seats"))
+    if seats and seats > 0:
+        qs = filter_free_seats(qs, seats)
+
+    price_min = _parse_decimal(params.get("price_min"))
+    if price_min is not None:
+        qs = qs.filter(price_per_seat__gte=price_min)
+    price_max = _parse_decimal(params.get("price_max"))
+    if price_max is not None:
+        qs = qs.filter(price_per_seat__lte=price_max)
+
+    for option in ANNOUNCEMENT_OPTION_FILTERS:
+        flag = _parse_bool(params.get(option))
+        if flag is not None:
+            qs = qs.filter(**{option: flag})
+
+    if user is not None and getattr(user, "is_authenticated", False):
+        qs = qs.exclude(driver=user)
+
+    return qs.select_related(
+        "driver", "car", "from_location", "to_location"
+    ).order_by("departure_time")
@@ -2,9 +2,11 @@
 from rest_framework import serializers
 from django.db import transaction
 from django.utils import timezone
-from .models import Trip, DriverAnnouncement, Booking, Review
+from .models import Trip, DriverAnnouncement, AnnouncementSchedule, Booking, Review
 from users.models import Car
 from locations.models import Location
+from locations.cache import get_location_name
+from locations.lookup import resolve_or_create_location
 
 
 def _resolve_lang_from_request(request):
@@ -41,9 +43,18 @@ def _resolve_lang_from_request(request):
     return 'ru'
 
 
+def _location_display(obj, field, lang):
+    """Название локации из справочника в памяти; к БД - только если id нет в кэше"""
+    name = get_location_name(getattr(obj, f"{field}_id"), lang)
+    if name is None:
+        name = getattr(obj, field).get_name(lang)
+    return name
+
+
 def _ensure_location_instance(value):
     """
-    Поддерживаем совместимость: принимаем ID или строку и создаём Location при необходимости.
+    Поддерживаем совместимость: принимаем ID или строку.
+    Строка сопоставляется с существующими локациями, новая создаётся только если совпадений нет.
     """
     if isinstance(value, Location):
         return value
@@ -57,18 +68,11 @@ def _ensure_location_instance(value):
         except Location.DoesNotExist:
             raise serializers.ValidationError("Локация не найдена")
 
-    # Строковое название - создаём/используем code по названию
+    # Строковое название - ищем по названиям и синонимам, создаём только новую
     if isinstance(value, str):
-        code = value.lower().replace(" ", "-")[:50]
-        location, _ = Location.objects.get_or_create(
-            code=code,
-            defaults={
-                "name_ru": value,
-                "name_en": value,
-                "name_ky": value,
-            },
-        )
-        return location
+        if not value.strip():
+            raise serializers.ValidationError("Укажите локацию")
+        return resolve_or_create_location(value)
 
     raise serializers.ValidationError("Неверный формат локации")
 
@@ -77,6 +81,42 @@ def _ensure_location_id(value):
     return _ensure_location_instance(value).id
 
 
+def _parse_intermediate_stops(value):
+    """
+    Принимаем список ID/названий локаций или объектов {"location": ..., "planned_time": "..."}.
+    Названия разбираются так же, как точки маршрута (_ensure_location_instance).
+    Возвращаем (список ID, {location_id: planned_time}) - в JSON объявления
+    сохраняем только ID, время прибытия уходит в таблицу остановок.
+    """
+    if not value:
+        return [], {}
+    if not isinstance(value, list):
+        raise serializers.ValidationError("Ожидается список локаций.")
+
+    location_ids = []
+    planned_times = {}
+    for item in value:
+        planned_time = None
+        if isinstance(item, dict):
+            planned_time = item.get("planned_time")
+            item = item.get("location")
+        if isinstance(item, str) and not item.strip().isdigit():
+            item = _ensure_location_instance(item).id
+        try:
+            location_id = int(item)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("Неверный формат промежуточной остановки.")
+        location_ids.append(location_id)
+        if planned_time:
+            planned_times[location_id] = serializers.DateTimeField().to_internal_value(planned_time)
+
+    existing = set(Location.objects.filter(id__in=location_ids).values_list("id", flat=True))
+    if len(existing) != len(set(location_ids)):
+        raise serializers.ValidationError("Промежуточная локация не найдена.")
+
+    return location_ids, planned_times
+
+
 # ===================== TRIP SERIALIZERS (Заказы пассажиров) =====================
 
 class TripCreateSerializer(serializers.ModelSerializer):
@@ -158,17 +198,21 @@ class TripListSerializer(serializers.ModelSerializer):
     
     def get_from_location_display(self, obj):
         lang = self._get_lang()
-        return obj.from_location.get_name(lang)
+        return _location_display(obj, 'from_location', lang)
     
     def get_to_location_display(self, obj):
         lang = self._get_lang()
-        return obj.to_location.get_name(lang)
+        return _location_display(obj, 'to_location', lang)
 
     def get_has_review_from_me(self, obj):
         request = self.context.get('request')
         user = getattr(request, 'user', None)
         if not user or not getattr(user, 'is_authenticated', False):
             return False
+        # Флаг посчитан для всей страницы (views.with_trip_review_flags)
+        annotated = getattr(obj, 'my_review_exists', None)
+        if annotated is not None:
+            return annotated
         return obj.reviews.filter(author=user).exists()
 
     def get_my_role(self, obj):
@@ -232,11 +276,11 @@ class TripDetailSerializer(serializers.ModelSerializer):
     
     def get_from_location_display(self, obj):
         lang = self._get_lang()
-        return obj.from_location.get_name(lang)
+        return _location_display(obj, 'from_location', lang)
     
     def get_to_location_display(self, obj):
         lang = self._get_lang()
-        return obj.to_location.get_name(lang)
+        return _location_display(obj, 'to_location', lang)
     
     def _get_lang(self):
         return _resolve_lang_from_request(self.context.get('request'))
@@ -267,6 +311,10 @@ class AnnouncementCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Количество мест от 1 до 50.")
         return value
 
+    def validate_intermediate_stops(self, value):
+        location_ids, self._stop_planned_times = _parse_intermediate_stops(value)
+        return location_ids
+
     def to_internal_value(self, data):
         data = data.copy()
         if 'from_location' in data:
@@ -285,7 +333,72 @@ class AnnouncementCreateSerializer(serializers.ModelSerializer):
         driver = validated_data.pop("driver", None) or self.context["request"].user
         if not validated_data.get("contact_phone"):
             validated_data["contact_phone"] = driver.phone_number
-        return DriverAnnouncement.objects.create(driver=driver, **validated_data)
+        with transaction.atomic():
+            announcement = DriverAnnouncement.objects.create(driver=driver, **validated_data)
+            announcement.sync_stops(getattr(self, "_stop_planned_times", None))
+        return announcement
+
+
+class AnnouncementScheduleSerializer(serializers.ModelSerializer):
+    """Шаблон регулярного рейса водителя"""
+    class Meta:
+        model = AnnouncementSchedule
+        fields = (
+            "id", "from_location", "to_location", "intermediate_stops",
+            "weekdays", "departure_time", "time_zone",
+            "available_seats", "price_per_seat", "is_negotiable",
+            "contact_phone", "comment", "car",
+            "allow_smoking", "allow_pets", "allow_big_luggage",
+            "baggage_help", "allow_children", "has_air_conditioning",
+            "extra_rules", "is_active", "generated_until",
+            "created_at", "updated_at",
+        )
+        read_only_fields = ("generated_until", "created_at", "updated_at")
+
+    def validate_weekdays(self, value):
+        if not isinstance(value, list) or not value:
+            raise serializers.ValidationError("Укажите дни недели (0 - понедельник ... 6 - воскресенье).")
+        try:
+            days = sorted({int(day) for day in value})
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("Неверный день недели.")
+        if days[0] < 0 or days[-1] > 6:
+            raise serializers.ValidationError("Неверный день недели.")
+        return days
+
+    def validate_time_zone(self, value):
+        from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Неизвестный часовой пояс.")
+        return value
+
+    def validate_available_seats(self, value):
+        if value <= 0 or value > 50:
+            raise serializers.ValidationError("Количество мест от 1 до 50.")
+        return value
+
+    def validate_intermediate_stops(self, value):
+        # время прибытия на остановки у шаблона не хранится
+        location_ids, _ = _parse_intermediate_stops(value)
+        return location_ids
+
+    def to_internal_value(self, data):
+        data = data.copy()
+        if 'from_location' in data:
+            data['from_location'] = _ensure_location_id(data.get('from_location'))
+        if 'to_location' in data:
+            data['to_location'] = _ensure_location_id(data.get('to_location'))
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        from_location = attrs.get("from_location", getattr(self.instance, "from_location", None))
+        to_location = attrs.get("to_location", getattr(self.instance, "to_location", None))
+        if from_location and to_location and from_location == to_location:
+            raise serializers.ValidationError("Точка отправления и назначения должны отличаться")
+        return attrs
 
 
 class AnnouncementDetailSerializer(serializers.ModelSerializer):
@@ -320,6 +433,20 @@ class AnnouncementDetailSerializer(serializers.ModelSerializer):
             "created_at", "updated_at"
         )
         read_only_fields = ("status", "booked_seats", "created_at", "updated_at", "driver")
+
+    ROUTE_FIELDS = ("from_location", "to_location", "departure_time", "intermediate_stops")
+
+    def validate_intermediate_stops(self, value):
+        location_ids, self._stop_planned_times = _parse_intermediate_stops(value)
+        return location_ids
+
+    def update(self, instance, validated_data):
+        route_changed = any(field in validated_data for field in self.ROUTE_FIELDS)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if route_changed:
+                instance.sync_stops(getattr(self, "_stop_planned_times", None))
+        return instance
     
     def get_driver_rating(self, obj):
         return getattr(obj.driver, 'average_rating_as_driver', None)
@@ -352,11 +479,11 @@ class AnnouncementDetailSerializer(serializers.ModelSerializer):
     
     def get_from_location_display(self, obj):
         lang = self._get_lang()
-        return obj.from_location.get_name(lang)
+        return _location_display(obj, 'from_location', lang)
     
     def get_to_location_display(self, obj):
         lang = self._get_lang()
-        return obj.to_location.get_name(lang)
+        return _location_display(obj, 'to_location', lang)
     
     def _get_lang(self):
         return _resolve_lang_from_request(self.context.get('request'))
@@ -445,8 +572,8 @@ class BookingSerializer(serializers.ModelSerializer):
         lang = self._get_lang()
         return {
             "id": ann.id,
-            "from_location": ann.from_location.get_name(lang),
-            "to_location": ann.to_location.get_name(lang),
+            "from_location": _location_display(ann, 'from_location', lang),
+            "to_location": _location_display(ann, 'to_location', lang),
             "departure_time": ann.departure_time,
             "price_per_seat": str(ann.price_per_seat),
             "driver_name": ann.driver.full_name,
@@ -455,11 +582,11 @@ class BookingSerializer(serializers.ModelSerializer):
     
     def get_announcement_from(self, obj):
         lang = self._get_lang()
-        return obj.announcement.from_location.get_name(lang)
+        return _location_display(obj.announcement, 'from_location', lang)
 
     def get_announcement_to(self, obj):
         lang = self._get_lang()
-        return obj.announcement.to_location.get_name(lang)
+        return _location_display(obj.announcement, 'to_location', lang)
 
     def get_driver_phone(self, obj):
         return obj.announcement.contact_phone or obj.announcement.driver.phone_number
@@ -473,6 +600,11 @@ class BookingSerializer(serializers.ModelSerializer):
         user = getattr(request, 'user', None)
         if not user or not getattr(user, 'is_authenticated', False):
             return False
+
+        # Флаг посчитан для всей страницы (views.with_booking_review_flags)
+        annotated = getattr(obj, 'my_review_exists', None)
+        if annotated is not None:
+            return annotated
         
         # Проверяем: оставлял ли текущий пользователь отзыв по этому бронированию
         # (либо как пассажир, либо как водитель объявления)
@@ -608,17 +740,19 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
         booking = validated_data.get('booking')
         trip = validated_data.get('trip')
         
-        review = Review.objects.create(
-            author=user,
-            recipient=recipient,
-            booking=booking,
-            trip=trip,
-            rating=validated_data.get('rating'),
-            text=validated_data.get('text', ''),
-            was_on_time=validated_data.get('was_on_time', False),
-            was_polite=validated_data.get('was_polite', False),
-            car_was_clean=validated_data.get('car_was_clean', False),
-        )
+        # Вместе с отзывом в той же транзакции обновляется UserRatingStats (trips/signals.py)
+        with transaction.atomic():
+            review = Review.objects.create(
+                author=user,
+                recipient=recipient,
+                booking=booking,
+                trip=trip,
+                rating=validated_data.get('rating'),
+                text=validated_data.get('text', ''),
+                was_on_time=validated_data.get('was_on_time', False),
+                was_polite=validated_data.get('was_polite', False),
+                car_was_clean=validated_data.get('car_was_clean', False),
+            )
         return review
 
 
@@ -654,11 +788,11 @@ class AnnouncementListSerializer(serializers.ModelSerializer):
 
     def get_from_location_display(self, obj):
         lang = self._get_lang()
-        return obj.from_location.get_name(lang)
+        return _location_display(obj, 'from_location', lang)
 
     def get_to_location_display(self, obj):
         lang = self._get_lang()
-        return obj.to_location.get_name(lang)
+        return _location_display(obj, 'to_location', lang)
 
     def get_car_info(self, obj):
         if obj.car:
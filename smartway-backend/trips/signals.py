@@ -0,0 +1,90 @@
+# trips/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from billing.models import SubscriptionPlan
+from users.directory import refresh_driver_directory
+from users.profile_cache import invalidate_profiles
+from users.models import UserRatingStats
+from .models import Review, Trip, TripRelease, TripWithdrawal
+from .releases import rebuild_trip_releases, sync_trip_releases
+
+
+def _review_key(review):
+    """(получатель, роль, оценка) - то, что учтено в UserRatingStats"""
+    return review.recipient_id, review.recipient_role, review.rating
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review(sender, instance, **kwargs):
+    """При редактировании запоминаем старую оценку, чтобы откатить её из статистики"""
+    instance._rating_stats_previous = None
+    if not instance.recipient_role:
+        instance.recipient_role = instance.detect_recipient_role()
+    if instance._state.adding or not instance.pk:
+        return
+    previous = Review.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._rating_stats_previous = _review_key(previous)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = _review_key(instance)
+    previous = getattr(instance, "_rating_stats_previous", None)
+    if previous == current:
+        return
+    if previous is not None:
+        UserRatingStats.apply_review(*previous, delta=-1)
+    UserRatingStats.apply_review(*current, delta=1)
+    _rating_changed(previous, current)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_stats_on_delete(sender, instance, **kwargs):
+    key = _review_key(instance)
+    UserRatingStats.apply_review(*key, delta=-1)
+    _rating_changed(key)
+
+
+def _rating_changed(*review_keys):
+    """Рейтинг из UserRatingStats есть в профиле получателя и в каталоге водителей"""
+    review_keys = [key for key in review_keys if key]
+    invalidate_profiles(recipient_id for recipient_id, _, _ in review_keys)
+    refresh_driver_directory({
+        recipient_id
+        for recipient_id, role, _ in review_keys
+        if role == UserRatingStats.Role.DRIVER
+    })
+
+
+RELEASE_FIELDS = {"status", "departure_time", "created_at", "reopened_at"}
+
+
+@receiver(post_save, sender=Trip)
+def sync_releases_on_trip_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if not created and update_fields is not None and not RELEASE_FIELDS & set(update_fields):
+        return
+    sync_trip_releases(instance)
+
+
+@receiver(post_delete, sender=Trip)
+def withdraw_deleted_trip(sender, instance, **kwargs):
+    if instance.status == Trip.Status.OPEN:
+        TripWithdrawal.objects.create(trip_id=instance.pk)
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+def rebuild_releases_on_plan_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rebuild_trip_releases(tiers=[instance.pk])
+
+
+@receiver(post_delete, sender=SubscriptionPlan)
+def drop_releases_on_plan_delete(sender, instance, **kwargs):
+    TripRelease.objects.filter(tier=instance.pk).delete()
@@ -5,6 +5,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     TripViewSet,
     AnnouncementViewSet,
+    AnnouncementScheduleViewSet,
     BookingViewSet,
     ReviewViewSet,
     UserReviewsListAPIView,
@@ -13,6 +14,7 @@ from .views import (
 router = DefaultRouter()
 router.register(r'trips', TripViewSet, basename='trips')
 router.register(r'announcements', AnnouncementViewSet, basename='announcements')
+router.register(r'announcement-schedules', AnnouncementScheduleViewSet, basename='announcement-schedules')
 router.register(r'bookings', BookingViewSet, basename='bookings')
 router.register(r'reviews', ReviewViewSet, basename='reviews')
 
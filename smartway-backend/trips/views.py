@@ -1,24 +1,34 @@
 # trips/views.py
-from datetime import timedelta
-
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import BooleanField, Exists, ExpressionWrapper, F, OuterRef, Q
 
-from .models import Trip, DriverAnnouncement, Booking, Review
+from core.db import write_atomic
+from users.directory import refresh_driver_directory
+from users.profile_cache import invalidate_profiles
+from users.models import User
+from .models import Trip, DriverAnnouncement, AnnouncementSchedule, Booking, Review
 from .serializers import (
     TripCreateSerializer, TripListSerializer, TripDetailSerializer,
     AnnouncementCreateSerializer, AnnouncementListSerializer, AnnouncementDetailSerializer,
+    AnnouncementScheduleSerializer,
     BookingCreateSerializer, BookingSerializer,
     ReviewSerializer, ReviewCreateSerializer,
 )
+from .inventory import cancel_booking, confirm_booking, reject_booking
+from .pagination import keyset_paginated_response
+from .matching import DEFAULT_MATCH_LIMIT, MAX_MATCH_LIMIT, announcement_matches, trip_matches
+from .releases import visible_trips
+from .schedules import materialize_schedules, regenerate_schedule
+from .search import search_available_announcements
 from .notifications import (
-    send_booking_completed_notification,
+    send_announcement_completed_notifications,
     send_booking_created_notification,
     send_booking_status_notification,
     send_trip_completed_notification,
@@ -26,22 +36,55 @@ from .notifications import (
 )
 
 
-def get_driver_priority_and_delay(user):
-    """Получить приоритет и задержку водителя по подписке"""
+def _match_limit(request):
     try:
-        from billing.models import DriverSubscription
-        sub = (
-            DriverSubscription.objects
-            .filter(driver=user, expires_at__gte=timezone.now())
-            .select_related("plan")
-            .order_by("-plan__priority_level")
-            .first()
+        limit = int(request.query_params.get('limit', DEFAULT_MATCH_LIMIT))
+    except ValueError:
+        return DEFAULT_MATCH_LIMIT
+    return min(max(limit, 1), MAX_MATCH_LIMIT)
+
+
+def _matches_response(request, matches, serializer_class):
+    """Список подобранных пар: сериализованный объект + match_score"""
+    serializer = serializer_class([obj for _, obj in matches], many=True, context={'request': request})
+    results = serializer.data
+    for (score, _), data in zip(matches, results):
+        data['match_score'] = score
+    return Response({"results": results})
+
+
+def with_trip_review_flags(qs, user):
+    """
+    Аннотировать my_review_exists для всей страницы одним Exists-подзапросом,
+    чтобы TripListSerializer.get_has_review_from_me не ходил в базу на каждую строку.
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return qs
+    return qs.annotate(
+        my_review_exists=Exists(Review.objects.filter(trip=OuterRef('pk'), author=user))
+    )
+
+
+def with_booking_review_flags(qs, user):
+    """
+    То же для бронирований: отзыв по самому booking либо (для водителя объявления)
+    отзыв о пассажире по любому booking этого объявления.
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return qs
+    by_booking = Exists(Review.objects.filter(booking=OuterRef('pk'), author=user))
+    by_announcement = Exists(Review.objects.filter(
+        author=user,
+        recipient_id=OuterRef('passenger_id'),
+        booking__announcement_id=OuterRef('announcement_id'),
+        booking__announcement__driver_id=user.id,
+    ))
+    return qs.annotate(
+        my_review_exists=ExpressionWrapper(
+            Q(by_booking) | Q(by_announcement),
+            output_field=BooleanField(),
         )
-        if sub:
-            return sub.plan.priority_level, sub.plan.view_delay_seconds
-    except Exception:
-        pass
-    return 0, 0
+    )
 
 
 # ===================== TRIP VIEWS (Заказы пассажиров) =====================
@@ -68,7 +111,10 @@ class TripViewSet(viewsets.ModelViewSet):
         return context
     
     def get_queryset(self):
-        return Trip.objects.select_related('passenger', 'driver', 'car').order_by('-created_at')
+        qs = Trip.objects.select_related('passenger', 'driver', 'car').order_by('-created_at')
+        if self.action == 'list':
+            qs = with_trip_review_flags(qs, self.request.user)
+        return qs
     
     def perform_create(self, serializer):
         user = self.request.user
@@ -82,10 +128,9 @@ class TripViewSet(viewsets.ModelViewSet):
         """GET /api/trips/my/ - мои заказы как пассажира"""
         qs = Trip.objects.filter(
             passenger=request.user
-        ).select_related('passenger', 'driver', 'car').order_by('-created_at')
-        
-        serializer = TripListSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        ).select_related('passenger', 'driver', 'car')
+        qs = with_trip_review_flags(qs, request.user)
+        return keyset_paginated_response(request, qs, TripListSerializer, ('-created_at', '-id'))
     
     @action(detail=False, methods=['get'])
     def available(self, request):
@@ -94,18 +139,24 @@ class TripViewSet(viewsets.ModelViewSet):
         if not getattr(user, 'is_driver', False):
             return Response({"detail": "Только для водителей"}, status=403)
         
-        priority_level, view_delay_seconds = get_driver_priority_and_delay(user)
-        now = timezone.now()
-        cutoff_time = now - timedelta(seconds=view_delay_seconds)
-        
-        qs = Trip.objects.filter(
-            status='open',
-            departure_time__gt=now,
-            created_at__lte=cutoff_time
-        ).exclude(passenger=user).order_by('departure_time')
-        
-        serializer = TripListSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        # Задержка по тарифу уже учтена в TripRelease.visible_from
+        qs = visible_trips(user).exclude(passenger=user)
+        qs = with_trip_review_flags(qs, user)
+        return keyset_paginated_response(request, qs, TripListSerializer, ('departure_time', 'id'))
+    
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        """GET /api/trips/{id}/matches/ - подходящие объявления водителей для моего заказа"""
+        trip = self.get_object()
+        if trip.passenger_id != request.user.id:
+            return Response({"detail": "Это не ваш заказ."}, status=403)
+        if trip.status != Trip.Status.OPEN:
+            return Response({"results": []})
+        queryset = DriverAnnouncement.objects.select_related(
+            'driver', 'car'
+        ).prefetch_related('driver__rating_stats')
+        matches = announcement_matches(trip, limit=_match_limit(request), queryset=queryset)
+        return _matches_response(request, matches, AnnouncementListSerializer)
     
     @action(detail=False, methods=['get'], url_path='my-active')
     def my_active(self, request):
@@ -113,9 +164,8 @@ class TripViewSet(viewsets.ModelViewSet):
         qs = Trip.objects.filter(
             driver=request.user,
             status__in=['taken', 'in_progress']
-        ).order_by('departure_time')
-        serializer = TripDetailSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        ).select_related('passenger', 'driver', 'car')
+        return keyset_paginated_response(request, qs, TripDetailSerializer, ('departure_time', 'id'))
     
     @action(detail=False, methods=['get'], url_path='my-completed')
     def my_completed(self, request):
@@ -123,11 +173,13 @@ class TripViewSet(viewsets.ModelViewSet):
         qs = Trip.objects.filter(
             Q(driver=request.user) | Q(passenger=request.user),
             status__in=['completed', 'cancelled']
-        ).order_by('-updated_at')[:50]
+        ).select_related('passenger', 'driver', 'car').order_by('-updated_at')
+        qs = with_trip_review_flags(qs, request.user)[:50]
         serializer = TripListSerializer(qs, many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
+    @write_atomic()
     def take(self, request, pk=None):
         """POST /api/trips/{id}/take/ - водитель берёт заказ"""
         user = request.user
@@ -142,23 +194,22 @@ class TripViewSet(viewsets.ModelViewSet):
         if trip.passenger == user:
             return Response({"detail": "Нельзя взять свой заказ."}, status=400)
         
+        car = None
         car_id = request.data.get('car_id')
         if car_id:
             from users.models import Car
-            try:
-                trip.car = Car.objects.get(id=car_id, owner=user, is_active=True)
-            except Car.DoesNotExist:
-                pass
+            car = Car.objects.filter(id=car_id, owner=user, is_active=True).first()
         
-        trip.driver = user
-        trip.status = 'taken'
-        trip.save(update_fields=['driver', 'car', 'status', 'updated_at'])
+        # UPDATE ... WHERE status='open': второй водитель получит отказ, а не перезапишет первого
+        if not trip.take(user, car):
+            return Response({"detail": "Этот заказ уже недоступен."}, status=400)
 
         send_trip_taken_notification(trip)
         
         return Response(TripDetailSerializer(trip, context={'request': request}).data)
     
     @action(detail=True, methods=['post'])
+    @write_atomic()
     def release(self, request, pk=None):
         """POST /api/trips/{id}/release/ - водитель отказывается от заказа"""
         trip = self.get_object()
@@ -166,17 +217,13 @@ class TripViewSet(viewsets.ModelViewSet):
         if trip.driver != request.user:
             return Response({"detail": "Это не ваш заказ."}, status=403)
         
-        if trip.status not in ['taken', 'in_progress']:
+        if trip.status not in ['taken', 'in_progress'] or not trip.release(request.user):
             return Response({"detail": "Этот заказ нельзя вернуть."}, status=400)
         
-        trip.driver = None
-        trip.car = None
-        trip.status = 'open'
-        trip.save(update_fields=['driver', 'car', 'status', 'updated_at'])
-        
         return Response(TripDetailSerializer(trip, context={'request': request}).data)
     
     @action(detail=True, methods=['post'])
+    @write_atomic()
     def finish(self, request, pk=None):
         """POST /api/trips/{id}/finish/ - завершить заказ"""
         trip = self.get_object()
@@ -184,24 +231,24 @@ class TripViewSet(viewsets.ModelViewSet):
         if trip.driver != request.user:
             return Response({"detail": "Только водитель может завершить."}, status=403)
         
-        if trip.status not in ['taken', 'in_progress']:
+        if trip.status not in ['taken', 'in_progress'] or not trip.finish(request.user):
             return Response({"detail": "Этот заказ нельзя завершить."}, status=400)
         
-        trip.status = 'completed'
-        trip.save(update_fields=['status', 'updated_at'])
-        
-        # Обновляем статистику
-        if trip.driver:
-            trip.driver.trips_completed_as_driver += 1
-            trip.driver.save(update_fields=['trips_completed_as_driver'])
-        if trip.passenger:
-            trip.passenger.trips_completed_as_passenger += 1
-            trip.passenger.save(update_fields=['trips_completed_as_passenger'])
+        # Обновляем статистику (F() - без гонки с параллельными завершениями)
+        User.objects.filter(pk=trip.driver_id).update(
+            trips_completed_as_driver=F('trips_completed_as_driver') + 1
+        )
+        User.objects.filter(pk=trip.passenger_id).update(
+            trips_completed_as_passenger=F('trips_completed_as_passenger') + 1
+        )
+        refresh_driver_directory([trip.driver_id])
+        invalidate_profiles([trip.driver_id, trip.passenger_id])
         send_trip_completed_notification(trip)
         
         return Response(TripDetailSerializer(trip, context={'request': request}).data)
     
     @action(detail=True, methods=['post'])
+    @write_atomic()
     def cancel(self, request, pk=None):
         """POST /api/trips/{id}/cancel/ - отменить заказ"""
         trip = self.get_object()
@@ -210,12 +257,9 @@ class TripViewSet(viewsets.ModelViewSet):
         if user != trip.passenger and user != trip.driver:
             return Response({"detail": "Вы не участвуете в этом заказе."}, status=403)
         
-        if trip.status in ['completed', 'cancelled']:
+        if trip.status in ['completed', 'cancelled'] or not trip.cancel():
             return Response({"detail": "Этот заказ уже завершён/отменён."}, status=400)
         
-        trip.status = 'cancelled'
-        trip.save(update_fields=['status', 'updated_at'])
-        
         return Response(TripDetailSerializer(trip, context={'request': request}).data)
     
     @action(detail=False, methods=['get'], url_path='my-driver')
@@ -223,10 +267,9 @@ class TripViewSet(viewsets.ModelViewSet):
         """Поездки, которые водитель принял"""
         qs = Trip.objects.filter(driver=request.user).select_related(
             'driver', 'passenger', 'car'
-        ).order_by('-created_at')
-
-        serializer = TripListSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        )
+        qs = with_trip_review_flags(qs, request.user)
+        return keyset_paginated_response(request, qs, TripListSerializer, ('-created_at', '-id'))
 
 
 # ===================== ANNOUNCEMENT VIEWS (Объявления водителей) =====================
@@ -253,7 +296,9 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         return context
     
     def get_queryset(self):
-        return DriverAnnouncement.objects.select_related('driver', 'car').order_by('-created_at')
+        return DriverAnnouncement.objects.select_related(
+            'driver', 'car'
+        ).prefetch_related('driver__rating_stats').order_by('-created_at')
     
     def perform_create(self, serializer):
         user = self.request.user
@@ -265,39 +310,30 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my(self, request):
         """GET /api/announcements/my/ - мои объявления"""
-        qs = DriverAnnouncement.objects.filter(driver=request.user).order_by('-created_at')
-        serializer = AnnouncementListSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        qs = DriverAnnouncement.objects.filter(driver=request.user).select_related('driver', 'car')
+        return keyset_paginated_response(request, qs, AnnouncementListSerializer, ('-created_at', '-id'))
     
     @action(detail=False, methods=['get'])
     def available(self, request):
-        """GET /api/announcements/available/ - доступные объявления для пассажиров"""
-        now = timezone.now()
-        
-        qs = DriverAnnouncement.objects.filter(
-            status='active',
-            departure_time__gt=now,
-        ).order_by('departure_time')
-        
-        if request.user.is_authenticated:
-            qs = qs.exclude(driver=request.user)
-        
-        from_loc = request.query_params.get('from')
-        to_loc = request.query_params.get('to')
-        seats = request.query_params.get('seats')
-        
-        if from_loc:
-            qs = qs.filter(from_location__icontains=from_loc)
-        if to_loc:
-            qs = qs.filter(to_location__icontains=to_loc)
-        if seats:
-            try:
-                qs = qs.filter(available_seats__gte=int(seats))
-            except ValueError:
-                pass
-        
-        serializer = AnnouncementListSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        """
+        GET /api/announcements/available/ - доступные объявления для пассажиров
+        Фильтры: ?from=bishkek&to=Ош&date=2025-01-31&seats=2&price_max=800&allow_pets=true
+        """
+        qs = search_available_announcements(request.query_params, user=request.user)
+        return keyset_paginated_response(request, qs, AnnouncementListSerializer, ('departure_time', 'id'))
+    
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        """GET /api/announcements/{id}/matches/ - подходящие заказы пассажиров для моего объявления"""
+        announcement = self.get_object()
+        if announcement.driver_id != request.user.id:
+            return Response({"detail": "Это не ваше объявление."}, status=403)
+        if announcement.status != DriverAnnouncement.Status.ACTIVE:
+            return Response({"results": []})
+        queryset = Trip.objects.select_related('passenger', 'driver', 'car')
+        queryset = with_trip_review_flags(queryset, request.user)
+        matches = trip_matches(announcement, request.user, limit=_match_limit(request), queryset=queryset)
+        return _matches_response(request, matches, TripListSerializer)
     
     @action(detail=True, methods=['get'])
     def bookings(self, request, pk=None):
@@ -307,11 +343,17 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         if announcement.driver != request.user:
             return Response({"detail": "Только владелец видит бронирования."}, status=403)
         
-        bookings = announcement.bookings.all().order_by('-created_at')
+        bookings = with_booking_review_flags(
+            announcement.bookings.select_related('passenger').prefetch_related(
+                'passenger__rating_stats'
+            ).order_by('-created_at'),
+            request.user,
+        )
         serializer = BookingSerializer(bookings, many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
+    @write_atomic()
     def cancel(self, request, pk=None):
         """POST /api/announcements/{id}/cancel/ - отменить объявление"""
         announcement = self.get_object()
@@ -342,6 +384,7 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         return Response(AnnouncementDetailSerializer(announcement, context={'request': request}).data)
     
     @action(detail=True, methods=['post'])
+    @write_atomic()
     def complete(self, request, pk=None):
         """POST /api/announcements/{id}/complete/ - завершить объявление"""
         announcement = self.get_object()
@@ -349,25 +392,58 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         if announcement.driver != request.user:
             return Response({"detail": "Это не ваше объявление."}, status=403)
         
-        announcement.status = 'completed'
-        announcement.save(update_fields=['status', 'updated_at'])
-        
-        announcement.bookings.filter(status='confirmed').update(status='completed')
+        # Завершение - набор UPDATE-ов, а не цикл по броням.
+        # expired - объявление просрочено свипером (expire_past_due), но поездка состоялась
+        if not DriverAnnouncement.objects.filter(
+            pk=announcement.pk, status__in=['active', 'full', 'expired']
+        ).update(status='completed', updated_at=timezone.now()):
+            return Response({"detail": "Объявление уже завершено/отменено."}, status=400)
+        announcement.refresh_from_db(fields=['status', 'updated_at'])
         
-        confirmed_bookings = announcement.bookings.filter(status='completed')
-        for booking in confirmed_bookings:
-            booking.passenger.trips_completed_as_passenger += 1
-            booking.passenger.save(update_fields=['trips_completed_as_passenger'])
-            send_booking_completed_notification(booking, notify_driver=False)
+        announcement.bookings.filter(status='confirmed').update(
+            status='completed', updated_at=timezone.now()
+        )
+        completed_bookings = list(
+            announcement.bookings.filter(status='completed').select_related('passenger')
+        )
+        for booking in completed_bookings:
+            booking.announcement = announcement
         
-        announcement.driver.trips_completed_as_driver += 1
-        announcement.driver.save(update_fields=['trips_completed_as_driver'])
-        if confirmed_bookings.exists():
-            send_booking_completed_notification(confirmed_bookings.first(), notify_passenger=False)
+        User.objects.filter(pk__in={booking.passenger_id for booking in completed_bookings}).update(
+            trips_completed_as_passenger=F('trips_completed_as_passenger') + 1
+        )
+        User.objects.filter(pk=announcement.driver_id).update(
+            trips_completed_as_driver=F('trips_completed_as_driver') + 1
+        )
+        refresh_driver_directory([announcement.driver_id])
+        invalidate_profiles([announcement.driver_id, *(booking.passenger_id for booking in completed_bookings)])
+        send_announcement_completed_notifications(completed_bookings)
         
         return Response(AnnouncementDetailSerializer(announcement, context={'request': request}).data)
 
 
+class AnnouncementScheduleViewSet(viewsets.ModelViewSet):
+    """CRUD для регулярных рейсов водителя (объявления создаёт materialize_schedules)"""
+    serializer_class = AnnouncementScheduleSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return AnnouncementSchedule.objects.filter(driver=self.request.user).order_by('-created_at')
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        if not user.is_driver:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("Только водители могут создавать расписания.")
+        schedule = serializer.save(driver=user)
+        # ближайшие рейсы появляются сразу, не дожидаясь периодической команды
+        materialize_schedules(schedule_ids=[schedule.id])
+
+    def perform_update(self, serializer):
+        # новые дни/время попадают в уже заполненный горизонт сразу
+        regenerate_schedule(serializer.save())
+
+
 # ===================== BOOKING VIEWS =====================
 
 class BookingViewSet(viewsets.ModelViewSet):
@@ -387,7 +463,7 @@ class BookingViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        return Booking.objects.filter(
+        qs = Booking.objects.filter(
             Q(passenger=user) | Q(announcement__driver=user)
         ).select_related(
             'passenger',
@@ -395,11 +471,14 @@ class BookingViewSet(viewsets.ModelViewSet):
             'announcement__driver',
             'announcement__from_location',
             'announcement__to_location',
-        ).order_by('-created_at')
+        ).prefetch_related('passenger__rating_stats').order_by('-created_at')
+        return with_booking_review_flags(qs, user)
 
     def perform_create(self, serializer):
-        booking = serializer.save()
-        send_booking_created_notification(booking)
+        # бронь и уведомление в очереди - одной транзакцией
+        with transaction.atomic():
+            booking = serializer.save()
+            send_booking_created_notification(booking)
     
     @action(detail=False, methods=['get'])
     def my(self, request):
@@ -410,9 +489,9 @@ class BookingViewSet(viewsets.ModelViewSet):
             'announcement__driver',
             'announcement__from_location',
             'announcement__to_location',
-        ).order_by('-created_at')
-        serializer = BookingSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        ).prefetch_related('passenger__rating_stats')
+        qs = with_booking_review_flags(qs, request.user)
+        return keyset_paginated_response(request, qs, BookingSerializer, ('-created_at', '-id'))
     
     @action(detail=False, methods=['get'])
     def incoming(self, request):
@@ -425,10 +504,10 @@ class BookingViewSet(viewsets.ModelViewSet):
             'announcement__driver',
             'announcement__from_location',
             'announcement__to_location',
-        ).order_by('-created_at')
-        # КРИТИЧНО: передаём context с request для has_review_from_me
-        serializer = BookingSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data)
+        ).prefetch_related('passenger__rating_stats')
+        qs = with_booking_review_flags(qs, request.user)
+        # КРИТИЧНО: keyset_paginated_response передаёт context с request для has_review_from_me
+        return keyset_paginated_response(request, qs, BookingSerializer, ('-created_at', '-id'))
     
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
@@ -441,18 +520,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         if booking.status != 'pending':
             return Response({"detail": "Это бронирование уже обработано."}, status=400)
         
-        announcement = booking.announcement
-        if not announcement.can_book(booking.seats_count):
-            return Response({"detail": "Недостаточно свободных мест."}, status=400)
-        
-        booking.status = 'confirmed'
-        booking.save(update_fields=['status', 'updated_at'])
-        
-        announcement.booked_seats += booking.seats_count
-        if announcement.free_seats <= 0:
-            announcement.status = 'full'
-        announcement.save(update_fields=['booked_seats', 'status', 'updated_at'])
-        send_booking_status_notification(booking)
+        # места списываются условным UPDATE (trips/inventory.py), уведомление - в той же транзакции
+        with write_atomic():
+            error = confirm_booking(booking)
+            if error is None:
+                send_booking_status_notification(booking)
+        if error:
+            return Response({"detail": error}, status=400)
         # ИСПРАВЛЕНО: добавлен context
         return Response(BookingSerializer(booking, context={'request': request}).data)
     
@@ -464,13 +538,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         if booking.announcement.driver != request.user:
             return Response({"detail": "Только владелец может отклонить."}, status=403)
         
-        if booking.status != 'pending':
+        with write_atomic():
+            rejected = reject_booking(booking, request.data.get('comment', ''))
+            if rejected:
+                send_booking_status_notification(booking)
+        if not rejected:
             return Response({"detail": "Это бронирование уже обработано."}, status=400)
-        
-        booking.status = 'rejected'
-        booking.driver_comment = request.data.get('comment', '')
-        booking.save(update_fields=['status', 'driver_comment', 'updated_at'])
-        send_booking_status_notification(booking)
         # ИСПРАВЛЕНО: добавлен context
         return Response(BookingSerializer(booking, context={'request': request}).data)
     
@@ -482,19 +555,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         if booking.passenger != request.user:
             return Response({"detail": "Это не ваше бронирование."}, status=403)
         
-        if booking.status not in ['pending', 'confirmed']:
+        with write_atomic():
+            cancelled = cancel_booking(booking)
+            if cancelled:
+                send_booking_status_notification(booking)
+        if not cancelled:
             return Response({"detail": "Это бронирование нельзя отменить."}, status=400)
-        
-        if booking.status == 'confirmed':
-            announcement = booking.announcement
-            announcement.booked_seats -= booking.seats_count
-            if announcement.status == 'full':
-                announcement.status = 'active'
-            announcement.save(update_fields=['booked_seats', 'status', 'updated_at'])
-        
-        booking.status = 'cancelled'
-        booking.save(update_fields=['status', 'updated_at'])
-        send_booking_status_notification(booking)
         # ИСПРАВЛЕНО: добавлен context
         return Response(BookingSerializer(booking, context={'request': request}).data)
 
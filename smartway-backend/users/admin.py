@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import User, Car, VerificationRequest
+from .authentication import revoke_user_tokens
+from .directory import refresh_driver_directory
+from .profile_cache import invalidate_profiles
+from .models import User, Car, VerificationRequest, UserRatingStats, DriverDirectoryEntry
 
 
 @admin.register(User)
@@ -51,19 +54,34 @@ class UserAdmin(admin.ModelAdmin):
     
     @admin.action(description="Подтвердить как водителя")
     def verify_as_driver(self, request, queryset):
+        # id до update: в отфильтрованном по этому полю списке queryset потом пуст
+        ids = list(queryset.values_list('id', flat=True))
         queryset.update(is_verified_driver=True)
+        revoke_user_tokens(ids)
+        invalidate_profiles(ids)
+        refresh_driver_directory(ids)
     
     @admin.action(description="Подтвердить как пассажира")
     def verify_as_passenger(self, request, queryset):
+        ids = list(queryset.values_list('id', flat=True))
         queryset.update(is_verified_passenger=True)
+        revoke_user_tokens(ids)
+        invalidate_profiles(ids)
     
     @admin.action(description="Снять верификацию водителя")
     def unverify_driver(self, request, queryset):
+        ids = list(queryset.values_list('id', flat=True))
         queryset.update(is_verified_driver=False)
+        revoke_user_tokens(ids)
+        invalidate_profiles(ids)
+        refresh_driver_directory(ids)
     
     @admin.action(description="Снять верификацию пассажира")
     def unverify_passenger(self, request, queryset):
+        ids = list(queryset.values_list('id', flat=True))
         queryset.update(is_verified_passenger=False)
+        revoke_user_tokens(ids)
+        invalidate_profiles(ids)
 
 
 @admin.register(Car)
@@ -99,11 +117,17 @@ class CarAdmin(admin.ModelAdmin):
     
     @admin.action(description="Подтвердить авто")
     def verify_cars(self, request, queryset):
+        owner_ids = list(queryset.values_list('owner_id', flat=True))
         queryset.update(is_verified=True)
+        invalidate_profiles(owner_ids)
+        refresh_driver_directory(owner_ids)
     
     @admin.action(description="Снять подтверждение авто")
     def unverify_cars(self, request, queryset):
+        owner_ids = list(queryset.values_list('owner_id', flat=True))
         queryset.update(is_verified=False)
+        invalidate_profiles(owner_ids)
+        refresh_driver_directory(owner_ids)
 
 
 @admin.register(VerificationRequest)
@@ -160,4 +184,40 @@ class VerificationRequestAdmin(admin.ModelAdmin):
             status='rejected',
             reviewed_by=request.user,
             reviewed_at=timezone.now()
-        )
\ No newline at end of file
+        )
+
+
+@admin.register(UserRatingStats)
+class UserRatingStatsAdmin(admin.ModelAdmin):
+    """Только просмотр: значения ведутся сигналами и rebuild_rating_stats"""
+    list_display = (
+        'user', 'role', 'reviews_count', 'rating_sum',
+        'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5', 'updated_at'
+    )
+    list_filter = ('role',)
+    search_fields = ('user__phone_number', 'user__full_name')
+    raw_id_fields = ('user',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DriverDirectoryEntry)
+class DriverDirectoryEntryAdmin(admin.ModelAdmin):
+    """Только просмотр: строки ведутся users/directory.py и rebuild_driver_directory"""
+    list_display = (
+        'driver', 'full_name', 'city', 'is_verified_driver',
+        'average_rating', 'trips_completed', 'max_seats', 'updated_at'
+    )
+    list_filter = ('is_verified_driver',)
+    search_fields = ('full_name', 'driver__phone_number')
+    raw_id_fields = ('driver',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,125 @@
+# users/authentication.py
+"""
+JWT без загрузки пользователя на каждый запрос.
+
+Access-токен несёт горячие claims (id, роль, флаги верификации, версию
+авторизации). PrincipalJWTAuthentication собирает из них
+TokenUser - настоящий экземпляр User с отложенными полями, так что ORM-фильтры,
+FK и сравнения работают как раньше, а строка из БД читается только если
+view обратится к другим полям.
+
+Отзыв: в токене лежит User.auth_version. Версия кэшируется в общем для всех
+процессов Django cache (CACHES) и сбрасывается при сохранении пользователя -
+в любом воркере или management-команде. Любое изменение PRINCIPAL_FIELDS
+её увеличивает (users/signals.py, действия админки), и токены с устаревшими
+claims перестают приниматься. Refresh (users/token/refresh/) перечитывает
+пользователя и выдаёт токены с актуальными claims.
+"""
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import TokenUser, User
+
+
+# Поля User, которые кладутся в токен и из которых собирается TokenUser
+PRINCIPAL_FIELDS = ("is_driver", "is_verified_driver", "is_verified_passenger", "is_active")
+AUTH_VERSION_CLAIM = "ver"
+
+AUTH_VERSION_CACHE_KEY = "users:auth_version:{user_id}"
+AUTH_VERSION_CACHE_TIMEOUT = 24 * 60 * 60
+# Пользователь удалён или деактивирован - в кэше храним это явно
+INACTIVE = -1
+
+
+def _version_key(user_id):
+    return AUTH_VERSION_CACHE_KEY.format(user_id=user_id)
+
+
+def get_auth_version(user_id):
+    """Текущая auth_version активного пользователя или INACTIVE (обычно без запроса к БД)"""
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id, is_active=True)
+            .values_list("auth_version", flat=True)
+            .first()
+        )
+        if version is None:
+            version = INACTIVE
+        cache.set(_version_key(user_id), version, AUTH_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def forget_auth_version(user_id):
+    """Сбросить закэшированную версию (пользователь сохранён - мог быть деактивирован)"""
+    cache.delete(_version_key(user_id))
+
+
+def revoke_user_tokens(user_ids):
+    """Отозвать токены пользователей (для массовых queryset.update в обход сигналов)"""
+    user_ids = list(user_ids)
+    User.objects.filter(pk__in=user_ids).update(auth_version=F("auth_version") + 1)
+    for user_id in user_ids:
+        forget_auth_version(user_id)
+
+
+def revoke_tokens(user):
+    """Отозвать все выданные пользователю токены"""
+    revoke_user_tokens([user.pk])
+    user.refresh_from_db(fields=["auth_version"])
+
+
+def tokens_for_user(user):
+    """RefreshToken с горячими claims (копируются и в access-токен)"""
+    refresh = RefreshToken.for_user(user)
+    for field in PRINCIPAL_FIELDS:
+        refresh[field] = getattr(user, field)
+    refresh[AUTH_VERSION_CLAIM] = user.auth_version
+    return refresh
+
+
+def principal_from_token(validated_token):
+    """TokenUser из claims: загружены только id, PRINCIPAL_FIELDS и auth_version"""
+    claims = {field: validated_token[field] for field in PRINCIPAL_FIELDS}
+    claims["id"] = validated_token[api_settings.USER_ID_CLAIM]
+    claims["auth_version"] = validated_token[AUTH_VERSION_CLAIM]
+    # from_db ждёт значения в порядке полей модели
+    field_names = [field.attname for field in TokenUser._meta.concrete_fields if field.attname in claims]
+    return TokenUser.from_db(DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names])
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, не читающая строку пользователя для токенов из tokens_for_user"""
+
+    def get_user(self, validated_token):
+        if AUTH_VERSION_CLAIM not in validated_token:
+            # токен старого формата - как раньше, с загрузкой пользователя
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed("Токен не содержит идентификатор пользователя.", code="token_not_valid")
+        if get_auth_version(user_id) != validated_token[AUTH_VERSION_CLAIM]:
+            raise AuthenticationFailed("Токен отозван, войдите заново.", code="token_revoked")
+        return principal_from_token(validated_token)
+
+
+def refresh_tokens(raw_refresh):
+    """
+    Новая пара токенов по refresh-токену: claims берутся из БД, а не копируются
+    из старого токена, поэтому после отзыва клиент получает актуальную роль.
+    None - токен невалиден или пользователь деактивирован.
+    """
+    try:
+        refresh = RefreshToken(raw_refresh)
+    except TokenError:
+        return None
+    user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM), is_active=True).first()
+    if user is None:
+        return None
+    return tokens_for_user(user)
@@ -0,0 +1,102 @@
+# users/directory.py
+"""
+Каталог водителей (DriverDirectoryEntry).
+Список /api/users/drivers/ читает только эту таблицу; строки пересчитываются
+точечно при изменениях водителя/авто/отзывов/поездок и целиком командой
+rebuild_driver_directory.
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Car, DriverDirectoryEntry, User, UserRatingStats
+
+
+DEFAULT_BATCH_SIZE = 500
+
+# Поля User, попадающие в каталог: сохранение других полей (last_login и т.п.) его не трогает
+DIRECTORY_USER_FIELDS = {
+    "full_name", "photo", "city", "bio", "is_driver", "is_active",
+    "is_verified_driver", "trips_completed_as_driver",
+}
+
+ENTRY_FIELDS = [
+    "full_name", "photo", "city", "city_key", "bio", "is_verified_driver",
+    "trips_completed", "average_rating", "reviews_count", "rating_sort",
+    "max_seats", "cars", "updated_at",
+]
+
+# Файловые поля в снимке cars: храним имя файла, URL строит DriverDirectorySerializer
+# по текущему запросу (абсолютный, как у остальных фото в API)
+CAR_FILE_FIELDS = {"photo": "photo", "owner_photo": "owner.photo"}
+
+
+def _car_snapshot(car, data):
+    for key, source in CAR_FILE_FIELDS.items():
+        file = car
+        for attr in source.split("."):
+            file = getattr(file, attr)
+        data[key] = file.name or None
+    return data
+
+
+def _build_entry(driver):
+    from .serializers import CarListSerializer
+
+    cars = driver.directory_cars
+    stats = driver._rating_stats(UserRatingStats.Role.DRIVER)
+    average_rating = stats.average_rating if stats else None
+    return DriverDirectoryEntry(
+        driver=driver,
+        full_name=driver.full_name,
+        photo=driver.photo.name or None,
+        city=driver.city,
+        city_key=driver.city.strip().lower(),
+        bio=driver.bio,
+        is_verified_driver=driver.is_verified_driver,
+        trips_completed=driver.trips_completed_as_driver,
+        average_rating=average_rating,
+        reviews_count=stats.reviews_count if stats else 0,
+        rating_sort=average_rating or 0,
+        max_seats=max(car.passenger_seats for car in cars),
+        # owner у авто уже закэширован prefetch-ом - owner_rating без запросов
+        cars=[
+            _car_snapshot(car, data)
+            for car, data in zip(cars, CarListSerializer(cars, many=True).data)
+        ],
+    )
+
+
+def refresh_driver_directory(driver_ids):
+    """Пересчитать строки каталога: водители с активными авто - upsert, остальные - delete"""
+    driver_ids = set(driver_ids)
+    if not driver_ids:
+        return
+    drivers = (
+        User.objects
+        .filter(pk__in=driver_ids, is_driver=True, is_active=True)
+        .prefetch_related(
+            "rating_stats",
+            Prefetch("cars", queryset=Car.objects.filter(is_active=True).order_by("id"), to_attr="directory_cars"),
+        )
+    )
+    entries = [_build_entry(driver) for driver in drivers if driver.directory_cars]
+    with transaction.atomic():
+        DriverDirectoryEntry.objects.filter(
+            driver_id__in=driver_ids - {entry.driver_id for entry in entries}
+        ).delete()
+        DriverDirectoryEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["driver"],
+            update_fields=ENTRY_FIELDS,
+        )
+
+
+def rebuild_driver_directory(batch_size=DEFAULT_BATCH_SIZE):
+    """Полный пересчёт каталога пачками по id. Возвращает число строк каталога."""
+    driver_ids = set(User.objects.filter(is_driver=True).values_list("id", flat=True))
+    driver_ids |= set(DriverDirectoryEntry.objects.values_list("driver_id", flat=True))
+    driver_ids = sorted(driver_ids)
+    for start in range(0, len(driver_ids), batch_size):
+        refresh_driver_directory(driver_ids[start:start + batch_size])
+    return DriverDirectoryEntry.objects.count()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.directory import DEFAULT_BATCH_SIZE, rebuild_driver_directory
+
+
+class Command(BaseCommand):
+    help = "Пересчитать каталог водителей DriverDirectoryEntry (периодически или после деплоя)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        rows = rebuild_driver_directory(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Driver directory rows: {rows}"))
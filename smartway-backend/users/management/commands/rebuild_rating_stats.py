@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from trips.models import Review
+from users.models import UserRatingStats
+
+
+class Command(BaseCommand):
+    help = "Пересчитать UserRatingStats из всех отзывов (одна агрегация + bulk_create)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        histogram = {
+            field: Count("id", filter=Q(rating=rating))
+            for rating, field in UserRatingStats.RATING_FIELDS.items()
+        }
+        rows = (
+            Review.objects
+            .values("recipient_id", "recipient_role")
+            .annotate(reviews_count=Count("id"), rating_sum=Sum("rating"), **histogram)
+            .order_by()
+        )
+
+        stats = [
+            UserRatingStats(
+                user_id=row["recipient_id"],
+                role=row["recipient_role"],
+                reviews_count=row["reviews_count"],
+                rating_sum=row["rating_sum"] or 0,
+                **{field: row[field] for field in UserRatingStats.RATING_FIELDS.values()},
+            )
+            for row in rows.iterator()
+        ]
+
+        with transaction.atomic():
+            UserRatingStats.objects.all().delete()
+            UserRatingStats.objects.bulk_create(stats, batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt: {len(stats)}"))
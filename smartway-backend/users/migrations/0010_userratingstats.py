@@ -0,0 +1,92 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_stats(apps, schema_editor):
+    """Начальное заполнение из существующих отзывов (как rebuild_rating_stats)"""
+    Review = apps.get_model("trips", "Review")
+    UserRatingStats = apps.get_model("users", "UserRatingStats")
+
+    histogram = {
+        f"rating_{rating}": Count("id", filter=Q(rating=rating)) for rating in range(1, 6)
+    }
+    rows = (
+        Review.objects.values("recipient_id", "author__is_driver")
+        .annotate(reviews_count=Count("id"), rating_sum=Sum("rating"), **histogram)
+        .order_by()
+    )
+    UserRatingStats.objects.bulk_create(
+        [
+            UserRatingStats(
+                user_id=row["recipient_id"],
+                role="passenger" if row["author__is_driver"] else "driver",
+                reviews_count=row["reviews_count"],
+                rating_sum=row["rating_sum"] or 0,
+                **{field: row[field] for field in histogram},
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trips", "0016_keyset_pagination_indexes"),
+        ("users", "0009_user_pin_code"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserRatingStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[("driver", "Водитель"), ("passenger", "Пассажир")],
+                        max_length=10,
+                    ),
+                ),
+                ("reviews_count", models.PositiveIntegerField(default=0)),
+                ("rating_sum", models.PositiveIntegerField(default=0)),
+                ("rating_1", models.PositiveIntegerField(default=0)),
+                ("rating_2", models.PositiveIntegerField(default=0)),
+                ("rating_3", models.PositiveIntegerField(default=0)),
+                ("rating_4", models.PositiveIntegerField(default=0)),
+                ("rating_5", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rating_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика рейтинга",
+                "verbose_name_plural": "Статистика рейтингов",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "role"), name="user_rating_stats_unique_role"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_userratingstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OtpCode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("phone", models.CharField(max_length=32, unique=True)),
+                ("code", models.CharField(max_length=12)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "OTP-код",
+                "verbose_name_plural": "OTP-коды",
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:21
+
+import django.db.models.deletion
+import users.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0011_otpcode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DriverDirectoryEntry",
+            fields=[
+                (
+                    "driver",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="directory_entry",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("full_name", models.CharField(blank=True, default="", max_length=100)),
+                (
+                    "photo",
+                    models.ImageField(
+                        blank=True,
+                        null=True,
+                        upload_to=users.models.user_directory_path,
+                    ),
+                ),
+                ("city", models.CharField(blank=True, default="", max_length=100)),
+                ("city_key", models.CharField(blank=True, default="", max_length=100)),
+                ("bio", models.TextField(blank=True, default="", max_length=500)),
+                ("is_verified_driver", models.BooleanField(default=False)),
+                ("trips_completed", models.PositiveIntegerField(default=0)),
+                ("average_rating", models.FloatField(blank=True, null=True)),
+                ("reviews_count", models.PositiveIntegerField(default=0)),
+                ("rating_sort", models.FloatField(default=0)),
+                ("max_seats", models.PositiveIntegerField(default=0)),
+                ("cars", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Водитель в каталоге",
+                "verbose_name_plural": "Каталог водителей",
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "-is_verified_driver",
+                            "-rating_sort",
+                            "-trips_completed",
+                            "-driver",
+                        ],
+                        name="driver_directory_order_idx",
+                    ),
+                    models.Index(
+                        fields=["max_seats"], name="driver_directory_seats_idx"
+                    ),
+                    models.Index(fields=["city_key"], name="driver_directory_city_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def store_file_names(apps, schema_editor):
+    """В снимке cars были относительные URL (/media/...) - оставляем имена файлов"""
+    DriverDirectoryEntry = apps.get_model("users", "DriverDirectoryEntry")
+    changed = []
+    for entry in DriverDirectoryEntry.objects.only("driver_id", "cars").iterator():
+        dirty = False
+        for car in entry.cars:
+            for key in ("photo", "owner_photo"):
+                value = car.get(key)
+                if value and value.startswith(settings.MEDIA_URL):
+                    car[key] = value[len(settings.MEDIA_URL):]
+                    dirty = True
+        if dirty:
+            changed.append(entry)
+    DriverDirectoryEntry.objects.bulk_update(changed, ["cars"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0013_tokenuser_auth_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(store_file_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+
+def _average(stats):
+    if stats is None or not stats.reviews_count:
+        return None
+    return round(stats.rating_sum / stats.reviews_count, 1)
+
+
+def backfill_driver_directory(apps, schema_editor):
+    """Начальное заполнение каталога (как rebuild_driver_directory), иначе он пуст до ручного запуска"""
+    User = apps.get_model("users", "User")
+    Car = apps.get_model("users", "Car")
+    UserRatingStats = apps.get_model("users", "UserRatingStats")
+    DriverDirectoryEntry = apps.get_model("users", "DriverDirectoryEntry")
+
+    stats = {
+        row.user_id: row for row in UserRatingStats.objects.filter(role="driver").iterator()
+    }
+    cars = {}
+    for car in Car.objects.filter(is_active=True, owner__is_driver=True).order_by("id").iterator():
+        cars.setdefault(car.owner_id, []).append(car)
+
+    entries = []
+    drivers = User.objects.filter(pk__in=cars.keys(), is_driver=True, is_active=True)
+    for driver in drivers.iterator():
+        driver_stats = stats.get(driver.pk)
+        average_rating = _average(driver_stats)
+        entries.append(DriverDirectoryEntry(
+            driver=driver,
+            full_name=driver.full_name,
+            photo=driver.photo.name or None,
+            city=driver.city,
+            city_key=driver.city.strip().lower(),
+            bio=driver.bio,
+            is_verified_driver=driver.is_verified_driver,
+            trips_completed=driver.trips_completed_as_driver,
+            average_rating=average_rating,
+            reviews_count=driver_stats.reviews_count if driver_stats else 0,
+            rating_sort=average_rating or 0,
+            max_seats=max(car.passenger_seats for car in cars[driver.pk]),
+            # снимок в формате CarListSerializer, файлы - именами (users/directory.py)
+            cars=[
+                {
+                    "id": car.id,
+                    "owner": driver.pk,
+                    "owner_name": driver.full_name,
+                    "owner_photo": driver.photo.name or None,
+                    "owner_verified": driver.is_verified_driver,
+                    "owner_rating": average_rating,
+                    "brand": car.brand,
+                    "model": car.model,
+                    "year": car.year,
+                    "full_name": f"{car.brand} {car.model}" + (f" {car.year}" if car.year else ""),
+                    "photo": car.photo.name or None,
+                    "passenger_seats": car.passenger_seats,
+                    "car_type": car.car_type,
+                    "is_verified": car.is_verified,
+                }
+                for car in cars[driver.pk]
+            ],
+        ))
+    DriverDirectoryEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0014_directory_car_file_names"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_driver_directory, migrations.RunPython.noop),
+    ]
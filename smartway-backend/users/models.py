@@ -1,6 +1,6 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth.hashers import check_password, make_password
-from django.db import models
+from django.db import models, transaction
 from uuid import uuid4
 from django.core.validators import RegexValidator
 import random
@@ -95,6 +95,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     trips_completed_as_driver = models.PositiveIntegerField(default=0)
     trips_completed_as_passenger = models.PositiveIntegerField(default=0)
     
+    # Версия выданных JWT: смена роли увеличивает её и отзывает старые токены (users/authentication.py)
+    auth_version = models.PositiveIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -112,33 +115,38 @@ class User(AbstractBaseUser, PermissionsMixin):
     def has_module_perms(self, app_label):
         return bool(self.is_superuser)
     
+    def _rating_stats(self, role):
+        """
+        Агрегаты отзывов из UserRatingStats (один запрос на пользователя,
+        либо ноль - если списком сделан prefetch_related('rating_stats')).
+        """
+        by_role = self.__dict__.get('_rating_stats_by_role')
+        if by_role is None:
+            by_role = {stats.role: stats for stats in self.rating_stats.all()}
+            self.__dict__['_rating_stats_by_role'] = by_role
+        return by_role.get(role)
+
     @property
     def average_rating_as_driver(self):
         """Средний рейтинг как водителя"""
-        from trips.models import Review
-        reviews = Review.objects.filter(recipient=self, author__is_driver=False)
-        if reviews.exists():
-            return round(reviews.aggregate(models.Avg('rating'))['rating__avg'], 1)
-        return None
+        stats = self._rating_stats(UserRatingStats.Role.DRIVER)
+        return stats.average_rating if stats else None
     
     @property
     def average_rating_as_passenger(self):
         """Средний рейтинг как пассажира"""
-        from trips.models import Review
-        reviews = Review.objects.filter(recipient=self, author__is_driver=True)
-        if reviews.exists():
-            return round(reviews.aggregate(models.Avg('rating'))['rating__avg'], 1)
-        return None
+        stats = self._rating_stats(UserRatingStats.Role.PASSENGER)
+        return stats.average_rating if stats else None
     
     @property
     def reviews_count_as_driver(self):
-        from trips.models import Review
-        return Review.objects.filter(recipient=self, author__is_driver=False).count()
+        stats = self._rating_stats(UserRatingStats.Role.DRIVER)
+        return stats.reviews_count if stats else 0
     
     @property
     def reviews_count_as_passenger(self):
-        from trips.models import Review
-        return Review.objects.filter(recipient=self, author__is_driver=True).count()
+        stats = self._rating_stats(UserRatingStats.Role.PASSENGER)
+        return stats.reviews_count if stats else 0
 
     @property
     def has_pin(self) -> bool:
@@ -153,6 +161,161 @@ class User(AbstractBaseUser, PermissionsMixin):
         return check_password(raw_pin, self.pin_code)
 
 
+class TokenUser(User):
+    """
+    Пользователь, собранный из claims access-токена без запроса к БД
+    (users/authentication.py). Остальные поля отложены (deferred): первое
+    обращение к любому из них дочитывает всю строку одним запросом.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        if fields is not None:
+            deferred = self.get_deferred_fields()
+            if deferred and set(fields) <= deferred:
+                fields = list(deferred)
+        return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
+class UserRatingStats(models.Model):
+    """
+    Агрегаты отзывов о пользователе в одной роли.
+    Обновляются инкрементально при создании/удалении Review (trips/signals.py)
+    по зафиксированной в отзыве роли получателя (Review.recipient_role),
+    полностью пересчитываются командой rebuild_rating_stats.
+    """
+
+    class Role(models.TextChoices):
+        DRIVER = "driver", "Водитель"
+        PASSENGER = "passenger", "Пассажир"
+
+    RATING_FIELDS = {
+        1: "rating_1",
+        2: "rating_2",
+        3: "rating_3",
+        4: "rating_4",
+        5: "rating_5",
+    }
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="rating_stats",
+    )
+    role = models.CharField(max_length=10, choices=Role.choices)
+
+    reviews_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    # Гистограмма оценок 1..5
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Статистика рейтинга"
+        verbose_name_plural = "Статистика рейтингов"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "role"], name="user_rating_stats_unique_role"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} ({self.role}): {self.average_rating} / {self.reviews_count}"
+
+    @property
+    def average_rating(self):
+        if not self.reviews_count:
+            return None
+        return round(self.rating_sum / self.reviews_count, 1)
+
+    @property
+    def histogram(self):
+        return {rating: getattr(self, field) for rating, field in self.RATING_FIELDS.items()}
+
+    @classmethod
+    def apply_review(cls, user_id, role, rating, delta=1):
+        """
+        Учесть (delta=1) или убрать (delta=-1) одну оценку.
+        Атомарный UPDATE с F()-выражениями - параллельные отзывы не теряются.
+        """
+        changes = {
+            "reviews_count": models.F("reviews_count") + delta,
+            "rating_sum": models.F("rating_sum") + delta * rating,
+        }
+        field = cls.RATING_FIELDS.get(rating)
+        if field:
+            changes[field] = models.F(field) + delta
+
+        if delta < 0:
+            # Откат только по существующей строке: при каскадном удалении
+            # пользователя её нельзя создавать заново
+            cls.objects.filter(user_id=user_id, role=role).update(**changes)
+            return
+
+        with transaction.atomic():
+            stats, _ = cls.objects.get_or_create(user_id=user_id, role=role)
+            cls.objects.filter(pk=stats.pk).update(**changes)
+
+
+class DriverDirectoryEntry(models.Model):
+    """
+    Строка каталога водителей (GET /api/users/drivers/): денормализованная проекция
+    водителя с активными авто. Обновляется при изменении водителя, авто, отзывов
+    и завершении поездок (users/directory.py), полностью - rebuild_driver_directory.
+    """
+    driver = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="directory_entry",
+    )
+    full_name = models.CharField(max_length=100, blank=True, default="")
+    photo = models.ImageField(upload_to=user_directory_path, blank=True, null=True)
+    city = models.CharField(max_length=100, blank=True, default="")
+    # city в нижнем регистре: регистронезависимый поиск и для кириллицы
+    city_key = models.CharField(max_length=100, blank=True, default="")
+    bio = models.TextField(max_length=500, blank=True, default="")
+    is_verified_driver = models.BooleanField(default=False)
+
+    trips_completed = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(null=True, blank=True)
+    reviews_count = models.PositiveIntegerField(default=0)
+    # average_rating без NULL - ключ сортировки
+    rating_sort = models.FloatField(default=0)
+
+    # Максимум пассажирских мест среди активных авто
+    max_seats = models.PositiveIntegerField(default=0)
+    # Снимок активных авто в формате CarListSerializer; photo/owner_photo - имена файлов
+    cars = models.JSONField(default=list)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Порядок списка; driver - уникальный tie-breaker для keyset-пагинации
+    ORDERING = ("-is_verified_driver", "-rating_sort", "-trips_completed", "-driver_id")
+
+    class Meta:
+        verbose_name = "Водитель в каталоге"
+        verbose_name_plural = "Каталог водителей"
+        indexes = [
+            # Сортировка списка (и фильтр ?verified=true - префикс индекса)
+            models.Index(
+                fields=["-is_verified_driver", "-rating_sort", "-trips_completed", "-driver"],
+                name="driver_directory_order_idx",
+            ),
+            models.Index(fields=["max_seats"], name="driver_directory_seats_idx"),
+            models.Index(fields=["city_key"], name="driver_directory_city_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.driver_id}: {self.full_name} ({self.average_rating} / {self.trips_completed})"
+
+
 class Car(models.Model):
     """Модель автомобиля водителя"""
     
@@ -275,4 +438,21 @@ class VerificationRequest(models.Model):
         ordering = ["-created_at"]
     
     def __str__(self):
-        return f"Верификация {self.get_verification_type_display()} - {self.user.full_name}"
\ No newline at end of file
+        return f"Верификация {self.get_verification_type_display()} - {self.user.full_name}"
+
+
+class OtpCode(models.Model):
+    """Одноразовые коды входа (бэкенд users.otp.DatabaseOtpBackend)"""
+
+    phone = models.CharField(max_length=32, unique=True)
+    code = models.CharField(max_length=12)
+    expires_at = models.DateTimeField(db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "OTP-код"
+        verbose_name_plural = "OTP-коды"
+
+    def __str__(self):
+        return f"{self.phone} (до {self.expires_at:%d.%m %H:%M})"
@@ -1,8 +1,29 @@
 # users/otp.py
-import random
+import hmac
+import secrets
+import threading
+import time
+from datetime import timedelta
 from typing import Optional
 
-_otp_storage: dict[str, str] = {}
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# Результаты verify_otp
+OTP_OK = "ok"
+OTP_INVALID = "invalid"
+OTP_EXPIRED = "expired"
+OTP_TOO_MANY_ATTEMPTS = "too_many_attempts"
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+
+# phone -> (code, expires_at (time.time()), attempts); только для MemoryOtpBackend
+_otp_storage: dict[str, tuple[str, float, int]] = {}
+_otp_lock = threading.Lock()
 
 
 def _normalize_phone(phone: str) -> str:
@@ -10,12 +31,137 @@ def _normalize_phone(phone: str) -> str:
 
 
 def generate_otp(length: int = 4) -> str:
-    return ''.join(str(random.randint(0, 9)) for _ in range(length))
+    return ''.join(secrets.choice("0123456789") for _ in range(length))
+
+
+class MemoryOtpBackend:
+    """Словарь в памяти процесса. Не виден другим воркерам - для тестов и разработки."""
+
+    def save(self, key, code, ttl):
+        now = time.time()
+        with _otp_lock:
+            # ленивая очистка: протухшие коды удаляем при записи новых
+            for expired in [k for k, (_, expires_at, _) in _otp_storage.items() if expires_at <= now]:
+                del _otp_storage[expired]
+            _otp_storage[key] = (code, now + ttl, 0)
+
+    def get(self, key):
+        """(code, attempts) или None, если кода нет или он истёк"""
+        with _otp_lock:
+            record = _otp_storage.get(key)
+            if record is None:
+                return None
+            code, expires_at, attempts = record
+            if expires_at <= time.time():
+                del _otp_storage[key]
+                return None
+            return code, attempts
+
+    def register_attempt(self, key):
+        with _otp_lock:
+            record = _otp_storage.get(key)
+            if record is None:
+                return DEFAULT_MAX_ATTEMPTS + 1
+            code, expires_at, attempts = record
+            _otp_storage[key] = (code, expires_at, attempts + 1)
+            return attempts + 1
+
+    def delete(self, key):
+        with _otp_lock:
+            _otp_storage.pop(key, None)
+
+
+class CacheOtpBackend:
+    """Django cache: TTL выставляется самим кэшем. Для нескольких воркеров нужен общий кэш (Redis/Memcached)."""
+
+    prefix = "otp:"
+
+    def save(self, key, code, ttl):
+        cache.set_many({
+            f"{self.prefix}code:{key}": code,
+            f"{self.prefix}attempts:{key}": 0,
+        }, timeout=ttl)
+
+    def get(self, key):
+        values = cache.get_many([f"{self.prefix}code:{key}", f"{self.prefix}attempts:{key}"])
+        code = values.get(f"{self.prefix}code:{key}")
+        if code is None:
+            return None
+        return code, values.get(f"{self.prefix}attempts:{key}", 0)
+
+    def register_attempt(self, key):
+        try:
+            # incr атомарен в Redis/Memcached и не сбрасывает TTL
+            return cache.incr(f"{self.prefix}attempts:{key}")
+        except ValueError:
+            return DEFAULT_MAX_ATTEMPTS + 1
+
+    def delete(self, key):
+        cache.delete_many([f"{self.prefix}code:{key}", f"{self.prefix}attempts:{key}"])
+
+
+class DatabaseOtpBackend:
+    """Таблица users.OtpCode: общий стор без дополнительной инфраструктуры."""
+
+    def save(self, key, code, ttl):
+        from .models import OtpCode
+
+        now = timezone.now()
+        OtpCode.objects.filter(expires_at__lte=now).delete()
+        OtpCode.objects.update_or_create(
+            phone=key,
+            defaults={"code": code, "expires_at": now + timedelta(seconds=ttl), "attempts": 0},
+        )
+
+    def get(self, key):
+        from .models import OtpCode
 
+        record = OtpCode.objects.filter(phone=key).values_list("code", "expires_at", "attempts").first()
+        if record is None:
+            return None
+        code, expires_at, attempts = record
+        if expires_at <= timezone.now():
+            OtpCode.objects.filter(phone=key, expires_at__lte=timezone.now()).delete()
+            return None
+        return code, attempts
 
-def save_otp(phone: str, code: str) -> None:
+    def register_attempt(self, key):
+        from .models import OtpCode
+
+        OtpCode.objects.filter(phone=key).update(attempts=F("attempts") + 1)
+        attempts = OtpCode.objects.filter(phone=key).values_list("attempts", flat=True).first()
+        return DEFAULT_MAX_ATTEMPTS + 1 if attempts is None else attempts
+
+    def delete(self, key):
+        from .models import OtpCode
+
+        OtpCode.objects.filter(phone=key).delete()
+
+
+OTP_BACKENDS = {
+    "memory": MemoryOtpBackend,
+    "cache": CacheOtpBackend,
+    "db": DatabaseOtpBackend,
+}
+
+
+def get_backend():
+    name = getattr(settings, "OTP_BACKEND", "memory")
+    backend_class = OTP_BACKENDS.get(name) or import_string(name)
+    return backend_class()
+
+
+def _ttl():
+    return getattr(settings, "OTP_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+
+
+def _max_attempts():
+    return getattr(settings, "OTP_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+
+
+def save_otp(phone: str, code: str, ttl: Optional[int] = None) -> None:
     phone_key = _normalize_phone(phone)
-    _otp_storage[phone_key] = code
+    get_backend().save(phone_key, code, ttl or _ttl())
     print(f"[OTP] saved: phone={phone_key}, code={code}")
 
 
@@ -24,10 +170,37 @@ store_otp = save_otp
 
 
 def get_otp(phone: str) -> Optional[str]:
-    phone_key = _normalize_phone(phone)
-    return _otp_storage.get(phone_key)
+    record = get_backend().get(_normalize_phone(phone))
+    return record[0] if record else None
 
 
 def delete_otp(phone: str) -> None:
+    get_backend().delete(_normalize_phone(phone))
+
+
+def verify_otp(phone: str, code: str) -> str:
+    """
+    Проверить код. При успехе код удаляется (одноразовый).
+    Каждая неверная попытка увеличивает счётчик; после OTP_MAX_ATTEMPTS
+    код сгорает и нужно запросить новый.
+    """
+    backend = get_backend()
     phone_key = _normalize_phone(phone)
-    _otp_storage.pop(phone_key, None)
\ No newline at end of file
+
+    record = backend.get(phone_key)
+    if record is None:
+        return OTP_EXPIRED
+
+    stored_code, attempts = record
+    if attempts >= _max_attempts():
+        backend.delete(phone_key)
+        return OTP_TOO_MANY_ATTEMPTS
+
+    if hmac.compare_digest(str(stored_code), str(code)):
+        backend.delete(phone_key)
+        return OTP_OK
+
+    if backend.register_attempt(phone_key) >= _max_attempts():
+        backend.delete(phone_key)
+        return OTP_TOO_MANY_ATTEMPTS
+    return OTP_INVALID
@@ -0,0 +1,57 @@
+# users/profile_cache.py
+"""
+Готовый документ профиля для GET /api/users/me/ в общем для воркеров Django cache.
+Хранится вместе с ETag: повторный запрос с If-None-Match отвечает 304
+без сериализации и запросов к БД. Сбрасывается при изменении пользователя,
+его авто и отзывов о нём (users/signals.py, trips/signals.py).
+"""
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# В документе абсолютные URL (фото и т.п.) - ключ зависит от схемы и хоста запроса.
+# Все варианты одного пользователя сбрасываются сменой его версии
+PROFILE_VERSION_KEY = "users:profile:{user_id}:version"
+PROFILE_CACHE_KEY = "users:profile:{user_id}:{version}:{origin}"
+PROFILE_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _version_key(user_id):
+    return PROFILE_VERSION_KEY.format(user_id=user_id)
+
+
+def _key(request, user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # add - не перетираем версию, которую успел выставить параллельный запрос
+        if not cache.add(_version_key(user_id), version, PROFILE_CACHE_TIMEOUT):
+            version = cache.get(_version_key(user_id), version)
+    origin = hashlib.sha1(request.build_absolute_uri("/").encode()).hexdigest()[:16]
+    return PROFILE_CACHE_KEY.format(user_id=user_id, version=version, origin=origin)
+
+
+def get_profile_document(request, user):
+    """(etag, данные профиля) - из кэша или свежесериализованные"""
+    from .serializers import UserProfileSerializer
+
+    key = _key(request, user.pk)
+    document = cache.get(key)
+    if document is None:
+        data = UserProfileSerializer(user, context={"request": request}).data
+        payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+        document = {
+            "etag": hashlib.sha1(payload.encode()).hexdigest(),
+            "data": json.loads(payload),
+        }
+        cache.set(key, document, PROFILE_CACHE_TIMEOUT)
+    return document["etag"], document["data"]
+
+
+def invalidate_profiles(user_ids):
+    """Сбросить кэшированные профили пользователей (для всех хостов сразу)"""
+    cache.delete_many([_version_key(user_id) for user_id in set(user_ids) if user_id])
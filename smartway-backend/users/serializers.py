@@ -1,5 +1,6 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import User, Car, VerificationRequest
+from .models import User, Car, DriverDirectoryEntry, VerificationRequest
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -94,7 +95,8 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
     """Сериализатор для обновления профиля"""
     class Meta:
         model = User
-        fields = ('full_name', 'photo', 'bio', 'city', 'birth_date', 'is_driver')
+        # Роль меняется только через /me/switch-role/: она зашита в токен
+        fields = ('full_name', 'photo', 'bio', 'city', 'birth_date')
     
     def validate_full_name(self, value):
         if value and len(value.strip()) < 2:
@@ -241,6 +243,33 @@ class VerificationRequestCreateSerializer(serializers.ModelSerializer):
 
 # ===================== DRIVER LIST SERIALIZER =====================
 
+class DriverDirectorySerializer(serializers.ModelSerializer):
+    """Строка каталога водителей - те же поля, что у DriverWithCarsSerializer, без запросов"""
+    id = serializers.ReadOnlyField(source='driver_id')
+    trips_completed_as_driver = serializers.ReadOnlyField(source='trips_completed')
+    cars = serializers.JSONField(read_only=True)
+
+    class Meta:
+        model = DriverDirectoryEntry
+        fields = (
+            'id', 'full_name', 'photo', 'city', 'bio',
+            'is_verified_driver', 'trips_completed_as_driver',
+            'average_rating', 'reviews_count', 'cars'
+        )
+
+    def to_representation(self, instance):
+        from .directory import CAR_FILE_FIELDS
+
+        ret = super().to_representation(instance)
+        request = self.context.get('request')
+        for car in ret['cars']:
+            for key in CAR_FILE_FIELDS:
+                if car.get(key):
+                    url = default_storage.url(car[key])
+                    car[key] = request.build_absolute_uri(url) if request else url
+        return ret
+
+
 class DriverWithCarsSerializer(serializers.ModelSerializer):
     """Водитель со списком его автомобилей (для пассажиров)"""
     cars = CarListSerializer(many=True, read_only=True, source='active_cars')
@@ -0,0 +1,75 @@
+# users/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .directory import DIRECTORY_USER_FIELDS, refresh_driver_directory
+from .authentication import PRINCIPAL_FIELDS, forget_auth_version, revoke_tokens
+from .models import Car, TokenUser, User
+from .profile_cache import invalidate_profiles
+
+
+# Сохранение только этих полей не меняет профиль /api/users/me/
+NON_PROFILE_USER_FIELDS = {"last_login", "password"}
+
+
+# TokenUser - proxy: его сохранения приходят с sender=TokenUser
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=TokenUser)
+def detect_principal_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Запомнить, меняются ли поля, зашитые в токен (сравнение со строкой в БД)"""
+    instance._principal_changed = False
+    if raw or instance._state.adding:
+        return
+    # отложенные поля TokenUser не сохраняются - их и не сравниваем
+    fields = [
+        field for field in PRINCIPAL_FIELDS
+        if field in instance.__dict__ and (update_fields is None or field in update_fields)
+    ]
+    if not fields:
+        return
+    stored = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._principal_changed = stored is not None and any(
+        stored[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TokenUser)
+def forget_auth_version_on_user_save(sender, instance, created, raw=False, **kwargs):
+    if created:
+        return
+    if getattr(instance, "_principal_changed", False):
+        # claims выданных токенов устарели
+        instance._principal_changed = False
+        revoke_tokens(instance)
+    else:
+        forget_auth_version(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TokenUser)
+def invalidate_profile_on_user_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and set(update_fields) <= NON_PROFILE_USER_FIELDS:
+        return
+    invalidate_profiles([instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TokenUser)
+def refresh_directory_on_user_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or (created and not instance.is_driver):
+        return
+    if update_fields is not None and not DIRECTORY_USER_FIELDS & set(update_fields):
+        return
+    refresh_driver_directory([instance.pk])
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+def refresh_directory_on_car_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_profiles([instance.owner_id])
+    refresh_driver_directory([instance.owner_id])
@@ -18,19 +18,21 @@ API_BASE_URL = getattr(
 )
 
 TELEGRAM_SEND_MESSAGE_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+# Таймаут одного запроса к Telegram, сек
+TELEGRAM_TIMEOUT_SECONDS = 5
 
 
-def send_telegram_message(chat_id: int, text: str, reply_markup: dict | None = None) -> None:
+def post_telegram_message(chat_id: int, text: str, reply_markup: dict | None = None) -> tuple[int | None, str]:
     """
-    Универсальная отправка сообщения в Telegram.
-    Безопасно логируем ошибки, чтобы не ломать основной поток.
+    Отправка сообщения в Telegram с ответом API: (HTTP-статус, описание ошибки).
+    Статус None - запрос не состоялся (нет токена, сеть, таймаут).
     """
     if not TELEGRAM_BOT_TOKEN or requests is None:
         logger.warning("TELEGRAM_BOT_TOKEN is not configured, skipping message")
-        return
+        return None, "TELEGRAM_BOT_TOKEN не настроен"
 
     if not chat_id:
-        return
+        return None, "Нет chat_id"
 
     try:
         payload = {
@@ -45,12 +47,25 @@ def send_telegram_message(chat_id: int, text: str, reply_markup: dict | None = N
         resp = requests.post(
             TELEGRAM_SEND_MESSAGE_URL,
             json=payload,
-            timeout=5,
+            timeout=TELEGRAM_TIMEOUT_SECONDS,
         )
         if resp.status_code != 200:
             logger.warning("Telegram send failed: %s %s", resp.status_code, resp.text)
-    except Exception:
+            return resp.status_code, resp.text[:500]
+        return resp.status_code, ""
+    except Exception as exc:
         logger.exception("Error sending Telegram message")
+        return None, str(exc)[:500]
+
+
+def send_telegram_message(chat_id: int, text: str, reply_markup: dict | None = None) -> bool:
+    """
+    Универсальная отправка сообщения в Telegram.
+    Безопасно логируем ошибки, чтобы не ломать основной поток.
+    Возвращает True, если Telegram принял сообщение.
+    """
+    status, _ = post_telegram_message(chat_id, text, reply_markup)
+    return status == 200
 
 
 def send_otp_message(chat_id: int, code: str) -> None:
@@ -64,7 +79,7 @@ def send_otp_message(chat_id: int, code: str) -> None:
                 "chat_id": chat_id,
                 "text": f"Ваш код для входа в SmartWay: {code}",
             },
-            timeout=5,
+            timeout=TELEGRAM_TIMEOUT_SECONDS,
         )
         logger.info("Telegram response: %s %s", resp.status_code, resp.text)
     except Exception:
@@ -1,8 +1,9 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 # Create your tests here.
 from users.models import User
+from users import otp
 from users.otp import save_otp
 
 
@@ -71,4 +72,35 @@ class PinAuthenticationTests(APITestCase):
             {"phone_number": self.phone, "pin_code": "1111"},
             format="json",
         )
-        self.assertEqual(response_bad_pin.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response_bad_pin.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OtpStoreTests(TestCase):
+    phone = "+996700000701"
+
+    def _check_backend(self, backend):
+        with override_settings(OTP_BACKEND=backend, OTP_MAX_ATTEMPTS=3):
+            save_otp(self.phone, "1234")
+            self.assertEqual(otp.verify_otp(self.phone, "0000"), otp.OTP_INVALID)
+            self.assertEqual(otp.verify_otp(self.phone, "1234"), otp.OTP_OK)
+            # код одноразовый
+            self.assertEqual(otp.verify_otp(self.phone, "1234"), otp.OTP_EXPIRED)
+
+            save_otp(self.phone, "4321")
+            self.assertEqual(otp.verify_otp(self.phone, "0000"), otp.OTP_INVALID)
+            self.assertEqual(otp.verify_otp(self.phone, "0001"), otp.OTP_INVALID)
+            self.assertEqual(otp.verify_otp(self.phone, "0002"), otp.OTP_TOO_MANY_ATTEMPTS)
+            # после исчерпания попыток верный код уже не принимается
+            self.assertEqual(otp.verify_otp(self.phone, "4321"), otp.OTP_EXPIRED)
+
+            save_otp(self.phone, "5555", ttl=-1)
+            self.assertEqual(otp.verify_otp(self.phone, "5555"), otp.OTP_EXPIRED)
+
+    def test_memory_backend(self):
+        self._check_backend("memory")
+
+    def test_cache_backend(self):
+        self._check_backend("cache")
+
+    def test_db_backend(self):
+        self._check_backend("db")
@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    SendOtpView, VerifyOtpView, PinLoginView, get_token_for_verified_user,
+    SendOtpView, VerifyOtpView, PinLoginView, get_token_for_verified_user, refresh_token_view,
     MyProfileView, UserPublicProfileView, UploadPhotoView,
     UploadDriverDocumentsView, SwitchRoleView,
     CarViewSet, PublicCarDetailView,
@@ -21,6 +21,7 @@ urlpatterns = [
     path('verify-otp/', VerifyOtpView.as_view(), name='verify-otp'),
     path('login-pin/', PinLoginView.as_view(), name='login-pin'),
     path('token/', get_token_for_verified_user, name='get-token'),
+    path('token/refresh/', refresh_token_view, name='token-refresh'),
     
     # Profile
     path('me/', MyProfileView.as_view(), name='my-profile'),
@@ -1,26 +1,28 @@
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.decorators import api_view, action
+from rest_framework.decorators import api_view, action, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Avg, Count, Q
+from django.utils.http import parse_etags
 
-from .models import User, Car, VerificationRequest
+from .models import User, Car, DriverDirectoryEntry, VerificationRequest
 from .serializers import (
     UserSerializer, UserShortSerializer, UserPublicSerializer,
     UserProfileSerializer, UserProfileUpdateSerializer,
     DriverDocumentUploadSerializer,
     CarSerializer, CarCreateUpdateSerializer, CarListSerializer,
     VerificationRequestSerializer, VerificationRequestCreateSerializer,
-    DriverWithCarsSerializer
+    DriverWithCarsSerializer, DriverDirectorySerializer
 )
-from .otp import get_otp, delete_otp
+from .authentication import refresh_tokens, tokens_for_user
+from .profile_cache import get_profile_document
+from .otp import OTP_OK, OTP_EXPIRED, OTP_TOO_MANY_ATTEMPTS, verify_otp
 from trips.serializers import ReviewSerializer
 from trips.models import Review
+from trips.pagination import KeysetPagination
 
 
 def normalize_phone(phone: str) -> str:
@@ -91,16 +93,24 @@ class VerifyOtpView(APIView):
             )
         
         normalized_phone = normalize_phone(phone)
-        stored_code = get_otp(normalized_phone)
+        result = verify_otp(normalized_phone, code)
         
-        if stored_code is None or stored_code != code:
+        if result == OTP_TOO_MANY_ATTEMPTS:
+            return Response(
+                {"detail": "Too many attempts, request a new OTP"},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        if result == OTP_EXPIRED:
+            return Response(
+                {"detail": "OTP expired, request a new one"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if result != OTP_OK:
             return Response(
                 {"detail": "Invalid OTP"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        delete_otp(normalized_phone)
-        
         user = User.objects.filter(phone_number=normalized_phone).first()
         created = False
         
@@ -150,7 +160,7 @@ class VerifyOtpView(APIView):
         if created or changed:
             user.save()
         
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         return Response({
             "access": str(refresh.access_token),
             "refresh": str(refresh),
@@ -192,7 +202,7 @@ class PinLoginView(APIView):
         if not user.check_pin(pin_code):
             return Response({"detail": "Invalid PIN"}, status=status.HTTP_400_BAD_REQUEST)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         return Response({
             "access": str(refresh.access_token),
             "refresh": str(refresh),
@@ -219,6 +229,15 @@ class MyProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
     
+    def retrieve(self, request, *args, **kwargs):
+        # Документ профиля кэшируется целиком; If-None-Match с тем же ETag - 304 без тела
+        etag, data = get_profile_document(request, request.user)
+        quoted = f'"{etag}"'
+        headers = {"ETag": quoted, "Cache-Control": "private, no-cache"}
+        if quoted in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+    
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', True)
         instance = self.get_object()
@@ -301,9 +320,14 @@ class SwitchRoleView(APIView):
         user.is_driver = (new_role == 'driver')
         user.save(update_fields=['is_driver', 'updated_at'])
         
+        # Роль зашита в токен: сохранение отзывает старые токены (users/signals.py),
+        # клиенту отдаём новые
+        refresh = tokens_for_user(user)
         return Response({
             "message": f"Роль изменена на {'водителя' if user.is_driver else 'пассажира'}",
-            "is_driver": user.is_driver
+            "is_driver": user.is_driver,
+            "access": str(refresh.access_token),
+            "refresh": str(refresh),
         })
 
 
@@ -362,23 +386,25 @@ class PublicCarDetailView(generics.RetrieveAPIView):
 
 # ===================== DRIVERS LIST (FOR PASSENGERS) =====================
 
+class DriverDirectoryPagination(KeysetPagination):
+    """Порядок каталога: верифицированные, рейтинг, число поездок"""
+
+    def __init__(self):
+        super().__init__(ordering=DriverDirectoryEntry.ORDERING)
+
+
 class DriversListView(generics.ListAPIView):
     """
     GET /api/users/drivers/ - список водителей с их авто (для пассажиров)
     Фильтры: ?seats_min=4&verified=true&city=Бишкек
+    Читает только каталог DriverDirectoryEntry (?page_size, ?cursor).
     """
     permission_classes = [IsAuthenticated]
-    serializer_class = DriverWithCarsSerializer
+    serializer_class = DriverDirectorySerializer
+    pagination_class = DriverDirectoryPagination
     
     def get_queryset(self):
-        queryset = User.objects.filter(
-            is_driver=True,
-            is_active=True,
-            cars__is_active=True  # Только водители с активными авто
-        ).distinct().annotate(
-            avg_rating=Avg('received_reviews__rating', filter=Q(received_reviews__author__is_driver=False)),
-            total_trips=Count('driver_trips', filter=Q(driver_trips__status='completed'))
-        ).order_by('-is_verified_driver', '-avg_rating', '-total_trips')
+        queryset = DriverDirectoryEntry.objects.all()
         
         # Фильтры
         verified = self.request.query_params.get('verified')
@@ -387,12 +413,12 @@ class DriversListView(generics.ListAPIView):
         
         city = self.request.query_params.get('city')
         if city:
-            queryset = queryset.filter(city__icontains=city)
+            queryset = queryset.filter(city_key__contains=city.strip().lower())
         
         seats_min = self.request.query_params.get('seats_min')
         if seats_min:
             try:
-                queryset = queryset.filter(cars__passenger_seats__gte=int(seats_min))
+                queryset = queryset.filter(max_seats__gte=int(seats_min))
             except ValueError:
                 pass
         
@@ -530,10 +556,27 @@ def get_token_for_verified_user(request):
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
     
-    refresh = RefreshToken.for_user(user)
+    refresh = tokens_for_user(user)
     
     return Response({
         'refresh': str(refresh),
         'access': str(refresh.access_token),
         'user': UserProfileSerializer(user).data
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['POST'])
+@authentication_classes([])  # access-токен может быть уже отозван
+@permission_classes([AllowAny])
+def refresh_token_view(request):
+    """Новая пара токенов по refresh; роль и флаги читаются из БД заново"""
+    refresh = refresh_tokens(request.data.get("refresh") or "")
+    if refresh is None:
+        return Response(
+            {"detail": "Токен недействителен или истёк.", "code": "token_not_valid"},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    return Response({
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    })
@@ -0,0 +1,59 @@
+# users/ws_auth.py
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import PrincipalJWTAuthentication
+
+# Браузер не умеет ставить заголовки на WebSocket, поэтому токен передаётся
+# либо в ?token=<access>, либо подпротоколами: new WebSocket(url, ["bearer", access])
+TOKEN_QUERY_PARAM = "token"
+BEARER_SUBPROTOCOL = "bearer"
+
+
+def _token_from_scope(scope):
+    """(токен, подпротокол для accept) из query string или Sec-WebSocket-Protocol"""
+    subprotocols = list(scope.get("subprotocols") or [])
+    if BEARER_SUBPROTOCOL in subprotocols:
+        index = subprotocols.index(BEARER_SUBPROTOCOL)
+        if index + 1 < len(subprotocols):
+            return subprotocols[index + 1], BEARER_SUBPROTOCOL
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    token = (query.get(TOKEN_QUERY_PARAM) or [""])[0]
+    return token or None, None
+
+
+@database_sync_to_async
+def _user_from_token(raw_token):
+    auth = PrincipalJWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Аутентификация WebSocket по access-токену SimpleJWT.
+    Валидный токен заменяет scope["user"]; без токена остаётся пользователь сессии (или аноним).
+    Консьюмер должен принять соединение с scope["auth_subprotocol"], если токен пришёл подпротоколом.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token, subprotocol = _token_from_scope(scope)
+        if raw_token:
+            user = await _user_from_token(raw_token)
+            if user is not None:
+                scope["user"] = user
+                scope["auth_subprotocol"] = subprotocol
+        return await super().__call__(scope, receive, send)
+
+
+def JWTAuthMiddlewareStack(inner):
+    return AuthMiddlewareStack(JWTAuthMiddleware(inner))
@@ -1,5 +1,7 @@
 // src/api/announcements.ts
 import api from './client';
+import { fetchPage, MAX_PAGE_SIZE } from './pagination';
+import type { Page } from './pagination';
 import type { SearchFilters } from '../components/SearchFilter'; // если ещё нет
 
 export interface Announcement {
@@ -111,7 +113,8 @@ function getLang(explicitLang?: string) {
 export async function fetchAvailableAnnouncements(
   filters?: SearchFilters,
   lang?: string,
-): Promise<Announcement[]> {
+  cursor?: string | null,
+): Promise<Page<Announcement>> {
   const lng = getLang(lang);
 
   const params: Record<string, any> = {};
@@ -120,27 +123,20 @@ export async function fetchAvailableAnnouncements(
   if (filters?.date) params.date = filters.date;
   params.lang = lng;
 
-  const response = await api.get('/announcements/available/', {
+  return fetchPage('/announcements/available/', {
     params,
     headers: { 'Accept-Language': lng },
-  });
-
-  if (Array.isArray(response.data)) return response.data;
-  if (response.data?.results) return response.data.results;
-  return [];
+  }, cursor);
 }
 
 export async function fetchMyAnnouncements(lang?: string): Promise<Announcement[]> {
   const lng = getLang(lang);
 
-  const resp = await api.get('/announcements/my/', {
-    params: { lang: lng },
+  const page = await fetchPage<Announcement>('/announcements/my/', {
+    params: { lang: lng, page_size: MAX_PAGE_SIZE },
     headers: { 'Accept-Language': lng },
   });
-
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  return page.results;
 }
 
 export async function getAnnouncementDetail(id: number, lang?: string): Promise<Announcement> {
@@ -180,21 +176,18 @@ export async function getAnnouncementBookings(id: number): Promise<Booking[]> {
 // ============ Bookings API ============
 
 export async function fetchMyBookings(): Promise<Booking[]> {
-  const resp = await api.get('/bookings/my/');
-  return resp.data;
+  const page = await fetchPage<Booking>('/bookings/my/', { params: { page_size: MAX_PAGE_SIZE } });
+  return page.results;
 }
 
 export async function fetchIncomingBookings(lang?: string): Promise<Booking[]> {
   const lng = getLang(lang);
 
-  const resp = await api.get('/bookings/incoming/', {
-    params: { lang: lng },
+  const page = await fetchPage<Booking>('/bookings/incoming/', {
+    params: { lang: lng, page_size: MAX_PAGE_SIZE },
     headers: { 'Accept-Language': lng },
   });
-
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  return page.results;
 }
 
 export async function createBooking(data: {
@@ -1,5 +1,6 @@
 // src/api/auth.ts
 import api from './client';
+import { fetchPage, MAX_PAGE_SIZE } from './pagination';
 
 // === Типы ===
 export interface User {
@@ -178,6 +179,13 @@ export async function updateProfile(data: Partial<User>): Promise<User> {
  */
 export async function switchRole(role: 'driver' | 'passenger'): Promise<{ is_driver: boolean; message?: string }> {
   const response = await api.post('/users/me/switch-role/', { role });
+  // Роль зашита в токен: сервер отзывает старые токены и присылает новые
+  if (response.data.access) {
+    localStorage.setItem('access_token', response.data.access);
+  }
+  if (response.data.refresh) {
+    localStorage.setItem('refresh_token', response.data.refresh);
+  }
   return response.data;
 }
 
@@ -203,18 +211,8 @@ export async function uploadPhoto(file: File): Promise<User> {
  * Получить мои автомобили
  */
 export async function getMyCars(): Promise<Car[]> {
-  const response = await api.get('/users/cars/');
-  
-  // Обработка пагинированного ответа
-  if (Array.isArray(response.data)) {
-    return response.data;
-  }
-  if (response.data && Array.isArray(response.data.results)) {
-    return response.data.results;
-  }
-  
-  console.warn('Unexpected cars response format:', response.data);
-  return [];
+  const page = await fetchPage<Car>('/users/cars/', { params: { page_size: MAX_PAGE_SIZE } });
+  return page.results;
 }
 
 /**
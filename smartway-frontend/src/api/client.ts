@@ -12,4 +12,24 @@ api.interceptors.request.use((config) => {
   if (token) config.headers['Authorization'] = `Bearer ${token}`;
   return config;
 });
+
+// Роль и флаги верификации зашиты в access-токен: после их смены сервер отзывает
+// токен (401 token_revoked). Один раз обновляем пару по refresh и повторяем запрос.
+api.interceptors.response.use(undefined, async (error) => {
+  const config = error.config;
+  const refresh = localStorage.getItem('refresh_token');
+  if (
+    error.response?.status !== 401 ||
+    error.response?.data?.code !== 'token_revoked' ||
+    !refresh || !config || config._retried
+  ) {
+    return Promise.reject(error);
+  }
+  config._retried = true;
+  const { data } = await axios.post(`${import.meta.env.VITE_API_URL}/users/token/refresh/`, { refresh });
+  localStorage.setItem('access_token', data.access);
+  if (data.refresh) localStorage.setItem('refresh_token', data.refresh);
+  config.headers['Authorization'] = `Bearer ${data.access}`;
+  return api(config);
+});
 export default api;
@@ -0,0 +1,33 @@
+// src/api/pagination.ts
+import type { AxiosRequestConfig } from 'axios';
+import api from './client';
+
+// Списки отдаются курсорными страницами {next, cursor, results} (trips/pagination.py).
+// Берём одну страницу; следующую запрашивает вызывающий ("Показать ещё"),
+// передавая только cursor - фильтры и язык остаются в его собственных params.
+export interface Page<T> {
+  results: T[];
+  cursor: string | null;
+}
+
+// Собственные списки пользователя (машины, свои заказы) - одна страница максимального размера
+export const MAX_PAGE_SIZE = 100;
+
+export async function fetchPage<T>(
+  url: string,
+  config: AxiosRequestConfig = {},
+  cursor?: string | null,
+): Promise<Page<T>> {
+  const { data } = await api.get(url, {
+    ...config,
+    params: { ...(config.params || {}), ...(cursor ? { cursor } : {}) },
+  });
+  if (Array.isArray(data)) return { results: data, cursor: null };
+  return { results: data?.results || [], cursor: data?.cursor || null };
+}
+
+// Дописать страницу к уже загруженным, убирая дубли по id
+export function appendPage<T extends { id: number }>(items: T[], page: T[]): T[] {
+  const seen = new Set(items.map((item) => item.id));
+  return items.concat(page.filter((item) => !seen.has(item.id)));
+}
@@ -0,0 +1,74 @@
+// src/api/tripFeed.ts
+import type { Trip } from './trips';
+
+// ws/trips/feed/ (trips/consumers.py): новые и снятые заказы для водителя.
+// Снимок берётся через /trips/available/, дальше лента присылает только изменения.
+export type TripFeedEvent =
+  | { type: 'trip'; trip: Trip; token: string }
+  | { type: 'withdrawn'; trip_id: number; token: string }
+  | { type: 'synced'; token: string }
+  | { type: 'reset' };
+
+export interface TripFeedHandlers {
+  onTrip: (trip: Trip) => void;
+  onWithdrawn: (tripId: number) => void;
+  // токен устарел или лента была недоступна - снимок надо перечитать
+  onReset: () => void;
+}
+
+const RECONNECT_MIN_MS = 1000;
+const RECONNECT_MAX_MS = 30000;
+// 4401/4403 - нет токена или пользователь не водитель, переподключаться бесполезно
+const FATAL_CLOSE_CODES = [4401, 4403];
+
+function feedUrl(since: string | null) {
+  const url = new URL(import.meta.env.VITE_API_URL, window.location.href);
+  url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+  url.pathname = '/ws/trips/feed/';
+  url.search = since ? `?since=${encodeURIComponent(since)}` : '';
+  return url.toString();
+}
+
+// Подписка с переподключением и докачкой по последнему token; возвращает отписку
+export function subscribeTripFeed(handlers: TripFeedHandlers): () => void {
+  let socket: WebSocket | null = null;
+  let since: string | null = null;
+  let retryDelay = RECONNECT_MIN_MS;
+  let retryTimer: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+
+  const connect = () => {
+    const access = localStorage.getItem('access_token');
+    if (!access || closed) return;
+    socket = new WebSocket(feedUrl(since), ['bearer', access]);
+
+    socket.onmessage = (message) => {
+      const event = JSON.parse(message.data) as TripFeedEvent;
+      if (event.type === 'reset') {
+        since = null;
+        handlers.onReset();
+        return;
+      }
+      if (event.type === 'trip') handlers.onTrip(event.trip);
+      if (event.type === 'withdrawn') handlers.onWithdrawn(event.trip_id);
+      if (event.type === 'synced') retryDelay = RECONNECT_MIN_MS;
+      since = event.token;
+    };
+
+    socket.onclose = (event) => {
+      socket = null;
+      if (closed || FATAL_CLOSE_CODES.includes(event.code)) return;
+      // без токена докачать пропущенное нельзя - перечитываем снимок
+      if (!since) handlers.onReset();
+      retryTimer = setTimeout(connect, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, RECONNECT_MAX_MS);
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    socket?.close();
+  };
+}
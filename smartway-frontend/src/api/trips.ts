@@ -1,5 +1,7 @@
 // src/api/trips.ts
 import api from './client';
+import { fetchPage, MAX_PAGE_SIZE } from './pagination';
+import type { Page } from './pagination';
 import type { SearchFilters } from '../components/SearchFilter';
 
 export interface Trip {
@@ -74,7 +76,8 @@ function getLang(explicitLang?: string) {
 export async function fetchAvailableTrips(
   filters?: SearchFilters,
   lang?: string,
-): Promise<Trip[]> {
+  cursor?: string | null,
+): Promise<Page<Trip>> {
   const lng = getLang(lang);
 
   const params: Record<string, any> = {};
@@ -83,49 +86,38 @@ export async function fetchAvailableTrips(
   if (filters?.date) params.date = filters.date;
   params.lang = lng;
 
-  const response = await api.get('/trips/available/', {
+  return fetchPage('/trips/available/', {
     params,
     headers: { 'Accept-Language': lng },
-  });
-
-  if (Array.isArray(response.data)) return response.data;
-  if (response.data?.results) return response.data.results;
-  return [];
+  }, cursor);
 }
 
 export async function fetchMyTrips(lang?: string): Promise<Trip[]> {
   const lng = getLang(lang);
 
-  const resp = await api.get('/trips/my/', {
-    params: { lang: lng },
+  const page = await fetchPage<Trip>('/trips/my/', {
+    params: { lang: lng, page_size: MAX_PAGE_SIZE },
     headers: { 'Accept-Language': lng },
   });
-
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  return page.results;
 }
 
 export async function fetchMyActiveTrips(lang?: string): Promise<Trip[]> {
   const lng = getLang(lang);
-  const resp = await api.get('/trips/my-active/', {
-    params: { lang: lng },
+  const page = await fetchPage<Trip>('/trips/my-active/', {
+    params: { lang: lng, page_size: MAX_PAGE_SIZE },
     headers: { 'Accept-Language': lng },
   });
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  return page.results;
 }
 
 export async function fetchMyCompletedTrips(lang?: string): Promise<Trip[]> {
   const lng = getLang(lang);
-  const resp = await api.get('/trips/my-completed/', {
-    params: { lang: lng },
+  const page = await fetchPage<Trip>('/trips/my-completed/', {
+    params: { lang: lng, page_size: MAX_PAGE_SIZE },
     headers: { 'Accept-Language': lng },
   });
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  return page.results;
 }
 
 export async function getTripDetail(id: number, lang?: string): Promise<Trip> {
@@ -189,27 +181,21 @@ export interface Review {
 
 export async function fetchMyDriverTrips(lang?: string): Promise<Trip[]> {
   const lng = getLang(lang);
-  const resp = await api.get('/trips/my-driver/', {
-    params: { lang: lng },
+  const page = await fetchPage<Trip>('/trips/my-driver/', {
+    params: { lang: lng, page_size: MAX_PAGE_SIZE },
     headers: { 'Accept-Language': lng },
   });
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  return page.results;
 }
 
 export async function getMyReceivedReviews(): Promise<Review[]> {
-  const resp = await api.get('/reviews/my_received/');
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  const page = await fetchPage<Review>('/reviews/my_received/', { params: { page_size: MAX_PAGE_SIZE } });
+  return page.results;
 }
 
 export async function getMyWrittenReviews(): Promise<Review[]> {
-  const resp = await api.get('/reviews/my_written/');
-  if (Array.isArray(resp.data)) return resp.data;
-  if (resp.data?.results) return resp.data.results;
-  return [];
+  const page = await fetchPage<Review>('/reviews/my_written/', { params: { page_size: MAX_PAGE_SIZE } });
+  return page.results;
 }
 
 export async function createReview(data: {
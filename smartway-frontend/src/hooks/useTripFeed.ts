@@ -0,0 +1,26 @@
+import { useEffect, useRef } from 'react';
+import type { Dispatch, SetStateAction } from 'react';
+import { subscribeTripFeed } from '../api/tripFeed';
+import type { Trip } from '../api/trips';
+
+// Держит список доступных заказов актуальным по WebSocket вместо опроса.
+// Лента доставляет "как минимум один раз", поэтому заказы заменяются по id.
+export function useTripFeed(
+  enabled: boolean,
+  setTrips: Dispatch<SetStateAction<Trip[]>>,
+  reload: () => void,
+) {
+  const reloadRef = useRef(reload);
+  reloadRef.current = reload;
+
+  useEffect(() => {
+    if (!enabled) return;
+    return subscribeTripFeed({
+      onTrip: (trip) =>
+        setTrips((prev) => [trip, ...prev.filter((item) => item.id !== trip.id)]),
+      onWithdrawn: (tripId) =>
+        setTrips((prev) => prev.filter((item) => item.id !== tripId)),
+      onReset: () => reloadRef.current(),
+    });
+  }, [enabled, setTrips]);
+}
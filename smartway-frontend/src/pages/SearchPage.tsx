@@ -38,6 +38,7 @@ import dayjs from 'dayjs';
 
 import { useAuth } from '../auth/AuthContext';
 import { useIsMobile } from '../hooks/useIsMobile';
+import { useTripFeed } from '../hooks/useTripFeed';
 import LocationSelect from '../components/LocationSelect';
 import type { SearchFilters } from '../components/SearchFilter';
 import TripCard from '../components/TripCard';
@@ -59,6 +60,7 @@ import {
   type Trip,
 } from '../api/trips';
 import { getMyCars, type Car } from '../api/auth';
+import { appendPage } from '../api/pagination';
 
 const { Text } = Typography;
 const { TextArea } = Input;
@@ -691,6 +693,10 @@ export default function SearchPage() {
   const [error, setError] = useState<string | null>(null);
   const [announcements, setAnnouncements] = useState<Announcement[]>([]);
   const [trips, setTrips] = useState<Trip[]>([]);
+  // курсоры следующих страниц доступных списков (null - больше нет)
+  const [tripsCursor, setTripsCursor] = useState<string | null>(null);
+  const [announcementsCursor, setAnnouncementsCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [myTrips, setMyTrips] = useState<Trip[]>([]);
   const [bookings, setBookings] = useState<Booking[]>([]);
   const [cars, setCars] = useState<Car[]>([]);
@@ -740,7 +746,8 @@ export default function SearchPage() {
           fetchMyDriverTrips(lang),
           getMyCars(),
         ]);
-        setTrips(tripsData);
+        setTrips(tripsData.results);
+        setTripsCursor(tripsData.cursor);
         setMyTrips(myTripsData);
         setCars(carsData);
         setBookings([]);
@@ -749,7 +756,8 @@ export default function SearchPage() {
           fetchAvailableAnnouncements(searchFilters, lang),
           fetchMyBookings(),
         ]);
-        setAnnouncements(announcementsData);
+        setAnnouncements(announcementsData.results);
+        setAnnouncementsCursor(announcementsData.cursor);
         setBookings(Array.isArray(bookingsData) ? bookingsData : []);
       }
     } catch (err) {
@@ -764,10 +772,42 @@ export default function SearchPage() {
     loadData();
   }, [isAuth, isDriver, i18n.language]);
 
+  // новые и снятые заказы приходят по ленте, список не перезапрашиваем
+  useTripFeed(isAuth && isDriver, setTrips, () => loadData(filters));
+
   useEffect(() => {
     setActiveTab('available');
   }, [isDriver]);
 
+  const loadMore = async () => {
+    const lang = i18n.language?.slice(0, 2) || 'ru';
+    try {
+      setLoadingMore(true);
+      if (isDriver && tripsCursor) {
+        const page = await fetchAvailableTrips(filters, lang, tripsCursor);
+        setTrips(prev => appendPage(prev, page.results));
+        setTripsCursor(page.cursor);
+      } else if (!isDriver && announcementsCursor) {
+        const page = await fetchAvailableAnnouncements(filters, lang, announcementsCursor);
+        setAnnouncements(prev => appendPage(prev, page.results));
+        setAnnouncementsCursor(page.cursor);
+      }
+    } catch (err) {
+      console.error(err);
+      message.error(t('errors.serverError'));
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const renderLoadMore = (cursor: string | null) => cursor ? (
+    <div style={{ textAlign: 'center', margin: '12px 0' }}>
+      <Button onClick={loadMore} loading={loadingMore}>
+        {t('search.loadMore')}
+      </Button>
+    </div>
+  ) : null;
+
   const handleSearch = (newFilters: SearchFilters) => {
     setFilters(newFilters);
     loadData(newFilters);
@@ -1094,6 +1134,7 @@ export default function SearchPage() {
                   showPassengerInfo={true}
                 />
               ))}
+              {renderLoadMore(tripsCursor)}
             </div>
           ) : (
             <Empty description={t('search.noResults')} style={styles.emptyState} />
@@ -1167,6 +1208,7 @@ export default function SearchPage() {
               showDriverInfo={true}
             />
           ))}
+          {renderLoadMore(announcementsCursor)}
         </div>
       ) : (
         <Empty
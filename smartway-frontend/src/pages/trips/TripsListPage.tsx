@@ -24,7 +24,10 @@ import {
   fetchMyCompletedTrips,
 } from '../../api/trips';
 import type { Trip } from '../../api/trips';
+import { appendPage } from '../../api/pagination';
 import { useIsMobile } from '../../hooks/useIsMobile';
+import { useTripFeed } from '../../hooks/useTripFeed';
+import { useAuth } from '../../auth/AuthContext';
 
 const { Text, Title } = Typography;
 
@@ -32,7 +35,10 @@ type TripStatus = 'open' | 'in_progress' | 'completed' | 'cancelled';
 
 export default function TripsListPage() {
   const { i18n } = useTranslation();
+  const { user } = useAuth();
   const [availableTrips, setAvailableTrips] = useState<Trip[]>([]);
+  const [availableCursor, setAvailableCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [myActiveTrips, setMyActiveTrips] = useState<Trip[]>([]);
   const [completedTrips, setCompletedTrips] = useState<Trip[]>([]);
   const [loading, setLoading] = useState(false);
@@ -47,6 +53,8 @@ export default function TripsListPage() {
     void loadTrips();
   }, [i18n.language]);
 
+  useTripFeed(!!user?.is_driver, setAvailableTrips, () => void loadTrips());
+
   async function loadTrips() {
     try {
       setLoading(true);
@@ -55,7 +63,8 @@ export default function TripsListPage() {
         fetchMyActiveTrips(),
         fetchMyCompletedTrips(),
       ]);
-      setAvailableTrips(available);
+      setAvailableTrips(available.results);
+      setAvailableCursor(available.cursor);
       setMyActiveTrips(mine);
       setCompletedTrips(completed);
     } finally {
@@ -63,6 +72,18 @@ export default function TripsListPage() {
     }
   }
 
+  async function loadMoreAvailable() {
+    if (!availableCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchAvailableTrips(undefined, undefined, availableCursor);
+      setAvailableTrips((prev) => appendPage(prev, page.results));
+      setAvailableCursor(page.cursor);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   const getStatusConfig = (status: TripStatus) => {
     const configs: Record<TripStatus, { color: string; text: string }> = {
       open: { color: 'green', text: 'Открыта' },
@@ -226,6 +247,15 @@ export default function TripsListPage() {
                       ),
                     }}
                     renderItem={renderTripCard}
+                    loadMore={
+                      availableCursor && !loading ? (
+                        <div style={{ textAlign: 'center', marginTop: 12 }}>
+                          <Button onClick={loadMoreAvailable} loading={loadingMore}>
+                            Показать ещё
+                          </Button>
+                        </div>
+                      ) : null
+                    }
                   />
                 </div>
               ),